@@ -0,0 +1,4 @@
+"""
+Benchmarks for the ML Models API - synthetic datasets, stub models and latency/RSS measurements
+Everything runs offline; no real model files are needed.
+"""
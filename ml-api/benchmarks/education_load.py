@@ -0,0 +1,199 @@
+"""
+Education load test - starts benchmarks/stub_upstreams.py and the API (pointed at the stub via
+YOUTUBE_BASE_URL / OPENROUTER_URL / RAPIDAPI_BASE_URL), then drives each /api/education/* scenario
+with concurrent clients. Reports throughput, p50/p90/p99, time to first byte for SSE routes,
+status codes and how many upstream calls the stub actually saw, so pooling, coalescing,
+last-good caching and retry/backoff can be checked deterministically.
+
+    cd ml-api
+    python -m benchmarks.education_load --concurrency 32 --requests 200
+    python -m benchmarks.education_load --latency-ms 800 --error-rate 0.2 --rate-limit-rate 0.1
+    python -m benchmarks.education_load --openrouter-rate 50 --endpoints course_generate_distinct assistant
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.run import DEFAULT_RESULTS_DIR, ML_API_DIR, free_port, git_info, process_peak_rss
+from benchmarks.scenarios import render_body, select_education
+from benchmarks.stats import summarize
+
+logger = logging.getLogger("benchmarks")
+
+
+def start_process(cmd, env, base_url: str, health_path: str, timeout: float) -> subprocess.Popen:
+    import httpx
+
+    proc = subprocess.Popen(cmd, cwd=ML_API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{cmd[2]} exited during startup")
+        try:
+            if httpx.get(f"{base_url}{health_path}", timeout=2).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{cmd[2]} not healthy within {timeout}s")
+
+
+def stop_process(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def stub_calls_delta(before: dict, after: dict) -> dict:
+    return {
+        name: {k: v - before[name].get(k, 0) for k, v in counts.items() if k not in ("in_flight", "max_in_flight")}
+        | {"max_in_flight": counts["max_in_flight"]}
+        for name, counts in after.items()
+    }
+
+
+async def drive(client, name: str, method: str, path: str, body, args) -> dict:
+    """Run args.requests requests for one scenario from args.concurrency workers"""
+    import httpx
+
+    latencies, ttfb, statuses, errors = [], [], {}, 0
+    counter = iter(range(args.requests))
+    streaming = path.endswith("/stream") or path.endswith("/generate/course")
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            t = time.perf_counter()
+            try:
+                async with client.stream(method, path, json=render_body(body, i)) as response:
+                    first = None
+                    async for _ in response.aiter_raw():
+                        first = first or time.perf_counter()
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            done = time.perf_counter()
+            latencies.append(done - t)
+            if streaming and first is not None:
+                ttfb.append(first - t)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - start
+    result = {
+        **summarize(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "status_codes": statuses,
+        "errors": errors,
+    }
+    if streaming:
+        result["ttfb"] = summarize(ttfb)
+    return result
+
+
+async def run_scenarios(api_url: str, stub_url: str, args) -> dict:
+    import httpx
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=api_url, timeout=args.request_timeout, limits=limits) as client, \
+            httpx.AsyncClient(base_url=stub_url, timeout=10) as stub:
+        for name, method, path, body in select_education(args.endpoints):
+            await stub.post("/_stub/reset")
+            before = (await stub.get("/_stub/stats")).json()["calls"]
+            result = await drive(client, name, method, path, body, args)
+            after = (await stub.get("/_stub/stats")).json()["calls"]
+            result["upstream_calls"] = stub_calls_delta(before, after)
+            result["api_upstreams"] = (await client.get("/health")).json().get("upstreams", {})
+            results[name] = result
+            logger.info(f"   {name}: p50={result['p50_ms']}ms p99={result['p99_ms']}ms "
+                        f"{result['throughput_rps']} req/s, statuses={result['status_codes']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/education/* against stubbed upstreams")
+    parser.add_argument("--endpoints", nargs="*", help="subset of scenario names (see EDUCATION_ENDPOINTS)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--request-timeout", type=float, default=120)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API")
+    parser.add_argument("--out", type=Path, help="results JSON path (default benchmarks/results/<commit>-education.json)")
+    # Stub behaviour
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunk-ms", type=float, default=15)
+    parser.add_argument("--seed", type=int, default=42)
+    # API-side upstream rate limits (requests/second); defaults are the production settings
+    parser.add_argument("--openrouter-rate", type=float)
+    parser.add_argument("--youtube-rate", type=float)
+    parser.add_argument("--rapidapi-rate", type=float)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    stub_port, api_port = free_port(), free_port()
+    stub_url, api_url = f"http://127.0.0.1:{stub_port}", f"http://127.0.0.1:{api_port}"
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ML_API_DIR), env.get("PYTHONPATH", "")]))
+
+    stub_cmd = [sys.executable, "-m", "benchmarks.stub_upstreams", "--port", str(stub_port), "--seed", str(args.seed),
+                "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+                "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate),
+                "--stream-chunk-ms", str(args.stream_chunk_ms)]
+    stub = start_process(stub_cmd, env, stub_url, "/_stub/health", timeout=60)
+
+    with tempfile.TemporaryDirectory() as empty_models:
+        api_env = {
+            **env,
+            # No model files: the education routes do not need them and startup stays instant
+            "ML_MODELS_DIR": empty_models,
+            "YOUTUBE_BASE_URL": f"{stub_url}/youtube/v3",
+            "OPENROUTER_URL": f"{stub_url}/openrouter/api/v1/chat/completions",
+            "RAPIDAPI_BASE_URL": f"{stub_url}/rapidapi",
+        }
+        for flag, var in (("openrouter_rate", "OPENROUTER_RATE_LIMIT"), ("youtube_rate", "YOUTUBE_RATE_LIMIT"),
+                          ("rapidapi_rate", "RAPIDAPI_RATE_LIMIT")):
+            if getattr(args, flag) is not None:
+                api_env[var] = str(getattr(args, flag))
+        api_cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(api_port),
+                   "--log-level", "warning", "--workers", str(args.workers)]
+        try:
+            api = start_process(api_cmd, api_env, api_url, "/health", timeout=120)
+            try:
+                scenarios = asyncio.run(run_scenarios(api_url, stub_url, args))
+                api_rss = process_peak_rss(api.pid)
+            finally:
+                stop_process(api)
+        finally:
+            stop_process(stub)
+
+    git = git_info()
+    results = {
+        "meta": {**git, "timestamp": datetime.now(timezone.utc).isoformat()},
+        "config": {k: v for k, v in vars(args).items() if k not in ("out",)},
+        "peak_rss_bytes": api_rss,
+        "endpoints": scenarios,
+    }
+    out = args.out or DEFAULT_RESULTS_DIR / f"{git['commit'] or 'nogit'}-education.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, default=str))
+    logger.info(f"✅ Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Import-time benchmark - runs `python -X importtime -c "import main"` in fresh interpreters and
+reports the total, the slowest direct imports, and which heavy libraries were imported eagerly.
+Also times how long a uvicorn worker takes to answer /health with nothing warmed up
+(ML_API_WARMUP=none), which is what a new worker costs when autoscaling.
+
+    cd ml-api
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --runs 10 --budget-ms 700 --skip-spawn
+
+With --budget-ms the exit status is 1 when the median import time is over budget.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.run import DEFAULT_RESULTS_DIR, ML_API_DIR, free_port, git_info
+
+logger = logging.getLogger("benchmarks")
+
+# Libraries that should only be imported when a request (or warm-up) needs them
+HEAVY_MODULES = ("pandas", "numpy", "sklearn", "scipy", "httpx", "uvicorn")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Rows of `import time: self [us] | cumulative | imported package`, with nesting depth"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({"module": name.strip(), "depth": depth, "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return rows
+
+
+def measure_import(module: str, env: dict) -> Dict:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ML_API_DIR, env=env,
+                          capture_output=True, text=True, timeout=300)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    top = next(row for row in reversed(rows) if row["module"] == module and row["depth"] == 0)
+    # The importtime log lists children before their parent, so main's direct imports precede it at depth 1
+    end = rows.index(top)
+    start_idx = max((i + 1 for i, row in enumerate(rows[:end]) if row["depth"] == 0), default=0)
+    direct = [row for row in rows[start_idx:end] if row["depth"] == 1]
+    loaded = {row["module"].split(".")[0] for row in rows}
+    return {
+        "import_ms": round(top["cumulative_us"] / 1000, 2),
+        "process_wall_ms": round(wall_ms, 2),
+        "direct_imports": direct,
+        "heavy_modules_loaded": [name for name in HEAVY_MODULES if name in loaded],
+    }
+
+
+def measure_spawn(env: dict, timeout: float) -> float:
+    """Seconds from launching uvicorn until /health answers"""
+    from benchmarks.education_load import start_process, stop_process
+
+    port = free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    start = time.perf_counter()
+    proc = start_process(cmd, env, f"http://127.0.0.1:{port}", "/health", timeout=timeout)
+    elapsed = time.perf_counter() - start
+    stop_process(proc)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and worker spawn time of the API")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest direct imports to report")
+    parser.add_argument("--budget-ms", type=float, help="fail (exit 1) if the median import time exceeds this")
+    parser.add_argument("--skip-spawn", action="store_true")
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--out", type=Path, help="results JSON path (default benchmarks/results/<commit>-importtime.json)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as empty_models:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ML_API_DIR), env.get("PYTHONPATH", "")]))
+        env.update(ML_MODELS_DIR=empty_models, ML_API_WARMUP="none")
+
+        runs = [measure_import(args.module, env) for _ in range(args.runs)]
+        times = [run["import_ms"] for run in runs]
+        median = statistics.median(times)
+        typical = min(runs, key=lambda run: abs(run["import_ms"] - median))
+        spawn = [] if args.skip_spawn else [measure_spawn(env, args.startup_timeout) for _ in range(args.runs)]
+
+    direct = sorted(typical["direct_imports"], key=lambda row: row["cumulative_us"], reverse=True)[:args.top]
+    logger.info(f"import {args.module}: median {median:.1f}ms over {args.runs} runs "
+                f"(process wall {statistics.median(r['process_wall_ms'] for r in runs):.0f}ms)")
+    for row in direct:
+        logger.info(f"   {row['cumulative_us'] / 1000:8.1f}ms  {row['module']}")
+    if typical["heavy_modules_loaded"]:
+        logger.warning(f"⚠️ Heavy modules imported eagerly: {typical['heavy_modules_loaded']}")
+    if spawn:
+        logger.info(f"uvicorn worker healthy after {statistics.median(spawn):.2f}s (median)")
+
+    git = git_info()
+    results = {
+        "meta": {**git, "timestamp": datetime.now(timezone.utc).isoformat(), "python": sys.version.split()[0]},
+        "module": args.module,
+        "import": {
+            "runs_ms": times,
+            "median_ms": median,
+            "process_wall_median_ms": statistics.median(r["process_wall_ms"] for r in runs),
+            "direct_imports": direct,
+            "heavy_modules_loaded": typical["heavy_modules_loaded"],
+        },
+        "spawn_to_healthy_s": {"runs": [round(s, 3) for s in spawn], "median": round(statistics.median(spawn), 3) if spawn else None},
+        "budget_ms": args.budget_ms,
+        "within_budget": None if args.budget_ms is None else median <= args.budget_ms,
+    }
+    out = args.out or DEFAULT_RESULTS_DIR / f"{git['commit'] or 'nogit'}-importtime.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    logger.info(f"✅ Results written to {out}")
+    if results["within_budget"] is False:
+        logger.error(f"❌ Import time {median:.1f}ms is over the {args.budget_ms:g}ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
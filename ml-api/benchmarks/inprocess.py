@@ -0,0 +1,81 @@
+"""
+In-process benchmark - run in a fresh interpreter so cold start and peak RSS are clean.
+Imports main, loads everything from ML_MODELS_DIR, then calls each endpoint through the
+ASGI app directly (no sockets) and prints one JSON document to stdout.
+
+    python -m benchmarks.inprocess --data-dir /tmp/bench-models --iterations 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.scenarios import select
+from benchmarks.stats import summarize
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+async def run(args) -> dict:
+    import httpx
+
+    start = time.perf_counter()
+    import main
+    import_s = time.perf_counter() - start
+    # Handler logging at INFO would dominate sub-millisecond endpoints
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("main").setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    await main.load_models()
+    load_s = time.perf_counter() - start
+    rss_after_load = peak_rss_bytes()
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        for name, method, path, body in select(args.endpoints):
+            for _ in range(args.warmup):
+                await client.request(method, path, json=body)
+            latencies, statuses = [], {}
+            for _ in range(args.iterations):
+                t = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                latencies.append(time.perf_counter() - t)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            results[name] = {**summarize(latencies), "status_codes": statuses}
+
+    return {
+        "cold_start": {
+            "import_s": round(import_s, 4),
+            "load_models_s": round(load_s, 4),
+            "peak_rss_after_load_bytes": rss_after_load,
+        },
+        "peak_rss_bytes": peak_rss_bytes(),
+        "endpoints": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process endpoint benchmark")
+    parser.add_argument("--data-dir", type=Path, required=True)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--endpoints", nargs="*", help="subset of scenario names")
+    args = parser.parse_args()
+    # Must be set before main is imported
+    os.environ["ML_MODELS_DIR"] = str(args.data_dir.resolve())
+    print(json.dumps(asyncio.run(run(args))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Benchmark runner - generates (or reuses) a synthetic models dir, then measures
+cold start, peak RSS and per-endpoint p50/p99 in-process and under concurrent HTTP load.
+Results are written as JSON tagged with the git commit so runs can be compared.
+
+    cd ml-api
+    python -m benchmarks.run --rows 100000
+    python -m benchmarks.run --rows 1000000 --concurrency 32 --requests 2000 --skip-http
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.scenarios import select
+from benchmarks.stats import summarize
+
+logger = logging.getLogger("benchmarks")
+
+ML_API_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DATA_ROOT = ML_API_DIR / "benchmarks" / "data"
+DEFAULT_RESULTS_DIR = ML_API_DIR / "benchmarks" / "results"
+
+
+def git_info() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=ML_API_DIR, capture_output=True, text=True, timeout=30).stdout.strip()
+        except Exception:
+            return ""
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+
+def ensure_dataset(data_dir: Path, rows: int, seed: int):
+    marker = data_dir / ".rows"
+    if marker.exists() and marker.read_text().strip() == f"{rows}:{seed}":
+        logger.info(f"Reusing synthetic data in {data_dir}")
+        return
+    from benchmarks.synthetic import generate
+    generate(data_dir, rows, seed)
+    marker.write_text(f"{rows}:{seed}")
+
+
+def child_env(data_dir: Path) -> dict:
+    env = dict(os.environ)
+    env["ML_MODELS_DIR"] = str(data_dir.resolve())
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ML_API_DIR), env.get("PYTHONPATH", "")]))
+    return env
+
+
+def run_in_process(data_dir: Path, args) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks.inprocess", "--data-dir", str(data_dir),
+           "--iterations", str(args.iterations), "--warmup", str(args.warmup)]
+    if args.endpoints:
+        cmd += ["--endpoints", *args.endpoints]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ML_API_DIR, env=child_env(data_dir), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"in-process benchmark failed:\n{proc.stderr[-4000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_peak_rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+async def http_load(base_url: str, args) -> dict:
+    import httpx
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        for name, method, path, body in select(args.endpoints):
+            latencies, statuses, errors = [], {}, 0
+            remaining = args.requests
+
+            async def worker():
+                nonlocal remaining, errors
+                while remaining > 0:
+                    remaining -= 1
+                    t = time.perf_counter()
+                    try:
+                        response = await client.request(method, path, json=body)
+                        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    except httpx.HTTPError:
+                        errors += 1
+                        continue
+                    latencies.append(time.perf_counter() - t)
+
+            start = time.perf_counter()
+            await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                **summarize(latencies),
+                "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                "status_codes": statuses,
+                "errors": errors,
+            }
+            logger.info(f"   {name}: p50={results[name]['p50_ms']}ms p99={results[name]['p99_ms']}ms "
+                        f"{results[name]['throughput_rps']} req/s")
+    return results
+
+
+def run_http(data_dir: Path, args) -> dict:
+    import httpx
+
+    port = free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning", "--workers", str(args.workers)]
+    start = time.perf_counter()
+    server = subprocess.Popen(cmd, cwd=ML_API_DIR, env=child_env(data_dir),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    healthy_s = loaded_s = None
+    try:
+        while time.perf_counter() - start < args.startup_timeout:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                health = httpx.get(f"{base_url}/health", timeout=2).json()
+                healthy_s = healthy_s or time.perf_counter() - start
+                if health.get("models_loaded"):
+                    loaded_s = time.perf_counter() - start
+                    loaded_health = health
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        if loaded_s is None:
+            raise RuntimeError(f"models not loaded within {args.startup_timeout}s")
+        endpoints = asyncio.run(http_load(base_url, args))
+        return {
+            "concurrency": args.concurrency,
+            "requests_per_endpoint": args.requests,
+            "workers": args.workers,
+            "cold_start": {
+                "time_to_healthy_s": round(healthy_s, 3),
+                "time_to_models_loaded_s": round(loaded_s, 3),
+                "subsystems": loaded_health.get("subsystems"),
+                "startup_snapshot": loaded_health.get("startup_snapshot"),
+            },
+            "peak_rss_bytes": process_peak_rss(server.pid),
+            "endpoints": endpoints,
+        }
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ML Models API on synthetic data")
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic rows: 100000, 1000000, 5000000, ...")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path, help="synthetic models dir (default benchmarks/data/<rows>)")
+    parser.add_argument("--out", type=Path, help="results JSON path (default benchmarks/results/<commit>-<rows>.json)")
+    parser.add_argument("--endpoints", nargs="*", help="subset of scenario names (see benchmarks/scenarios.py)")
+    parser.add_argument("--iterations", type=int, default=50, help="in-process calls per endpoint")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent HTTP clients")
+    parser.add_argument("--requests", type=int, default=500, help="HTTP requests per endpoint")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--startup-timeout", type=float, default=1800)
+    parser.add_argument("--skip-in-process", action="store_true")
+    parser.add_argument("--skip-http", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    data_dir = args.data_dir or DEFAULT_DATA_ROOT / str(args.rows)
+    ensure_dataset(data_dir, args.rows, args.seed)
+
+    git = git_info()
+    results = {
+        "meta": {
+            **git,
+            "rows": args.rows,
+            "seed": args.seed,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        }
+    }
+    if not args.skip_in_process:
+        logger.info("Running in-process benchmark...")
+        results["in_process"] = run_in_process(data_dir, args)
+    if not args.skip_http:
+        logger.info(f"Running HTTP benchmark ({args.concurrency} concurrent clients)...")
+        results["http"] = run_http(data_dir, args)
+
+    out = args.out or DEFAULT_RESULTS_DIR / f"{git['commit'] or 'nogit'}-{args.rows}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    logger.info(f"✅ Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
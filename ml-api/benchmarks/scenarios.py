@@ -0,0 +1,99 @@
+"""
+Benchmark scenarios - the endpoint requests exercised by both the in-process and HTTP runs
+Request bodies send every feature so the models never fall back to defaults.
+"""
+
+PROPERTY = {
+    "house_size": 1850.0, "bed": 3, "bath": 2.0, "acre_lot": 0.18, "zip_code": 10001,
+    "sqft_per_bed": 616.7, "bed_bath_ratio": 1.5, "bed_bath_sum": 5.0, "lot_size_sqft": 7840.8,
+    "house_to_lot_ratio": 0.236, "city_size": 1200, "is_large_city": 1, "years_since_2000": 24,
+    "is_recent": 1, "decade": 2020, "month_sin": 0.0, "month_cos": -1.0,
+    "zip_price_mean": 350000.0, "zip_price_median": 320000.0, "zip_size_mean": 1800.0,
+    "zip_count": 450, "zip_growth_rate": 0.04, "sold_year": 2024,
+}
+
+COMPS = {"house_size": 1850.0, "bed": 3, "bath": 2.0, "acre_lot": 0.18, "zip_code": 10001,
+         "lat": 40.7506, "lng": -73.9972, "price": 350000.0}
+
+# Synthetic zip codes run 10001, 10008, ... (see synthetic.py)
+GEOCODE_BATCH = {"zip_codes": [10001 + 7 * (i % 4000) for i in range(10_000)],
+                 "keys": [f"{i} Main St" for i in range(10_000)]}
+
+# (name, method, path, json body)
+ENDPOINTS = [
+    ("health", "GET", "/health", None),
+    ("predict_price", "POST", "/api/predict-price", PROPERTY),
+    ("forecast", "POST", "/api/forecast", PROPERTY),
+    ("forecast_bands", "POST", "/api/forecast?mode=bands&paths=10000&seed=1", PROPERTY),
+    ("clusters_summary", "GET", "/api/clusters/summary", None),
+    ("clusters_centroids", "GET", "/api/clusters/centroids", None),
+    ("clusters_all_page", "GET", "/api/clusters/all?page=5&size=1000", None),
+    ("advisor_recommend_state", "GET", "/api/advisor/recommend?budget=400000&state=Texas&min_beds=2&top_n=10", None),
+    ("advisor_recommend_national", "GET", "/api/advisor/recommend?budget=400000&top_n=10", None),
+    ("advisor_states", "GET", "/api/advisor/states", None),
+    ("advisor_cities", "GET", "/api/advisor/cities/Texas", None),
+    ("zip_codes", "GET", "/api/zip-codes", None),
+    ("zip_stats", "GET", "/api/zip-codes/10001/stats", None),
+    ("forecast_properties_state", "GET", "/api/forecast/properties?state=Texas&limit=50", None),
+    ("cube_state_beds", "GET", "/api/analytics/cube?group_by=state&group_by=bed", None),
+    ("cube_city_drilldown", "GET", "/api/analytics/cube?group_by=city&group_by=size_band&state=Texas&beds=3", None),
+    ("distribution_state", "GET", "/api/analytics/distribution?level=state&region=Texas&region=Ohio", None),
+    ("distribution_all_zips", "GET", "/api/analytics/distribution?level=zip", None),
+    ("search_range", "GET", "/api/properties/search?min_price=200000&max_price=400000&beds=3&sort=price&limit=50", None),
+    ("search_city", "GET", "/api/properties/search?state=Texas&city=Austin&sort=house_size&order=desc&limit=50", None),
+    ("comps", "POST", "/api/comps?k=10", COMPS),
+    ("comps_cluster", "POST", "/api/comps?k=10&scope=cluster", COMPS),
+    ("geocode_zip", "GET", "/api/geocode/10001?key=12%20Main%20St", None),
+    ("geocode_batch_10k", "POST", "/api/geocode/batch", GEOCODE_BATCH),
+]
+
+
+def select(names=None):
+    if not names:
+        return ENDPOINTS
+    wanted = set(names)
+    return [e for e in ENDPOINTS if e[0] in wanted]
+
+
+# Education routes, run against benchmarks/stub_upstreams.py by benchmarks/education_load.py.
+# A "{i}" in a body string is replaced with the request number so that scenario
+# defeats single-flight coalescing; without it every request is identical.
+COURSE = {
+    "id": "bench-course", "title": "Tokenization Fundamentals", "level": "intermediate",
+    "modules": [
+        {"title": f"Module {i + 1}", "topics": [f"Topic {i + 1}.1", f"Topic {i + 1}.2"]} for i in range(4)
+    ],
+}
+
+EDUCATION_ENDPOINTS = [
+    ("youtube_search", "GET", "/api/education/youtube/search?query=real+estate+tokenization&max_results=5", None),
+    ("news", "GET", "/api/education/news?limit=5", None),
+    ("course_generate_identical", "POST", "/api/education/courses/generate",
+     {"topic": "Real estate tokenization", "level": "intermediate", "duration_hours": 2}),
+    ("course_generate_distinct", "POST", "/api/education/courses/generate",
+     {"topic": "Real estate tokenization {i}", "level": "intermediate", "duration_hours": 2}),
+    ("course_generate_stream", "POST", "/api/education/courses/generate/stream",
+     {"topic": "Real estate tokenization {i}", "level": "beginner", "duration_hours": 2}),
+    ("quiz_generate", "POST", "/api/education/quizzes/generate",
+     {"course_content": COURSE, "module_index": 0, "num_questions": 5}),
+    ("course_quizzes", "POST", "/api/education/quizzes/generate/course",
+     {"course_content": COURSE, "num_questions": 5, "max_concurrency": 3}),
+    ("assistant", "POST", "/api/education/assistant", {"question": "What is tokenization? ({i})"}),
+    ("assistant_stream", "POST", "/api/education/assistant/stream", {"question": "How do SPVs work? ({i})"}),
+]
+
+
+def select_education(names=None):
+    if not names:
+        return EDUCATION_ENDPOINTS
+    wanted = set(names)
+    return [e for e in EDUCATION_ENDPOINTS if e[0] in wanted]
+
+
+def render_body(body, i: int):
+    """Substitute the request number into "{i}" placeholders of a scenario body"""
+    if isinstance(body, dict):
+        return {k: render_body(v, i) for k, v in body.items()}
+    if isinstance(body, str):
+        return body.replace("{i}", str(i))
+    return body
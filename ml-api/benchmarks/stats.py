@@ -0,0 +1,23 @@
+"""Latency summary helpers shared by the benchmark runners"""
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies_s: List[float]) -> Dict:
+    values = sorted(latencies_s)
+    n = len(values)
+    return {
+        "n": n,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p90_ms": round(percentile(values, 90) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "mean_ms": round(sum(values) / n * 1000, 3) if n else 0.0,
+        "max_ms": round(values[-1] * 1000, 3) if n else 0.0,
+    }
@@ -0,0 +1,284 @@
+"""
+Stub upstreams - a local stand-in for the YouTube Data API, OpenRouter chat completions
+(buffered and SSE streaming) and the RapidAPI crypto news feed, with configurable latency,
+jitter, error and 429 rates so the education endpoints can be load tested offline.
+
+    python -m benchmarks.stub_upstreams --port 8900 --latency-ms 300 --error-rate 0.05
+
+then start the API against it:
+
+    YOUTUBE_BASE_URL=http://127.0.0.1:8900/youtube/v3 \\
+    OPENROUTER_URL=http://127.0.0.1:8900/openrouter/api/v1/chat/completions \\
+    RAPIDAPI_BASE_URL=http://127.0.0.1:8900/rapidapi \\
+    uvicorn main:app
+
+Behaviour can be changed while running with POST /_stub/config (per-upstream overrides),
+and GET /_stub/stats returns call counts so coalescing and caching can be checked.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+UPSTREAMS = ("youtube", "openrouter", "rapidapi")
+
+DEFAULT_CONFIG = {
+    "latency_ms": 200.0,         # time before the response (or first stream chunk)
+    "jitter_ms": 50.0,           # uniform +/- jitter on latency_ms
+    "error_rate": 0.0,           # fraction answered with error_status
+    "error_status": 503,
+    "rate_limit_rate": 0.0,      # fraction answered with 429 + Retry-After
+    "retry_after_s": 1,
+    "stream_chunk_chars": 24,    # SSE delta size for streamed completions
+    "stream_chunk_ms": 15.0,     # delay between SSE deltas
+    "course_modules": 4,
+}
+
+
+class StubState:
+    """Per-upstream config plus call counters, shared by all handlers"""
+
+    def __init__(self, seed: int = 42, **defaults):
+        self.rng = random.Random(seed)
+        self.defaults = {**DEFAULT_CONFIG, **{k: v for k, v in defaults.items() if v is not None}}
+        self.overrides: Dict[str, Dict] = {name: {} for name in UPSTREAMS}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.calls = {name: {"total": 0, "ok": 0, "error": 0, "rate_limited": 0, "in_flight": 0, "max_in_flight": 0}
+                      for name in UPSTREAMS}
+
+    def config(self, upstream: str) -> Dict:
+        return {**self.defaults, **self.overrides[upstream]}
+
+    def update(self, body: Dict):
+        """Top-level keys set the defaults; a key named after an upstream overrides just that upstream"""
+        for key, value in body.items():
+            if key in UPSTREAMS:
+                self.overrides[key].update(value)
+            elif key in DEFAULT_CONFIG:
+                self.defaults[key] = value
+
+    def snapshot(self) -> Dict:
+        return {"config": {name: self.config(name) for name in UPSTREAMS}, "calls": self.calls}
+
+
+# ==========================================
+# CANNED PAYLOADS
+# ==========================================
+def _course_json(topic: str, modules: int) -> str:
+    return json.dumps({
+        "title": f"{topic} Fundamentals",
+        "description": f"A structured course on {topic}.",
+        "objectives": [f"Understand {topic}", "Evaluate tokenized assets", "Apply the concepts"],
+        "modules": [
+            {
+                "title": f"Module {i + 1}: {topic} part {i + 1}",
+                "description": f"Covers part {i + 1} of {topic}.",
+                "topics": [f"Topic {i + 1}.{j + 1}" for j in range(3)],
+                "duration_minutes": 30,
+                "outcomes": [f"Outcome {i + 1}"],
+            }
+            for i in range(modules)
+        ],
+        "prerequisites": ["Basic blockchain knowledge"],
+        "target_audience": "Investors and developers",
+    })
+
+
+def _quiz_json(num_questions: int) -> str:
+    return json.dumps({
+        "quiz_id": "stub-quiz",
+        "module_title": "Stub module",
+        "questions": [
+            {
+                "id": i + 1,
+                "question": f"Question {i + 1}?",
+                "options": {"A": "Alpha", "B": "Beta", "C": "Gamma", "D": "Delta"},
+                "correct_answer": "ABCD"[i % 4],
+                "explanation": "Because the stub says so.",
+                "points": 1,
+            }
+            for i in range(num_questions)
+        ],
+        "total_points": num_questions,
+    })
+
+
+def _completion_text(messages: List[Dict], modules: int) -> str:
+    """Pick a plausible completion from the prompt so callers parse it like the real thing"""
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content", "") for m in messages if m.get("role") == "user"), "")
+    if "course creator" in system:
+        topic = user.split('course on "', 1)[1].split('"', 1)[0] if 'course on "' in user else "Tokenization"
+        return _course_json(topic, modules)
+    if "quiz creator" in system:
+        try:
+            num_questions = int(user.split("Generate ", 1)[1].split(" ", 1)[0])
+        except (IndexError, ValueError):
+            num_questions = 10
+        return _quiz_json(num_questions)
+    if "content analyzer" in system:
+        return json.dumps({
+            "key_points": ["Tokenization splits ownership"], "concepts": ["Real Estate", "Tokenization"],
+            "difficulty": "intermediate", "prerequisites": ["Blockchain basics"], "applications": ["Fractional investing"],
+        })
+    return ("Tokenization represents ownership of a property as digital tokens on a blockchain. "
+            "Think of it like splitting a building into shares that can be traded. "
+            "You might also explore smart contracts and regulatory frameworks.")
+
+
+def _youtube_items(query: str, max_results: int) -> List[Dict]:
+    return [
+        {
+            "id": {"videoId": f"stub{i:04d}"},
+            "snippet": {
+                "title": f"{query} explained #{i + 1}",
+                "description": f"An introduction to {query}.",
+                "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/stub{i:04d}/hqdefault.jpg"}},
+                "channelTitle": "Stub Academy",
+                "publishedAt": "2024-01-01T00:00:00Z",
+            },
+        }
+        for i in range(max_results)
+    ]
+
+
+def _news_items() -> List[Dict]:
+    return [
+        {"title": f"Crypto headline {i + 1}", "description": "Market update.", "url": f"https://example.com/news/{i + 1}",
+         "publishedAt": "2024-01-01T00:00:00Z", "source": "Stub News"}
+        for i in range(20)
+    ]
+
+
+# ==========================================
+# APP
+# ==========================================
+def create_app(state: StubState) -> FastAPI:
+    app = FastAPI(title="Stub Upstreams")
+    app.state.stub = state
+
+    async def admit(upstream: str):
+        """Sleep for the configured latency, then return an error response or None to proceed"""
+        cfg = state.config(upstream)
+        calls = state.calls[upstream]
+        calls["total"] += 1
+        delay = max(0.0, cfg["latency_ms"] + state.rng.uniform(-cfg["jitter_ms"], cfg["jitter_ms"])) / 1000
+        await asyncio.sleep(delay)
+        roll = state.rng.random()
+        if roll < cfg["rate_limit_rate"]:
+            calls["rate_limited"] += 1
+            return JSONResponse({"error": "rate limited"}, status_code=429,
+                                headers={"Retry-After": str(cfg["retry_after_s"])})
+        if roll < cfg["rate_limit_rate"] + cfg["error_rate"]:
+            calls["error"] += 1
+            return JSONResponse({"error": "stub failure"}, status_code=cfg["error_status"])
+        calls["ok"] += 1
+        return None
+
+    @contextmanager
+    def track(upstream: str):
+        calls = state.calls[upstream]
+        calls["in_flight"] += 1
+        calls["max_in_flight"] = max(calls["max_in_flight"], calls["in_flight"])
+        try:
+            yield
+        finally:
+            calls["in_flight"] -= 1
+
+    @app.get("/youtube/v3/search")
+    async def youtube_search(q: str = "", maxResults: int = 5):
+        with track("youtube"):
+            error = await admit("youtube")
+            return error or {"items": _youtube_items(q, maxResults)}
+
+    @app.get("/rapidapi/v1/cryptodaily")
+    async def crypto_news():
+        with track("rapidapi"):
+            error = await admit("rapidapi")
+            return error or {"data": _news_items()}
+
+    @app.post("/openrouter/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        cfg = state.config("openrouter")
+        text = _completion_text(body.get("messages", []), int(cfg["course_modules"]))
+
+        if not body.get("stream"):
+            with track("openrouter"):
+                error = await admit("openrouter")
+                return error or {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+        # The stream outlives this handler, so in-flight tracking moves into the generator
+        with track("openrouter"):
+            error = await admit("openrouter")
+        if error:
+            return error
+
+        async def events():
+            with track("openrouter"):
+                yield ": OPENROUTER PROCESSING\n\n"
+                size = max(1, int(cfg["stream_chunk_chars"]))
+                for i in range(0, len(text), size):
+                    chunk = {"choices": [{"delta": {"content": text[i:i + size]}}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(cfg["stream_chunk_ms"] / 1000)
+                yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/_stub/stats")
+    async def stats():
+        return state.snapshot()
+
+    @app.post("/_stub/config")
+    async def configure(request: Request):
+        state.update(await request.json())
+        return state.snapshot()
+
+    @app.post("/_stub/reset")
+    async def reset():
+        state.reset_stats()
+        return state.snapshot()
+
+    @app.get("/_stub/health")
+    async def health():
+        return {"status": "ok", "uptime_s": round(time.monotonic() - started, 3)}
+
+    started = time.monotonic()
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub YouTube / OpenRouter / RapidAPI upstreams for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--jitter-ms", type=float)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--error-status", type=int)
+    parser.add_argument("--rate-limit-rate", type=float)
+    parser.add_argument("--stream-chunk-ms", type=float)
+    parser.add_argument("--course-modules", type=int)
+    args = parser.parse_args()
+
+    state = StubState(
+        seed=args.seed, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_status=args.error_status, rate_limit_rate=args.rate_limit_rate,
+        stream_chunk_ms=args.stream_chunk_ms, course_modules=args.course_modules,
+    )
+    uvicorn.run(create_app(state), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Synthetic dataset generator - writes files with the same names and schemas main.py loads:
+data_with_street_coords.csv / clustered_by_street.csv, street_cluster_centroids.csv,
+Predict_price.pkl and model_predict_10_years.pkl (small sklearn models fit on the synthetic data)
+
+    python -m benchmarks.synthetic --rows 1000000 --out /tmp/bench-models
+"""
+import argparse
+import logging
+import pickle
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STATES = [
+    'Alabama', 'Arizona', 'California', 'Colorado', 'Florida', 'Georgia', 'Illinois', 'Massachusetts',
+    'Michigan', 'New Jersey', 'New York', 'North Carolina', 'Ohio', 'Pennsylvania', 'Puerto Rico',
+    'Texas', 'Virginia', 'Washington',
+]
+CITIES_PER_STATE = 60
+ZIPS_PER_CITY = 4
+NUM_CLUSTERS = 2000
+
+PRICE_FEATURES = [
+    "house_size", "bed", "bath", "acre_lot", "zip_code", "sqft_per_bed", "bed_bath_ratio", "bed_bath_sum",
+    "lot_size_sqft", "house_to_lot_ratio", "city_size", "is_large_city", "years_since_2000", "is_recent",
+    "decade", "month_sin", "month_cos", "zip_price_mean", "zip_price_median", "zip_size_mean", "zip_count",
+    "zip_growth_rate",
+]
+FORECAST_FEATURES = [
+    "house_size", "bath", "bed", "sqft_per_bed", "bed_bath_ratio", "bed_bath_sum", "acre_lot", "lot_size_sqft",
+    "house_to_lot_ratio", "city_size", "is_large_city", "years_since_2000", "is_recent", "decade", "month_sin",
+    "month_cos", "zip_price_mean", "zip_price_median", "zip_size_mean", "zip_count", "zip_code", "zip_growth_rate",
+]
+
+
+def _locations(seed: int):
+    """Fixed state -> city -> zip hierarchy with a base coordinate and price level per zip"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    zip_code = 10001
+    for state in STATES:
+        state_lat, state_lng = rng.uniform(26, 47), rng.uniform(-122, -72)
+        for c in range(CITIES_PER_STATE):
+            city = f"{state[:3]} City {c}"
+            city_lat, city_lng = state_lat + rng.normal(0, 1.5), state_lng + rng.normal(0, 1.5)
+            for _ in range(ZIPS_PER_CITY):
+                rows.append((state, city, zip_code, city_lat + rng.normal(0, 0.1), city_lng + rng.normal(0, 0.1),
+                             rng.lognormal(12.4, 0.45)))
+                zip_code += 7
+    return pd.DataFrame(rows, columns=["state", "city", "zip_code", "lat", "lng", "zip_price"])
+
+
+def generate_chunk(locations: pd.DataFrame, n: int, rng: np.random.Generator) -> pd.DataFrame:
+    loc = locations.iloc[rng.integers(0, len(locations), n)].reset_index(drop=True)
+    bed = rng.integers(1, 7, n)
+    bath = np.clip(bed - rng.integers(0, 3, n), 1, None).astype(float)
+    house_size = np.round(rng.normal(600 + 450 * bed, 250).clip(350), 0)
+    acre_lot = np.round(rng.lognormal(-1.6, 0.9, n), 3)
+    price = np.round(loc["zip_price"].to_numpy() * (house_size / 1800) ** 0.8 * rng.lognormal(0, 0.25, n), -2)
+    df = pd.DataFrame({
+        "brokered_by": rng.integers(1000, 100000, n).astype(float),
+        "status": rng.choice(["for_sale", "sold"], n, p=[0.7, 0.3]),
+        "price": price,
+        "bed": bed.astype(float),
+        "bath": bath,
+        "acre_lot": acre_lot,
+        "street": rng.integers(1, 2_000_000, n).astype(float),
+        "city": loc["city"].to_numpy(),
+        "state": loc["state"].to_numpy(),
+        "zip_code": loc["zip_code"].astype(float).to_numpy(),
+        "house_size": house_size,
+        "prev_sold_date": pd.to_datetime(rng.integers(946684800, 1704067200, n), unit="s").strftime("%Y-%m-%d"),
+        "lat": loc["lat"].to_numpy() + rng.normal(0, 0.002, n),
+        "lng": loc["lng"].to_numpy() + rng.normal(0, 0.002, n),
+    })
+    # Street clusters follow geography: bucket by rounded coordinates
+    df["street_cluster"] = ((np.floor(df["lat"] * 4) * 1000 + np.floor(df["lng"] * 4)) % NUM_CLUSTERS).astype(int)
+    # Real data has gaps
+    for col, frac in (("price", 0.002), ("house_size", 0.02), ("acre_lot", 0.05), ("bed", 0.01)):
+        df.loc[rng.random(n) < frac, col] = np.nan
+    return df
+
+
+def write_dataset(out_dir: Path, rows: int, seed: int = 42, chunk_size: int = 250_000) -> Path:
+    """Stream rows to data_with_street_coords.csv in chunks so 5M rows never sit in memory at once"""
+    rng = np.random.default_rng(seed)
+    locations = _locations(seed)
+    data_path = out_dir / "data_with_street_coords.csv"
+    centroid_sums = None
+    written = 0
+    with open(data_path, "w", newline="") as f:
+        while written < rows:
+            n = min(chunk_size, rows - written)
+            chunk = generate_chunk(locations, n, rng)
+            chunk.to_csv(f, header=written == 0, index=False)
+            sums = chunk.groupby("street_cluster").agg(lat=("lat", "sum"), lng=("lng", "sum"), count=("lat", "size"))
+            centroid_sums = sums if centroid_sums is None else centroid_sums.add(sums, fill_value=0)
+            written += n
+            logger.info(f"   wrote {written:,}/{rows:,} rows")
+
+    centroids = pd.DataFrame({
+        "cluster_id": centroid_sums.index.astype(int),
+        "lat": centroid_sums["lat"] / centroid_sums["count"],
+        "lng": centroid_sums["lng"] / centroid_sums["count"],
+        "count": centroid_sums["count"].astype(int),
+        "street": [f"Cluster {i} St" for i in centroid_sums.index],
+    })
+    centroids.to_csv(out_dir / "street_cluster_centroids.csv", index=False)
+
+    # main.py reads the clustered file for the cluster endpoints; it has the same schema
+    clustered = out_dir / "clustered_by_street.csv"
+    if clustered.exists() or clustered.is_symlink():
+        clustered.unlink()
+    try:
+        clustered.symlink_to(data_path.name)
+    except OSError:
+        import shutil
+        shutil.copyfile(data_path, clustered)
+    return data_path
+
+
+def _training_frame(locations: pd.DataFrame, rng: np.random.Generator, n: int = 20_000) -> pd.DataFrame:
+    df = generate_chunk(locations, n, rng).dropna(subset=["price", "house_size", "acre_lot", "bed"])
+    bed = df["bed"].clip(lower=1)
+    bath = df["bath"].clip(lower=1)
+    year = pd.to_datetime(df["prev_sold_date"]).dt.year
+    zip_groups = df.groupby("zip_code")
+    city_counts = df.groupby("city")["price"].transform("size")
+    return pd.DataFrame({
+        "house_size": df["house_size"], "bed": bed, "bath": bath, "acre_lot": df["acre_lot"].clip(lower=0.01),
+        "zip_code": df["zip_code"], "sqft_per_bed": df["house_size"] / bed, "bed_bath_ratio": bed / bath,
+        "bed_bath_sum": bed + bath, "lot_size_sqft": df["acre_lot"] * 43560,
+        "house_to_lot_ratio": df["house_size"] / (df["acre_lot"].clip(lower=0.01) * 43560),
+        "city_size": city_counts, "is_large_city": (city_counts > 1000).astype(int),
+        "years_since_2000": year - 2000, "is_recent": (year >= 2015).astype(int), "decade": (year // 10) * 10,
+        "month_sin": 0.0, "month_cos": -1.0,
+        "zip_price_mean": zip_groups["price"].transform("mean"), "zip_price_median": zip_groups["price"].transform("median"),
+        "zip_size_mean": zip_groups["house_size"].transform("mean"), "zip_count": zip_groups["price"].transform("size"),
+        "zip_growth_rate": 0.04, "price": df["price"],
+    })
+
+
+def write_stub_models(out_dir: Path, seed: int = 42):
+    """Fit small sklearn regressors on synthetic rows and pickle them in the layout main.py expects"""
+    from sklearn.linear_model import Ridge
+
+    rng = np.random.default_rng(seed + 1)
+    locations = _locations(seed)
+    train = _training_frame(locations, rng)
+    target = np.log1p(train["price"])
+
+    price_model = Ridge(alpha=1.0).fit(train[PRICE_FEATURES], target)
+    with open(out_dir / "Predict_price.pkl", "wb") as f:
+        pickle.dump({"model": price_model, "features": PRICE_FEATURES}, f)
+
+    forecast_model = Ridge(alpha=1.0).fit(train[FORECAST_FEATURES], target)
+    zip_growth = {float(z): float(g) for z, g in zip(locations["zip_code"], rng.normal(0.04, 0.015, len(locations)))}
+    with open(out_dir / "model_predict_10_years.pkl", "wb") as f:
+        pickle.dump({
+            "model": forecast_model,
+            "features": FORECAST_FEATURES,
+            "metrics": {"r2": float(forecast_model.score(train[FORECAST_FEATURES], target)), "mae": 0.0},
+            "growth_rates": {"zip_growth_rates": zip_growth, "overall_growth": 0.04},
+            "reference_year": 2024,
+            "avg_inflation": 0.025,
+        }, f)
+
+
+def generate(out_dir: Path, rows: int, seed: int = 42) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    write_dataset(out_dir, rows, seed)
+    write_stub_models(out_dir, seed)
+    logger.info(f"✅ Synthetic models dir ready at {out_dir} ({rows:,} rows, {time.perf_counter() - start:.1f}s)")
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic models/ directory for benchmarks")
+    parser.add_argument("--rows", type=int, default=100_000, help="property rows (e.g. 100000, 1000000, 5000000)")
+    parser.add_argument("--out", type=Path, required=True, help="output directory (used as ML_MODELS_DIR)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    generate(args.out, args.rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
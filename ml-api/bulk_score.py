@@ -0,0 +1,260 @@
+"""
+Bulk scoring - price and forecast predictions for a whole file of properties, for offline jobs
+such as the nightly portfolio revaluation, without going through the HTTP API row by row.
+
+    cd ml-api
+    python -m bulk_score portfolio.csv scores.csv --workers 4
+    python -m bulk_score portfolio.parquet scores.parquet --models price --no-location-features
+
+The input (CSV, or Parquet when pyarrow is installed) is streamed in chunks. Each chunk gets
+the inputs the API would build: zip and city features the rows lack come from the property
+indexes (main.location_features), derived features from forecast_table.engineer_features_frame,
+and columns the file does give are used as they are. Every model then runs once per chunk,
+in a process pool when --workers > 1, and the results are appended to the output in input
+order as chunks finish, with progress and throughput logged along the way.
+
+The output has the input's columns plus
+
+    predicted_price         price model at sold_year (default 2024), as /api/predict-price
+    current_price, price_1yr, price_5yr, price_10yr, growth_rate
+                            forecast model from its reference year, as the forecast table
+"""
+import argparse
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from forecast_table import COLUMNS as FORECAST_COLUMNS, INPUT_COLUMNS, default_workers, engineer_features_frame, forecast_chunk
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_YEAR = 2024
+
+
+def price_chunk(frame, fields: Dict[str, Any]):
+    """predicted_price for each row of frame; fields are the price artifact's model and features plus growth_rates"""
+    import numpy as np
+    import pandas as pd
+
+    features = engineer_features_frame(frame, DEFAULT_YEAR, fields.get("growth_rates"))
+    if "sold_year" in frame.columns:
+        years = pd.to_numeric(frame["sold_year"], errors="coerce").fillna(DEFAULT_YEAR).to_numpy(dtype=int)
+        features = features.assign(years_since_2000=years - 2000, is_recent=(years >= 2015).astype(int),
+                                   decade=(years // 10) * 10)
+    # As in main.price_input, values the input gives win over engineered ones
+    for name in fields["features"]:
+        if name in frame.columns:
+            given = pd.to_numeric(frame[name], errors="coerce")
+            features[name] = given.where(given.notna(), features[name])
+    return np.expm1(np.asarray(fields["model"].predict(features[fields["features"]]), dtype=float))
+
+
+def score_chunk(frame, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Output columns for each row of frame, rounded as the API rounds them; fields holds the "price" and/or "forecast" fields"""
+    import numpy as np
+
+    values = {}
+    if fields.get("price") is not None:
+        values["predicted_price"] = price_chunk(frame, fields["price"])
+    if fields.get("forecast") is not None:
+        values.update(forecast_chunk(frame, fields["forecast"]))
+    return {name: np.round(values[name], 4 if name == "growth_rate" else 2) for name in score_columns(fields)}
+
+
+def score_columns(fields: Dict[str, Any]) -> List[str]:
+    return (["predicted_price"] if fields.get("price") is not None else []) + (
+        list(FORECAST_COLUMNS) if fields.get("forecast") is not None else [])
+
+
+def render_chunk(passthrough, model_input, fields: Dict[str, Any], as_csv: bool):
+    """One chunk of output: the passthrough columns plus the scores, as CSV text (no header) or a DataFrame"""
+    import pandas as pd
+
+    output = pd.concat([passthrough.reset_index(drop=True), pd.DataFrame(score_chunk(model_input, fields))], axis=1)
+    # Formatting CSV costs more than scoring, so it happens here, in the workers
+    return output.to_csv(index=False, header=False) if as_csv else output
+
+
+_worker_fields: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(fields: Dict[str, Any]):
+    # The models are shipped once per worker, not once per chunk
+    global _worker_fields
+    _worker_fields = fields
+
+
+def _render_in_worker(passthrough, model_input, as_csv: bool):
+    return render_chunk(passthrough, model_input, _worker_fields, as_csv)
+
+
+def read_chunks(path: Path, chunk_size: int) -> Iterator:
+    """DataFrames of at most chunk_size rows from a CSV or Parquet file"""
+    if is_parquet(path):
+        require_pyarrow()
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        import pandas as pd
+        yield from pd.read_csv(path, chunksize=chunk_size, low_memory=False)
+
+
+def is_parquet(path: Path) -> bool:
+    return path.suffix.lower() in (".parquet", ".pq")
+
+
+def require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise SystemExit("❌ Parquet files need pyarrow (pip install pyarrow)")
+
+
+class ChunkWriter:
+    """Appends rendered chunks to a CSV or Parquet file (written under a temporary name, renamed when complete)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.tmp = path.with_name(f".{path.name}.partial")
+        self.parquet = is_parquet(path)
+        self.file = None
+        self.writer = None
+        self.rows = 0
+        if self.parquet:
+            require_pyarrow()
+
+    def write(self, chunk, columns: List[str], rows: int):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.tmp, table.schema)
+            self.writer.write_table(table.cast(self.writer.schema))
+        else:
+            if self.file is None:
+                self.file = open(self.tmp, "w", newline="")
+                self.file.write(",".join(columns) + "\n")
+            self.file.write(chunk)
+        self.rows += rows
+
+    def close(self, complete: bool = True):
+        """Finish the file; an incomplete run leaves no output behind"""
+        for handle in (self.writer, self.file):
+            if handle is not None:
+                handle.close()
+        if complete and self.rows:
+            self.tmp.replace(self.path)
+        else:
+            self.tmp.unlink(missing_ok=True)
+
+
+def score_file(input_path: Path, output_path: Path, fields: Dict[str, Any], prepare=None, keep: Optional[List[str]] = None,
+               workers: int = 1, chunk_size: int = 100_000) -> Dict[str, Any]:
+    """Score every row of input_path into output_path.
+
+    prepare(chunk) returns extra model inputs (location features); keep lists the input
+    columns copied to the output (default all of them).
+    """
+    needed = set(INPUT_COLUMNS) | {"sold_year"} | set(fields["price"]["features"] if fields.get("price") else ())
+    writer = ChunkWriter(output_path)
+    pending, done, started = deque(), 0, time.perf_counter()
+    pool, complete = None, False
+    if workers > 1:
+        # spawn, as in forecast_table: children must not inherit the parent's threads and locks
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                   initializer=_init_worker, initargs=(fields,))
+
+    def finish(rendered, columns, rows):
+        nonlocal done
+        writer.write(rendered, columns, rows)
+        done += rows
+        elapsed = time.perf_counter() - started
+        logger.info(f"   {done:,} rows scored in {elapsed:.1f}s ({done / elapsed:,.0f} rows/s)")
+
+    try:
+        for chunk in read_chunks(input_path, chunk_size):
+            missing = [c for c in keep or () if c not in chunk.columns]
+            if missing:
+                raise SystemExit(f"❌ Columns {missing} not in {input_path}")
+            passthrough = chunk[keep] if keep is not None else chunk
+            model_input = chunk.assign(**prepare(chunk)) if prepare is not None else chunk
+            # Only the columns the models read are sent to the workers
+            model_input = model_input[[c for c in model_input.columns if c in needed]]
+            columns = list(passthrough.columns) + score_columns(fields)
+            if pool is None:
+                finish(render_chunk(passthrough, model_input, fields, not writer.parquet), columns, len(chunk))
+                continue
+            pending.append((pool.submit(_render_in_worker, passthrough, model_input, not writer.parquet), columns, len(chunk)))
+            # Keep every worker busy while bounding how many chunks are held in memory
+            while len(pending) > 2 * workers:
+                future, columns, rows = pending.popleft()
+                finish(future.result(), columns, rows)
+        while pending:
+            future, columns, rows = pending.popleft()
+            finish(future.result(), columns, rows)
+        complete = True
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        writer.close(complete)
+    elapsed = time.perf_counter() - started
+    return {"rows": done, "seconds": round(elapsed, 2), "rows_per_second": round(done / elapsed) if elapsed > 0 else None,
+            "output": str(output_path) if done else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of properties with the price and forecast models")
+    parser.add_argument("input", type=Path)
+    parser.add_argument("output", type=Path, help=".csv or .parquet")
+    parser.add_argument("--models", default="price,forecast", help="comma-separated: price, forecast (default both)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default ML_FORECAST_WORKERS or CPUs - 1)")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--columns", default=None,
+                        help="comma-separated input columns to copy to the output, e.g. an id (default all)")
+    parser.add_argument("--no-location-features", action="store_true",
+                        help="do not load the property data; rows without zip features get the model defaults")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    models = [name.strip() for name in args.models.split(",") if name.strip()]
+    unknown = set(models) - {"price", "forecast"}
+    if unknown or not models:
+        raise SystemExit(f"❌ Unknown models {sorted(unknown)}, expected price and/or forecast")
+    if not args.input.exists():
+        raise SystemExit(f"❌ {args.input} not found")
+    if is_parquet(args.input) or is_parquet(args.output):
+        require_pyarrow()
+
+    # The same models (and property indexes) as the API; ML_MODELS_DIR etc. apply
+    import main as api
+    api.load_model_artifacts()
+    price, forecast = api.model_registry.get("price"), api.model_registry.get("forecast")
+    missing = [name for name, artifact in (("price", price), ("forecast", forecast)) if name in models and artifact is None]
+    if missing:
+        raise SystemExit(f"❌ {', '.join(missing)} model not available in {api.models_dir}")
+    growth_rates = forecast.growth_rates if forecast is not None else None
+    fields = {
+        "price": {"model": price.model, "features": list(price.features), "growth_rates": growth_rates} if "price" in models else None,
+        "forecast": api.forecast_fields(forecast) if "forecast" in models else None,
+    }
+    prepare = None
+    if not args.no_location_features:
+        api.load_data()
+        prepare = api.location_features
+
+    workers = args.workers or default_workers()
+    logger.info(f"Scoring {args.input} with {', '.join(models)} ({workers} worker{'s' if workers > 1 else ''})...")
+    keep = [name.strip() for name in args.columns.split(",") if name.strip()] if args.columns else None
+    result = score_file(args.input, args.output, fields, prepare=prepare, keep=keep, workers=workers, chunk_size=args.chunk_size)
+    logger.info(f"✅ {result['rows']:,} rows in {result['seconds']}s ({result['rows_per_second'] or 0:,} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
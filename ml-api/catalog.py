@@ -0,0 +1,151 @@
+"""
+Catalogs - small read-mostly responses built once from partition stats instead of scanning
+the property table on every call:
+
+    LocationCatalog  the state and city lists behind the advisor dropdowns (state_city counts)
+    ClusterCatalog   cluster centroids with counts, prices and bounding boxes (cluster stats)
+
+Responses are pre-serialized and tagged with a content hash, so clients can revalidate
+with If-None-Match and get a 304 without the server touching the data at all.
+"""
+import hashlib
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+# Valid US states and territories; anything else in the state column is not offered
+VALID_US_STATES = (
+    'Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California', 'Colorado',
+    'Connecticut', 'Delaware', 'District of Columbia', 'Florida', 'Georgia',
+    'Hawaii', 'Idaho', 'Illinois', 'Indiana', 'Iowa', 'Kansas', 'Kentucky',
+    'Louisiana', 'Maine', 'Maryland', 'Massachusetts', 'Michigan', 'Minnesota',
+    'Mississippi', 'Missouri', 'Montana', 'Nebraska', 'Nevada', 'New Hampshire',
+    'New Jersey', 'New Mexico', 'New York', 'North Carolina', 'North Dakota',
+    'Ohio', 'Oklahoma', 'Oregon', 'Pennsylvania', 'Rhode Island', 'South Carolina',
+    'South Dakota', 'Tennessee', 'Texas', 'Utah', 'Vermont', 'Virginia',
+    'Washington', 'West Virginia', 'Wisconsin', 'Wyoming', 'Puerto Rico', 'Virgin Islands',
+)
+_CANONICAL_STATES = {state.lower(): state for state in VALID_US_STATES}
+
+# Dropdown data changes only when deltas are ingested; clients revalidate with the ETag after this
+CACHE_CONTROL = "public, max-age=300"
+
+
+def normalize_state(value) -> Optional[str]:
+    """Canonical spelling of a valid state name (case and surrounding spaces ignored), else None"""
+    return _CANONICAL_STATES.get(str(value).strip().lower())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header covers etag (weak comparison, lists and * allowed)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+class LocationCatalog:
+    """States and per-state cities with property counts, plus their serialized responses"""
+
+    def __init__(self, cities: Dict[str, List[Tuple[str, int]]]):
+        self.cities = cities                       # state -> [(city, count)] sorted by city
+        self.states = sorted(state for state in cities if state in VALID_US_STATES)
+        digest = hashlib.sha256(json.dumps(cities, sort_keys=True).encode()).hexdigest()[:16]
+        self.etag = f'W/"{digest}"'
+        self.states_body = json.dumps({"success": True, "states": self.states}).encode()
+        self._city_bodies: Dict[str, bytes] = {}
+
+    @classmethod
+    def from_partition(cls, stats: Dict) -> "LocationCatalog":
+        """Build from state_city partition stats ({(state, city): {"count": n}})"""
+        merged: Dict[str, Dict[str, int]] = {}
+        for (state, city), values in stats.items():
+            state_str = str(state).strip()
+            if not state_str:
+                continue
+            key = normalize_state(state_str) or state_str
+            city_counts = merged.setdefault(key, {})
+            city_str = str(city)
+            city_counts[city_str] = city_counts.get(city_str, 0) + int(values["count"])
+        return cls({state: sorted(counts.items()) for state, counts in merged.items()})
+
+    def cities_body(self, state: str) -> bytes:
+        """Serialized cities response for a state (valid names match case-insensitively)"""
+        key = normalize_state(state) or state.strip()
+        body = self._city_bodies.get(key)
+        if body is None:
+            entries = self.cities.get(key, [])
+            body = json.dumps({
+                "success": True,
+                "cities": [city for city, _ in entries],
+                "counts": {city: count for city, count in entries},
+            }).encode()
+            # Unknown states are not memoized, so arbitrary path values cannot grow the cache
+            if key in self.cities:
+                self._city_bodies[key] = body
+        return body
+
+
+def _number(value) -> Optional[float]:
+    """float, or None for missing and non-finite values (JSON has no NaN)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+class ClusterCatalog:
+    """Per-cluster centroid, count, price stats and bounding box, plus the serialized centroids response"""
+
+    def __init__(self, centroids: List[Dict[str, Any]]):
+        self.centroids = centroids                 # sorted by cluster_id
+        body = json.dumps({"num_clusters": len(centroids), "centroids": centroids}).encode()
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:16]}"'
+        self.centroids_body = body
+
+    @classmethod
+    def build(cls, stats: Dict, centroids: Optional[List[Dict]] = None) -> "ClusterCatalog":
+        """Join centroid file rows ({cluster_id, lat, lng, count, street}) with cluster partition stats.
+
+        The file's centroid and street win where present; count and price stats come from the
+        partition. Clusters only one side knows about are still listed. Entries without valid
+        coordinates are dropped.
+        """
+        entries: Dict[int, Dict[str, Any]] = {}
+        for row in centroids or []:
+            cluster_id = _number(row.get("cluster_id"))
+            if cluster_id is None:
+                continue
+            street = row.get("street")
+            entries[int(cluster_id)] = {
+                "lat": _number(row.get("lat")), "lng": _number(row.get("lng")),
+                "count": int(_number(row.get("count")) or 0),
+                "street": "" if street is None or street != street else str(street),   # NaN != NaN
+            }
+        result = []
+        for cluster_id in sorted(set(entries) | {int(key) for key in stats}):
+            entry = entries.get(cluster_id, {"lat": None, "lng": None, "count": 0, "street": ""})
+            values = stats.get(cluster_id, {})
+            lat = entry["lat"] if entry["lat"] is not None else _number(values.get("lat"))
+            lng = entry["lng"] if entry["lng"] is not None else _number(values.get("lng"))
+            if lat is None or lng is None or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                continue
+            bbox = [_number(values.get(k)) for k in ("lng_min", "lat_min", "lng_max", "lat_max")]
+            result.append({
+                "cluster_id": cluster_id,
+                "lat": lat,
+                "lng": lng,
+                "count": int(values["count"]) if "count" in values else entry["count"],
+                "street": entry["street"],
+                "avg_price": _number(values.get("avg_price")),
+                "median_price": _number(values.get("median_price")),
+                "price_per_sqft": _number(values.get("price_per_sqft")),
+                "bbox": bbox if None not in bbox else None,
+            })
+        return cls(result)
+
+    def distribution(self, limit: int) -> List[Dict[str, Any]]:
+        """Count and price stats of the first `limit` clusters by id (the summary's distribution)"""
+        keys = ("cluster_id", "count", "avg_price", "median_price", "price_per_sqft")
+        return [{key: centroid[key] for key in keys} for centroid in self.centroids[:limit]]
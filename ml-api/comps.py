@@ -0,0 +1,173 @@
+"""
+Comparable properties - the k listings nearest to a property in a normalized feature space,
+from a KD-tree built over the property table at load.
+
+Every listing becomes a point with one coordinate per feature:
+
+    location             lat/lng as kilometres (equirectangular) / LOCATION_KM
+    house_size, acre_lot, price
+                         log1p, then centred and divided by the standard deviation
+    bed, bath            centred and divided by the standard deviation
+
+so LOCATION_KM kilometres weigh as much as one standard deviation of any other feature.
+Listings without coordinates are not searchable; other missing values take the column's
+mean (they neither attract nor repel).
+
+A search over everything walks the tree. A search restricted to one zip code or cluster
+scans that partition's points directly, which is faster than filtering tree results.
+Rows changed by deltas go to a small overlay that every search also scans; the tree is
+rebuilt once the overlay passes a fraction of the table.
+"""
+import math
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from property_store import DerivedIndex
+
+LOCATION_KM = 5.0
+FEATURES = ("lat", "lng", "house_size", "bed", "bath", "acre_lot", "price")
+_LOG_FEATURES = ("house_size", "acre_lot", "price")
+_KM_PER_DEGREE = 111.32
+
+
+class CompsIndex(DerivedIndex):
+    name = "comps"
+
+    def __init__(self, rebuild_fraction: float = 0.05, leaf_size: int = 40):
+        self.rebuild_fraction = rebuild_fraction
+        self.leaf_size = leaf_size
+
+    def version(self) -> str:
+        return f"CompsIndex:1:{','.join(FEATURES)}:{LOCATION_KM}"
+
+    def available(self, df) -> bool:
+        return all(c in df.columns for c in ("lat", "lng", "house_size", "price"))
+
+    @staticmethod
+    def _raw(frame) -> Dict[str, Any]:
+        import numpy as np
+        import pandas as pd
+
+        columns = {}
+        for name in FEATURES:
+            values = (pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=float) if name in frame.columns
+                      else np.full(len(frame), np.nan))
+            if name in _LOG_FEATURES:
+                values = np.log1p(np.where(values >= 0, values, np.nan))
+            columns[name] = values
+        columns["lat"] = np.where((columns["lat"] >= -90) & (columns["lat"] <= 90), columns["lat"], np.nan)
+        columns["lng"] = np.where((columns["lng"] >= -180) & (columns["lng"] <= 180), columns["lng"], np.nan)
+        return columns
+
+    def _fit(self, df) -> Dict[str, Any]:
+        import numpy as np
+
+        raw = self._raw(df)
+        scaling = {"cos_lat": math.cos(math.radians(float(np.nanmean(raw["lat"])) if np.isfinite(raw["lat"]).any() else 0.0))}
+        for name in FEATURES[2:]:
+            values = raw[name][np.isfinite(raw[name])]
+            center = float(values.mean()) if len(values) else 0.0
+            scale = float(values.std()) if len(values) > 1 else 0.0
+            scaling[name] = (center, scale if scale > 0 else 1.0)
+        return scaling
+
+    def transform(self, frame, scaling: Dict[str, Any]):
+        """Points (float32, one row per listing) in the index's space; NaN rows for listings without coordinates"""
+        import numpy as np
+
+        raw = self._raw(frame)
+        km = _KM_PER_DEGREE / LOCATION_KM
+        columns = [raw["lat"] * km, raw["lng"] * km * scaling["cos_lat"]]
+        for name in FEATURES[2:]:
+            center, scale = scaling[name]
+            values = (raw[name] - center) / scale
+            columns.append(np.where(np.isfinite(values), values, 0.0))
+        points = np.column_stack(columns).astype(np.float32)
+        points[~(np.isfinite(columns[0]) & np.isfinite(columns[1]))] = np.nan
+        return points
+
+    def build(self, df) -> Dict:
+        import numpy as np
+        from sklearn.neighbors import KDTree
+
+        scaling = self._fit(df)
+        points = self.transform(df, scaling)
+        tree_rows = np.flatnonzero(~np.isnan(points[:, 0]))
+        return {
+            "scaling": scaling,
+            "points": points,
+            "tree": KDTree(points[tree_rows], leaf_size=self.leaf_size) if len(tree_rows) else None,
+            "tree_rows": tree_rows,
+            "overlay_rows": np.empty(0, dtype=np.int64),        # sorted; these rows are not read from the tree
+            "overlay_points": np.empty((0, points.shape[1]), dtype=np.float32),
+        }
+
+    def apply_delta(self, state: Dict, df, delta) -> Dict:
+        import numpy as np
+
+        changed = np.unique(np.concatenate([delta.appended, delta.updated]))
+        if len(changed) == 0:
+            return state
+        rows = np.union1d(state["overlay_rows"], changed)
+        if len(rows) > self.rebuild_fraction * len(df):
+            return self.build(df)
+        # Points stay in the scaling of the last build, so old and new rows remain comparable
+        kept = ~np.isin(state["overlay_rows"], changed)
+        overlay_rows = np.concatenate([state["overlay_rows"][kept], changed])
+        overlay_points = np.concatenate([state["overlay_points"][kept], self.transform(df.iloc[changed], state["scaling"])])
+        order = np.argsort(overlay_rows, kind="stable")
+        return {**state, "overlay_rows": overlay_rows[order], "overlay_points": overlay_points[order]}
+
+    @staticmethod
+    def points_of(state: Dict, rows):
+        """Current points of the given row positions (overlay first, then the build)"""
+        import numpy as np
+
+        rows = np.asarray(rows, dtype=np.int64)
+        points = np.full((len(rows), state["points"].shape[1]), np.nan, dtype=np.float32)
+        in_build = rows < len(state["points"])
+        points[in_build] = state["points"][rows[in_build]]
+        slots = np.searchsorted(state["overlay_rows"], rows)
+        found = slots < len(state["overlay_rows"])
+        found[found] = state["overlay_rows"][slots[found]] == rows[found]
+        points[found] = state["overlay_points"][slots[found]]
+        return points
+
+    def query(self, state: Dict, point, k: int, rows: Optional[Sequence[int]] = None) -> Tuple[Any, Any]:
+        """(row positions, distances) of the k nearest listings, nearest first; rows restricts the candidates"""
+        import numpy as np
+
+        point = np.asarray(point, dtype=np.float32)
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            return _nearest(rows, self.points_of(state, rows), point, k)
+
+        found_rows, found_dist = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        tree, tree_rows, overlay = state["tree"], state["tree_rows"], state["overlay_rows"]
+        if tree is not None:
+            # Rows in the overlay have newer points there; ask the tree for more until k others remain
+            wanted = k
+            while True:
+                distances, positions = tree.query(point[None, :], k=min(wanted, len(tree_rows)))
+                candidates = tree_rows[positions[0]]
+                keep = ~np.isin(candidates, overlay)
+                if keep.sum() >= k or wanted >= len(tree_rows):
+                    found_rows, found_dist = candidates[keep][:k], distances[0][keep][:k]
+                    break
+                wanted *= 4
+        overlay_rows, overlay_dist = _nearest(overlay, state["overlay_points"], point, k)
+        merged_rows = np.concatenate([found_rows, overlay_rows])
+        merged_dist = np.concatenate([found_dist, overlay_dist])
+        order = np.argsort(merged_dist, kind="stable")[:k]
+        return merged_rows[order], merged_dist[order]
+
+
+def _nearest(rows, points, point, k: int):
+    """Brute-force k nearest among a few points (NaN points are skipped)"""
+    import numpy as np
+
+    distances = np.sqrt(((points - point) ** 2).sum(axis=1))
+    valid = np.flatnonzero(np.isfinite(distances))
+    if len(valid) > k:
+        valid = valid[np.argpartition(distances[valid], k - 1)[:k]]
+    valid = valid[np.argsort(distances[valid], kind="stable")]
+    return rows[valid], distances[valid]
@@ -0,0 +1,195 @@
+"""
+Price distributions - a price quantile sketch and a fixed-bucket price histogram per region
+(zip, city, state, cluster), built in one chunked pass over the table at load.
+
+Each row's sketch bucket (sketches.py) and histogram bin are computed once per chunk and then
+counted under every level's region, so one pass fills all levels. Per level the state holds:
+
+    keys, codes     the regions (a scalar, or a tuple for multi-column levels) and their codes
+    sketch          (region, bucket, count) triples sorted by region, then bucket
+    histogram       regions x bins listing counts; bin i is [EDGES[i], EDGES[i + 1]), the last open
+
+Both are sums of counts, so the distribution of any set of regions is exact to merge: slice
+their triples and histogram rows and add them up. A sketch stays small (at most one triple
+per distinct price bucket in the region, 10 bytes each) whatever the region's size.
+
+A delta subtracts the replaced rows and adds the new ones. Histogram rows are updated in
+place on a copy; sketch changes go to a per-level overlay folded in past a fraction of the
+sketch, so a delta costs O(delta) until then.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import sketches
+from property_store import DerivedIndex
+
+# 40 bins of 50k up to 2M, then "2M+"
+HISTOGRAM_EDGES = tuple(range(0, 2_000_001, 50_000))
+
+
+class PriceDistributions(DerivedIndex):
+    name = "distribution"
+
+    def __init__(self, levels: Dict[str, Sequence[str]], value: str = "price",
+                 edges: Sequence[float] = HISTOGRAM_EDGES, chunk_size: int = 250_000, compact_fraction: float = 0.1):
+        self.levels = {level: list(columns) for level, columns in levels.items()}
+        self.value = value
+        self.edges = tuple(edges)
+        self.chunk_size = chunk_size
+        self.compact_fraction = compact_fraction
+
+    def version(self) -> str:
+        levels = ";".join(f"{level}={','.join(columns)}" for level, columns in self.levels.items())
+        return f"PriceDistributions:1:{self.value}:{levels}:{sketches.RELATIVE_ACCURACY}:{self.edges}"
+
+    def available(self, df) -> bool:
+        return self.value in df.columns and bool(self._levels(df))
+
+    def _levels(self, df) -> List[str]:
+        return [level for level, columns in self.levels.items() if all(c in df.columns for c in columns)]
+
+    # ---- rows -> counts ----
+
+    def _region_codes(self, frame, columns: Sequence[str], level_state: Dict):
+        """Region code of every row (-1 without a complete key), adding unseen regions to level_state"""
+        import numpy as np
+        import pandas as pd
+
+        valid = frame[columns].notna().all(axis=1).to_numpy()
+        if len(columns) > 1:
+            values = pd.Series(list(frame[columns].itertuples(index=False, name=None)), dtype=object)
+        else:
+            values = frame[columns[0]].reset_index(drop=True)
+        codes, uniques = pd.factorize(values.where(valid))
+        mapped = np.empty(len(uniques) + 1, dtype=np.int64)
+        mapped[-1] = -1
+        keys, lookup = level_state["keys"], level_state["codes"]
+        for i, key in enumerate(uniques):
+            code = lookup.get(key)
+            if code is None:
+                code = lookup[key] = len(keys)
+                keys.append(key)
+            mapped[i] = code
+        return mapped[codes]
+
+    def _counts(self, frame, levels: Dict[str, Dict], sign: int = 1) -> Dict[str, tuple]:
+        """Per level: merged sketch triples and (region, bin, count) histogram entries of some rows"""
+        import numpy as np
+        import pandas as pd
+
+        values = pd.to_numeric(frame[self.value], errors="coerce").to_numpy(dtype=float)
+        buckets = sketches.bucket_of(values)
+        bins = np.where(values > 0, np.searchsorted(self.edges, values, side="right") - 1, -1)
+        counts = {}
+        for level, level_state in levels.items():
+            regions = self._region_codes(frame, self.levels[level], level_state)
+            keep = (regions >= 0) & (buckets >= 0)
+            triples = sketches.merge(regions[keep], buckets[keep], np.full(int(keep.sum()), sign))
+            counts[level] = (triples, regions[keep], bins[keep], sign)
+        return counts
+
+    def _histogram(self, histogram, regions, bins, sign: int, n_regions: int):
+        """histogram (copied, grown to n_regions rows) plus sign for every (region, bin)"""
+        import numpy as np
+
+        grown = np.zeros((n_regions, len(self.edges)), dtype=np.int32)
+        grown[:len(histogram)] = histogram
+        np.add.at(grown, (regions, bins), sign)
+        return grown
+
+    def build(self, df) -> Dict:
+        import numpy as np
+
+        levels = {level: {"keys": [], "codes": {}} for level in self._levels(df)}
+        parts = {level: [] for level in levels}
+        histograms = {level: np.zeros((0, len(self.edges)), dtype=np.int32) for level in levels}
+        columns = list(dict.fromkeys([self.value] + [c for level in levels for c in self.levels[level]]))
+        positions = [df.columns.get_loc(c) for c in columns]
+        for start in range(0, len(df), self.chunk_size):
+            chunk = df.iloc[start:start + self.chunk_size, positions]
+            for level, (triples, regions, bins, _) in self._counts(chunk, levels).items():
+                parts[level].append(triples)
+                n_regions = len(levels[level]["keys"])
+                histograms[level] = self._histogram(histograms[level], regions, bins, 1, n_regions)
+        for level, level_state in levels.items():
+            level_state["sketch"] = (sketches.merge(*(np.concatenate(c) for c in zip(*parts[level])))
+                                     if parts[level] else _empty())
+            level_state["histogram"] = histograms[level]
+            level_state["overlay"] = None
+        return {"levels": levels}
+
+    def apply_delta(self, state: Dict, df, delta) -> Dict:
+        import numpy as np
+
+        changed = np.concatenate([delta.appended, delta.updated])
+        if len(changed) == 0:
+            return state
+        # Copy-on-write: readers of the old state keep their keys
+        levels = {level: {**s, "keys": list(s["keys"]), "codes": dict(s["codes"])} for level, s in state["levels"].items()}
+        added = self._counts(df.iloc[changed], levels)
+        removed = self._counts(delta.previous, levels, sign=-1) if len(delta.previous) else {}
+        for level, level_state in levels.items():
+            n_regions = len(level_state["keys"])
+            histogram = level_state["histogram"]
+            overlay = [level_state["overlay"]] if level_state["overlay"] else []
+            for change in (added, removed):
+                if level in change:
+                    triples, regions, bins, sign = change[level]
+                    histogram = self._histogram(histogram, regions, bins, sign, n_regions)
+                    overlay.append(triples)
+            overlay = sketches.merge(*(np.concatenate(c) for c in zip(*overlay))) if overlay else None
+            sketch = level_state["sketch"]
+            if overlay is not None and len(overlay[0]) > self.compact_fraction * max(len(sketch[0]), 1):
+                sketch = sketches.merge(*(np.concatenate(c) for c in zip(sketch, overlay)))
+                overlay = None
+            level_state.update(sketch=sketch, histogram=histogram, overlay=overlay)
+        return {"levels": levels}
+
+    # ---- queries ----
+
+    @staticmethod
+    def resolve(state: Dict, level: str, regions: Sequence) -> List[int]:
+        """Codes of the given regions (text matched case-insensitively, multi-column keys as tuples); unknown ones are dropped"""
+        def normalize(key):
+            parts = key if isinstance(key, tuple) else (key,)
+            return tuple(str(p).strip().lower() if isinstance(p, str) else p for p in parts)
+
+        wanted = {normalize(region) for region in regions}
+        return [code for code, key in enumerate(state["levels"][level]["keys"]) if normalize(key) in wanted]
+
+    def distribution(self, state: Dict, level: str, codes: Optional[Sequence[int]] = None,
+                     qs: Sequence[float] = (0.5,)) -> Dict[str, Any]:
+        """Merged distribution of some regions of a level (codes None: all of them), in O(their sketch entries)"""
+        import numpy as np
+
+        level_state = state["levels"][level]
+        histogram = level_state["histogram"]
+        if codes is None:
+            codes = np.arange(len(level_state["keys"]))
+        codes = np.unique(np.asarray(codes, dtype=np.int64))
+        buckets, counts = [], []
+        for part in (level_state["sketch"], level_state["overlay"]):
+            if not part:
+                continue
+            groups, part_buckets, part_counts = part
+            # Triples are sorted by region: each region's entries are one slice
+            starts, stops = np.searchsorted(groups, codes), np.searchsorted(groups, codes, side="right")
+            lengths = stops - starts
+            rows = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            buckets.append(part_buckets[rows])
+            counts.append(part_counts[rows])
+        buckets, counts = np.concatenate(buckets), np.concatenate(counts)
+        merged = sketches.merge(np.zeros(len(buckets), dtype=np.int64), buckets, counts)
+        rows = histogram[codes[codes < len(histogram)]]
+        bins = rows.sum(axis=0)
+        return {
+            "count": int(bins.sum()),
+            "regions": int((rows.sum(axis=1) > 0).sum()),
+            "quantiles": sketches.quantiles(*merged, 1, qs)[0],
+            "histogram": bins,
+        }
+
+
+def _empty() -> tuple:
+    import numpy as np
+
+    return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int16), np.empty(0, dtype=np.int32)
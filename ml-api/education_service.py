@@ -4,12 +4,20 @@ Integrates with YouTube API, OpenRouter AI, and RapidAPI
 """
 import os
 import json
+import hashlib
+import asyncio
+import time
 import logging
-import httpx
-from typing import List, Dict, Any, Optional
+from resilience import StaleCache, UpstreamGuard, UpstreamUnavailableError, RETRYABLE_STATUS
+from metrics import CACHE_REQUESTS, UPSTREAM_LATENCY
+from tracing import span
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable
 from datetime import datetime
 import uuid
 
+if TYPE_CHECKING:  # httpx is imported when the first upstream call is made
+    import httpx
+
 logger = logging.getLogger(__name__)
 
 # API Keys
@@ -18,6 +26,18 @@ OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "sk-or-v1-8f6a1efce6cbef55c
 RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY", "1d049b3786msh8a1d16f97d5e6c0p1a76ebjsna79acfbd9fa6")
 OPENROUTER_MODEL = "kwaipilot/kat-coder-pro:free"
 
+# Upstream base URLs - override to point at a local stub (see benchmarks/stub_upstreams.py)
+YOUTUBE_BASE_URL = os.getenv("YOUTUBE_BASE_URL", "https://www.googleapis.com/youtube/v3")
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+RAPIDAPI_BASE_URL = os.getenv("RAPIDAPI_BASE_URL", "https://cryptocurrency-news2.p.rapidapi.com")
+
+# System prompts shared by the buffered and streaming variants
+COURSE_SYSTEM_PROMPT = "You are an expert course creator. Always respond with valid JSON only, no markdown formatting."
+ASSISTANT_SYSTEM_PROMPT = "You are a helpful educational assistant. Guide students to understand concepts without giving direct answers."
+EXAM_REFUSAL_MESSAGE = "I cannot provide direct answers during exams or quizzes. However, I can help you understand the concepts if you ask about the course material in a learning context."
+
+_MISSING = object()  # StaleCache.get default: a cached value may itself be falsy
+
 # Education Levels
 EDUCATION_LEVELS = {
     "beginner": {
@@ -47,48 +67,386 @@ EDUCATION_LEVELS = {
 }
 
 
+class ModuleStreamParser:
+    """Incrementally extract complete objects from the "modules" array of a streamed course JSON.
+
+    Feed raw text chunks as they arrive; each call returns the module dicts
+    that became complete with that chunk. Only the scan position and bracket
+    state are kept between calls, so each character is inspected once.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._modules_depth = None  # depth inside the "modules" array
+        self._object_start = None
+        self.modules_emitted = 0
+
+    def feed(self, text: str) -> List[Dict]:
+        self.buffer += text
+        completed = []
+        buf = self.buffer
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = buf[self._string_start + 1:i]
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._last_string == "modules" and self._modules_depth is None:
+                    self._modules_depth = self._depth + 1
+                elif ch == "{" and self._modules_depth is not None and self._depth == self._modules_depth:
+                    self._object_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._object_start is not None and self._depth == self._modules_depth:
+                    try:
+                        completed.append(json.loads(buf[self._object_start:i + 1]))
+                        self.modules_emitted += 1
+                    except json.JSONDecodeError:
+                        pass
+                    self._object_start = None
+                elif ch == "]" and self._modules_depth is not None and self._depth == self._modules_depth - 1:
+                    self._modules_depth = -1  # array closed, ignore any later "modules" keys
+        self._pos = len(buf)
+        return completed
+
+
 class EducationService:
     """Service for generating educational content, quizzes, and certifications"""
     
-    def __init__(self):
-        self.youtube_base_url = "https://www.googleapis.com/youtube/v3"
-        self.openrouter_url = "https://openrouter.ai/api/v1/chat/completions"
-        self.rapidapi_base = "https://cryptocurrency-news2.p.rapidapi.com"
-    
+    def __init__(self, youtube_base_url: Optional[str] = None, openrouter_url: Optional[str] = None,
+                 rapidapi_base: Optional[str] = None):
+        self.youtube_base_url = (youtube_base_url or YOUTUBE_BASE_URL).rstrip("/")
+        self.openrouter_url = openrouter_url or OPENROUTER_URL
+        self.rapidapi_base = (rapidapi_base or RAPIDAPI_BASE_URL).rstrip("/")
+        # In-flight upstream calls keyed on normalized inputs (single-flight), with their waiter counts
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.coalesced_requests = 0
+        # Shared pooled client plus per-upstream rate limit / retry / circuit breaker
+        self._client: Optional["httpx.AsyncClient"] = None
+        self.guards = {
+            "openrouter": UpstreamGuard("openrouter", rate=float(os.getenv("OPENROUTER_RATE_LIMIT", "2")), burst=5),
+            "youtube": UpstreamGuard("youtube", rate=float(os.getenv("YOUTUBE_RATE_LIMIT", "5")), burst=10),
+            "rapidapi": UpstreamGuard("rapidapi", rate=float(os.getenv("RAPIDAPI_RATE_LIMIT", "2")), burst=5),
+        }
+        # Last good responses, served while an upstream is failing
+        self._last_good = StaleCache(int(os.getenv("EDUCATION_FALLBACK_CACHE_SIZE", "1024")),
+                                     ttl=float(os.getenv("EDUCATION_FALLBACK_CACHE_TTL", "3600")))
+
+    # ==========================================
+    # UPSTREAM HTTP
+    # ==========================================
+    def _get_client(self) -> "httpx.AsyncClient":
+        import httpx
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=httpx.Limits(max_connections=50, max_keepalive_connections=20))
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, upstream: str, operation: str, method: str, url: str, timeout: float, **kwargs) -> "httpx.Response":
+        """Send a request through the upstream's guard (rate limit, retry/backoff, circuit breaker)"""
+        client = self._get_client()
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with span(f"upstream.{operation}", upstream=upstream) as current:
+                response = await self.guards[upstream].call(
+                    lambda attempt_timeout: client.request(method, url, timeout=attempt_timeout, **kwargs),
+                    timeout=timeout
+                )
+                outcome = "ok" if response.is_success else f"http_{response.status_code}"
+                if current is not None:
+                    current.set_attribute("status", response.status_code)
+            return response
+        except UpstreamUnavailableError:
+            outcome = "rejected"
+            raise
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, upstream=upstream, operation=operation, outcome=outcome)
+
+    def _fallback_from_cache(self, key: str, default: Any) -> Any:
+        """Serve the last good response for key when the upstream call failed"""
+        value = self._last_good.get(key, _MISSING)
+        if value is not _MISSING:
+            CACHE_REQUESTS.inc(cache="last_good", result="hit")
+            return value
+        CACHE_REQUESTS.inc(cache="last_good", result="miss")
+        return default
+
+    def upstream_status(self) -> Dict[str, Dict]:
+        return {name: guard.snapshot() for name, guard in self.guards.items()}
+
+    # ==========================================
+    # SINGLE-FLIGHT REQUEST COALESCING
+    # ==========================================
+    @staticmethod
+    def _flight_key(kind: str, *parts: Any) -> str:
+        """Stable key for a call; dicts are serialized with sorted keys so field order does not matter"""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return f"{kind}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+    async def _single_flight(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() once for all concurrent callers with the same key and share its result.
+
+        The shared task is shielded so a disconnecting client does not cancel
+        the upstream call the other waiters depend on; when the last waiter
+        goes away, the task (and its upstream request) is cancelled.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+
+            def forget(done: asyncio.Task):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            task.add_done_callback(forget)
+            CACHE_REQUESTS.inc(cache="inflight", result="miss")
+        else:
+            self.coalesced_requests += 1
+            CACHE_REQUESTS.inc(cache="inflight", result="hit")
+            logger.info(f"Coalescing request onto in-flight call {key[:24]}...")
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Nobody is left to read the result; later callers start a fresh call
+                    if self._inflight.get(key) is task:
+                        del self._inflight[key]
+                    task.cancel()
+
+    # ==========================================
+    # PROMPT / RESPONSE HELPERS
+    # ==========================================
+    @staticmethod
+    def _strip_code_fences(content: str) -> str:
+        """Remove markdown code fences the model sometimes wraps JSON in"""
+        if "```json" in content:
+            return content.split("```json")[1].split("```")[0].strip()
+        if "```" in content:
+            return content.split("```")[1].split("```")[0].strip()
+        return content
+
+    @staticmethod
+    def _course_prompt(topic: str, level_info: Dict, duration_hours: int) -> str:
+        return f"""Create a comprehensive {level_info['name']}-level course on "{topic}" for real estate tokenization education.
+
+Course Requirements:
+- Duration: {duration_hours} hours
+- Level: {level_info['name']} ({level_info['description']})
+- Format: Structured learning modules
+
+Please generate:
+1. Course title and description
+2. Learning objectives (5-7 objectives)
+3. Course modules with:
+   - Module title
+   - Module description
+   - Key topics covered
+   - Estimated time
+   - Learning outcomes
+4. Prerequisites
+5. Target audience
+
+Format as JSON with this structure:
+{{
+  "title": "...",
+  "description": "...",
+  "objectives": ["..."],
+  "modules": [
+    {{
+      "title": "...",
+      "description": "...",
+      "topics": ["..."],
+      "duration_minutes": 30,
+      "outcomes": ["..."]
+    }}
+  ],
+  "prerequisites": ["..."],
+  "target_audience": "..."
+}}"""
+
+    @staticmethod
+    def _fallback_course(topic: str, level_info: Dict) -> Dict:
+        """Course structure used when the model does not return valid JSON"""
+        return {
+            "title": f"{topic} - {level_info['name']} Course",
+            "description": f"Learn {topic} at {level_info['name']} level",
+            "objectives": [f"Understand {topic}", f"Apply {topic} concepts", f"Master {topic} techniques"],
+            "modules": [
+                {
+                    "title": f"Introduction to {topic}",
+                    "description": f"Get started with {topic}",
+                    "topics": [topic],
+                    "duration_minutes": 30,
+                    "outcomes": [f"Understand {topic} basics"]
+                }
+            ],
+            "prerequisites": ["Basic knowledge"],
+            "target_audience": "All levels"
+        }
+
+    @staticmethod
+    def _fallback_quiz(course_content: Dict, module_index: int) -> Dict:
+        """Empty quiz used when the model does not return valid JSON or cannot be reached"""
+        modules = course_content.get("modules") or [{}]
+        module = modules[module_index] if 0 <= module_index < len(modules) else {}
+        return {
+            "quiz_id": str(uuid.uuid4()),
+            "module_title": module.get("title", "Unknown"),
+            "questions": [],
+            "total_points": 0,
+            "course_id": course_content.get("id"),
+            "module_index": module_index,
+            "created_at": datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _finalize_course(course: Dict, level: str, level_info: Dict, duration_hours: int) -> Dict:
+        """Add metadata to a generated course"""
+        course["id"] = str(uuid.uuid4())
+        course["level"] = level
+        course["level_info"] = level_info
+        course["duration_hours"] = duration_hours
+        course["created_at"] = datetime.now().isoformat()
+        return course
+
+    @staticmethod
+    def _assistant_prompt(question: str, course_context: Optional[Dict] = None) -> str:
+        context = ""
+        if course_context:
+            context = f"\n\nCourse Context:\nTitle: {course_context.get('title', '')}\nTopics: {', '.join(course_context.get('modules', [{}])[0].get('topics', []) if course_context.get('modules') else [])}"
+
+        return f"""You are a helpful educational assistant for a real estate tokenization course. Help the student understand the concept they're asking about, but don't give direct answers to quiz/exam questions.
+
+Student Question: {question}{context}
+
+Provide:
+1. A clear explanation of the concept
+2. Examples or analogies if helpful
+3. Related topics they might want to explore
+4. Encouragement to think through the problem
+
+Be educational and supportive, but don't solve problems directly."""
+
+    async def _stream_openrouter(self, operation: str, messages: List[Dict], temperature: float, timeout: float) -> AsyncIterator[str]:
+        """Stream completion tokens from OpenRouter as they arrive (SSE upstream)"""
+        import httpx
+        guard = self.guards["openrouter"]
+        start = time.perf_counter()
+        outcome = "error"
+        # The breaker hears one outcome per call, once the stream has finished or failed;
+        # None until then (a consumer that goes away frees the slot without a verdict)
+        healthy, admitted = None, False
+        try:
+            await guard.admit(time.monotonic() + timeout)
+            admitted = True
+            async with self._get_client().stream(
+                "POST",
+                self.openrouter_url,
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": OPENROUTER_MODEL,
+                    "messages": messages,
+                    "temperature": temperature,
+                    "stream": True
+                },
+                timeout=httpx.Timeout(timeout, connect=10.0)
+            ) as response:
+                if not response.is_success:
+                    # As in UpstreamGuard.call: 429/5xx count against the upstream, other 4xx do not
+                    healthy = response.status_code not in RETRYABLE_STATUS
+                    response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # Upstream sends "data: {...}" lines plus ": keep-alive" comments
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(payload)
+                    except json.JSONDecodeError:
+                        continue
+                    delta = chunk.get("choices", [{}])[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+            healthy = True
+            outcome = "ok"
+        except UpstreamUnavailableError:
+            outcome = "rejected"
+            raise
+        except Exception:
+            if healthy is None:
+                healthy = False
+            raise
+        finally:
+            if admitted:
+                guard.settle(healthy)
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, upstream="openrouter", operation=operation, outcome=outcome)
+
     async def search_youtube_videos(self, query: str, max_results: int = 5) -> List[Dict]:
         """Search YouTube for educational videos"""
         try:
-            async with httpx.AsyncClient() as client:
-                params = {
-                    "part": "snippet",
-                    "q": query,
-                    "type": "video",
-                    "maxResults": max_results,
-                    "key": YOUTUBE_API_KEY,
-                    "videoCategoryId": "27"  # Education category
-                }
-                response = await client.get(
-                    f"{self.youtube_base_url}/search",
-                    params=params,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            params = {
+                "part": "snippet",
+                "q": query,
+                "type": "video",
+                "maxResults": max_results,
+                "key": YOUTUBE_API_KEY,
+                "videoCategoryId": "27"  # Education category
+            }
+            response = await self._request(
+                "youtube", "search_youtube_videos", "GET",
+                f"{self.youtube_base_url}/search",
+                params=params,
+                timeout=10.0
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                videos = []
-                for item in data.get("items", []):
-                    videos.append({
-                        "id": item["id"]["videoId"],
-                        "title": item["snippet"]["title"],
-                        "description": item["snippet"]["description"],
-                        "thumbnail": item["snippet"]["thumbnails"]["high"]["url"],
-                        "channel": item["snippet"]["channelTitle"],
-                        "published_at": item["snippet"]["publishedAt"]
-                    })
-                return videos
+            videos = []
+            for item in data.get("items", []):
+                videos.append({
+                    "id": item["id"]["videoId"],
+                    "title": item["snippet"]["title"],
+                    "description": item["snippet"]["description"],
+                    "thumbnail": item["snippet"]["thumbnails"]["high"]["url"],
+                    "channel": item["snippet"]["channelTitle"],
+                    "published_at": item["snippet"]["publishedAt"]
+                })
+            self._last_good.put(f"youtube:{query}:{max_results}", videos)
+            return videos
         except Exception as e:
             logger.error(f"Error searching YouTube: {e}")
-            return []
+            return self._fallback_from_cache(f"youtube:{query}:{max_results}", [])
     
     async def analyze_video_with_ai(self, video_id: str, video_title: str, video_description: str) -> Dict:
         """Use OpenRouter AI to analyze YouTube video and extract key insights"""
@@ -107,44 +465,44 @@ Please provide:
 
 Format as JSON with keys: key_points, concepts, difficulty, prerequisites, applications"""
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.openrouter_url,
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": OPENROUTER_MODEL,
-                        "messages": [
-                            {"role": "system", "content": "You are an expert educational content analyzer. Always respond with valid JSON."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7
-                    },
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self._request(
+                "openrouter", "analyze_video_with_ai", "POST",
+                self.openrouter_url,
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": OPENROUTER_MODEL,
+                    "messages": [
+                        {"role": "system", "content": "You are an expert educational content analyzer. Always respond with valid JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.7
+                },
+                timeout=30.0
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "{}")
-                # Try to parse JSON from response
-                try:
-                    analysis = json.loads(content)
-                except:
-                    # If not JSON, create structured response
-                    analysis = {
-                        "key_points": [content[:200]],
-                        "concepts": ["Real Estate", "Tokenization"],
-                        "difficulty": "intermediate",
-                        "prerequisites": ["Basic blockchain knowledge"],
-                        "applications": ["Investment strategies"]
-                    }
-                
-                return {
-                    "video_id": video_id,
-                    "analysis": analysis
+            content = data.get("choices", [{}])[0].get("message", {}).get("content", "{}")
+            # Try to parse JSON from response
+            try:
+                analysis = json.loads(content)
+            except:
+                # If not JSON, create structured response
+                analysis = {
+                    "key_points": [content[:200]],
+                    "concepts": ["Real Estate", "Tokenization"],
+                    "difficulty": "intermediate",
+                    "prerequisites": ["Basic blockchain knowledge"],
+                    "applications": ["Investment strategies"]
                 }
+                
+            return {
+                "video_id": video_id,
+                "analysis": analysis
+            }
         except Exception as e:
             logger.error(f"Error analyzing video with AI: {e}")
             return {
@@ -159,109 +517,102 @@ Format as JSON with keys: key_points, concepts, difficulty, prerequisites, appli
             }
     
     async def generate_course_content(self, topic: str, level: str = "intermediate", duration_hours: int = 2) -> Dict:
-        """Generate comprehensive course content using AI"""
+        """Generate comprehensive course content using AI (identical concurrent requests share one call)"""
+        key = self._flight_key("course", " ".join(topic.lower().split()), level, duration_hours)
         try:
+            course = await self._single_flight(
+                key, lambda: self._generate_course_content(topic, level, duration_hours)
+            )
+        except UpstreamUnavailableError as e:
+            # Circuit open or over budget: fail fast to the last course for these inputs, or the outline
+            logger.warning(f"{e}; serving a cached or fallback course")
             level_info = EDUCATION_LEVELS.get(level, EDUCATION_LEVELS["intermediate"])
-            
-            prompt = f"""Create a comprehensive {level_info['name']}-level course on "{topic}" for real estate tokenization education.
-
-Course Requirements:
-- Duration: {duration_hours} hours
-- Level: {level_info['name']} ({level_info['description']})
-- Format: Structured learning modules
-
-Please generate:
-1. Course title and description
-2. Learning objectives (5-7 objectives)
-3. Course modules with:
-   - Module title
-   - Module description
-   - Key topics covered
-   - Estimated time
-   - Learning outcomes
-4. Prerequisites
-5. Target audience
+            return self._fallback_from_cache(
+                key, self._finalize_course(self._fallback_course(topic, level_info), level, level_info, duration_hours))
+        self._last_good.put(key, course)
+        return course
 
-Format as JSON with this structure:
-{{
-  "title": "...",
-  "description": "...",
-  "objectives": ["..."],
-  "modules": [
-    {{
-      "title": "...",
-      "description": "...",
-      "topics": ["..."],
-      "duration_minutes": 30,
-      "outcomes": ["..."]
-    }}
-  ],
-  "prerequisites": ["..."],
-  "target_audience": "..."
-}}"""
+    async def _generate_course_content(self, topic: str, level: str, duration_hours: int) -> Dict:
+        try:
+            level_info = EDUCATION_LEVELS.get(level, EDUCATION_LEVELS["intermediate"])
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.openrouter_url,
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": OPENROUTER_MODEL,
-                        "messages": [
-                            {"role": "system", "content": "You are an expert course creator. Always respond with valid JSON only, no markdown formatting."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.8
-                    },
-                    timeout=60.0
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "{}")
-                # Clean up markdown code blocks if present
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
+            prompt = self._course_prompt(topic, level_info, duration_hours)
+            
+            response = await self._request(
+                "openrouter", "generate_course_content", "POST",
+                self.openrouter_url,
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": OPENROUTER_MODEL,
+                    "messages": [
+                        {"role": "system", "content": COURSE_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.8
+                },
+                timeout=60.0
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                try:
-                    course = json.loads(content)
-                except json.JSONDecodeError:
-                    # Fallback course structure
-                    course = {
-                        "title": f"{topic} - {level_info['name']} Course",
-                        "description": f"Learn {topic} at {level_info['name']} level",
-                        "objectives": [f"Understand {topic}", f"Apply {topic} concepts", f"Master {topic} techniques"],
-                        "modules": [
-                            {
-                                "title": f"Introduction to {topic}",
-                                "description": f"Get started with {topic}",
-                                "topics": [topic],
-                                "duration_minutes": 30,
-                                "outcomes": [f"Understand {topic} basics"]
-                            }
-                        ],
-                        "prerequisites": ["Basic knowledge"],
-                        "target_audience": "All levels"
-                    }
+            content = data.get("choices", [{}])[0].get("message", {}).get("content", "{}")
+            # Clean up markdown code blocks if present
+            content = self._strip_code_fences(content)
                 
-                # Add metadata
-                course["id"] = str(uuid.uuid4())
-                course["level"] = level
-                course["level_info"] = level_info
-                course["duration_hours"] = duration_hours
-                course["created_at"] = datetime.now().isoformat()
+            try:
+                course = json.loads(content)
+            except json.JSONDecodeError:
+                course = self._fallback_course(topic, level_info)
                 
-                return course
+            return self._finalize_course(course, level, level_info, duration_hours)
         except Exception as e:
             logger.error(f"Error generating course: {e}")
             raise
     
+    async def stream_course_content(self, topic: str, level: str = "intermediate", duration_hours: int = 2) -> AsyncIterator[tuple]:
+        """Stream course generation as (event, data) pairs.
+
+        Emits "token" for every upstream delta, "module" as soon as each module
+        object in the JSON is complete, and a final "course" with metadata.
+        """
+        level_info = EDUCATION_LEVELS.get(level, EDUCATION_LEVELS["intermediate"])
+        messages = [
+            {"role": "system", "content": COURSE_SYSTEM_PROMPT},
+            {"role": "user", "content": self._course_prompt(topic, level_info, duration_hours)}
+        ]
+        parser = ModuleStreamParser()
+        try:
+            async for delta in self._stream_openrouter("stream_course_content", messages, temperature=0.8, timeout=60.0):
+                yield "token", {"content": delta}
+                for module in parser.feed(delta):
+                    yield "module", {"index": parser.modules_emitted - 1, "module": module}
+        except Exception as e:
+            logger.error(f"Error streaming course: {e}")
+            yield "error", {"message": str(e)}
+
+        try:
+            course = json.loads(self._strip_code_fences(parser.buffer or "{}"))
+        except json.JSONDecodeError:
+            course = self._fallback_course(topic, level_info)
+        if not isinstance(course, dict) or not course:
+            course = self._fallback_course(topic, level_info)
+        yield "course", self._finalize_course(course, level, level_info, duration_hours)
+    
     async def generate_quiz(self, course_content: Dict, module_index: int = 0, num_questions: int = 10) -> Dict:
-        """Generate quiz questions for a course module"""
+        """Generate quiz questions for a course module (identical concurrent requests share one call)"""
+        key = self._flight_key("quiz", course_content, module_index, num_questions)
+        try:
+            return await self._single_flight(
+                key, lambda: self._generate_quiz(course_content, module_index, num_questions)
+            )
+        except UpstreamUnavailableError as e:
+            logger.warning(f"{e}; serving an empty fallback quiz")
+            return self._fallback_quiz(course_content, module_index)
+
+    async def _generate_quiz(self, course_content: Dict, module_index: int, num_questions: int) -> Dict:
         try:
             module = course_content.get("modules", [{}])[module_index] if course_content.get("modules") else {}
             
@@ -301,53 +652,85 @@ Format as JSON:
   "total_points": 10
 }}"""
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.openrouter_url,
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": OPENROUTER_MODEL,
-                        "messages": [
-                            {"role": "system", "content": "You are an expert quiz creator. Always respond with valid JSON only, no markdown."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7
-                    },
-                    timeout=60.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self._request(
+                "openrouter", "generate_quiz", "POST",
+                self.openrouter_url,
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": OPENROUTER_MODEL,
+                    "messages": [
+                        {"role": "system", "content": "You are an expert quiz creator. Always respond with valid JSON only, no markdown."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.7
+                },
+                timeout=60.0
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "{}")
-                # Clean markdown
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-                
-                try:
-                    quiz = json.loads(content)
-                except json.JSONDecodeError:
-                    # Fallback quiz
-                    quiz = {
-                        "quiz_id": str(uuid.uuid4()),
-                        "module_title": module.get("title", "Unknown"),
-                        "questions": [],
-                        "total_points": 0
-                    }
+            content = data.get("choices", [{}])[0].get("message", {}).get("content", "{}")
+            content = self._strip_code_fences(content)
+
+            try:
+                quiz = json.loads(content)
+            except json.JSONDecodeError:
+                return self._fallback_quiz(course_content, module_index)
                 
-                quiz["course_id"] = course_content.get("id")
-                quiz["module_index"] = module_index
-                quiz["created_at"] = datetime.now().isoformat()
+            quiz["course_id"] = course_content.get("id")
+            quiz["module_index"] = module_index
+            quiz["created_at"] = datetime.now().isoformat()
                 
-                return quiz
+            return quiz
         except Exception as e:
             logger.error(f"Error generating quiz: {e}")
             raise
     
+    async def stream_course_quizzes(self, course_content: Dict, num_questions: int = 10,
+                                    max_concurrency: int = 3, max_attempts: int = 2) -> AsyncIterator[tuple]:
+        """Generate quizzes for every module concurrently, yielding (event, data) pairs as each finishes.
+
+        A semaphore bounds the number of simultaneous upstream calls. Each module
+        is retried on its own (on errors or an empty fallback quiz) so one bad
+        module does not force regenerating the others.
+        """
+        modules = course_content.get("modules") or []
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def quiz_for_module(index: int):
+            last_error = None
+            for attempt in range(1, max_attempts + 1):
+                async with semaphore:
+                    try:
+                        quiz = await self.generate_quiz(course_content, index, num_questions)
+                        if quiz.get("questions"):
+                            return index, quiz, None, attempt
+                        last_error = "Model returned no questions"
+                    except Exception as e:
+                        last_error = str(e)
+                logger.warning(f"Quiz for module {index} failed (attempt {attempt}/{max_attempts}): {last_error}")
+            return index, None, last_error, max_attempts
+
+        tasks = [asyncio.ensure_future(quiz_for_module(i)) for i in range(len(modules))]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, quiz, error, attempts = await next_done
+                if quiz is not None:
+                    succeeded += 1
+                    yield "quiz", {"module_index": index, "attempts": attempts, "quiz": quiz}
+                else:
+                    yield "module_error", {"module_index": index, "attempts": attempts, "error": error}
+        finally:
+            # Client went away mid-stream: stop the remaining modules. Their upstream calls are
+            # cancelled too, unless another request is waiting on the same quiz (_single_flight)
+            for task in tasks:
+                task.cancel()
+        yield "done", {"total_modules": len(modules), "succeeded": succeeded, "failed": len(modules) - succeeded}
+    
     async def generate_certification(self, course_id: str, course_title: str, user_name: str, score: float) -> Dict:
         """Generate certification badge/certificate for course completion"""
         try:
@@ -387,54 +770,40 @@ Format as JSON:
         """AI assistant for course help (NOT for exams/quizzes)"""
         if is_exam:
             return {
-                "response": "I cannot provide direct answers during exams or quizzes. However, I can help you understand the concepts if you ask about the course material in a learning context.",
+                "response": EXAM_REFUSAL_MESSAGE,
                 "can_help": False
             }
         
         try:
-            context = ""
-            if course_context:
-                context = f"\n\nCourse Context:\nTitle: {course_context.get('title', '')}\nTopics: {', '.join(course_context.get('modules', [{}])[0].get('topics', []) if course_context.get('modules') else [])}"
+            prompt = self._assistant_prompt(question, course_context)
             
-            prompt = f"""You are a helpful educational assistant for a real estate tokenization course. Help the student understand the concept they're asking about, but don't give direct answers to quiz/exam questions.
-
-Student Question: {question}{context}
-
-Provide:
-1. A clear explanation of the concept
-2. Examples or analogies if helpful
-3. Related topics they might want to explore
-4. Encouragement to think through the problem
-
-Be educational and supportive, but don't solve problems directly."""
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.openrouter_url,
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": OPENROUTER_MODEL,
-                        "messages": [
-                            {"role": "system", "content": "You are a helpful educational assistant. Guide students to understand concepts without giving direct answers."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7
-                    },
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self._request(
+                "openrouter", "get_ai_assistant_help", "POST",
+                self.openrouter_url,
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": OPENROUTER_MODEL,
+                    "messages": [
+                        {"role": "system", "content": ASSISTANT_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.7
+                },
+                timeout=30.0
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "I'm here to help! What would you like to understand?")
+            content = data.get("choices", [{}])[0].get("message", {}).get("content", "I'm here to help! What would you like to understand?")
                 
-                return {
-                    "response": content,
-                    "can_help": True,
-                    "timestamp": datetime.now().isoformat()
-                }
+            return {
+                "response": content,
+                "can_help": True,
+                "timestamp": datetime.now().isoformat()
+            }
         except Exception as e:
             logger.error(f"Error getting AI assistant help: {e}")
             return {
@@ -443,34 +812,57 @@ Be educational and supportive, but don't solve problems directly."""
                 "error": str(e)
             }
     
+    async def stream_ai_assistant_help(self, question: str, course_context: Optional[Dict] = None, is_exam: bool = False) -> AsyncIterator[tuple]:
+        """Stream assistant help as (event, data) pairs, forwarding tokens without buffering the answer"""
+        if is_exam:
+            yield "done", {"response": EXAM_REFUSAL_MESSAGE, "can_help": False}
+            return
+
+        messages = [
+            {"role": "system", "content": ASSISTANT_SYSTEM_PROMPT},
+            {"role": "user", "content": self._assistant_prompt(question, course_context)}
+        ]
+        try:
+            async for delta in self._stream_openrouter("stream_ai_assistant_help", messages, temperature=0.7, timeout=30.0):
+                yield "token", {"content": delta}
+            yield "done", {"can_help": True, "timestamp": datetime.now().isoformat()}
+        except Exception as e:
+            logger.error(f"Error streaming AI assistant help: {e}")
+            yield "error", {
+                "response": "I'm having trouble processing your question right now. Please try again later.",
+                "can_help": False,
+                "error": str(e)
+            }
+    
     async def get_crypto_news(self, limit: int = 5) -> List[Dict]:
         """Get cryptocurrency/blockchain news for educational context"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.rapidapi_base}/v1/cryptodaily",
-                    headers={
-                        "x-rapidapi-key": RAPIDAPI_KEY,
-                        "x-rapidapi-host": "cryptocurrency-news2.p.rapidapi.com"
-                    },
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self._request(
+                "rapidapi", "get_crypto_news", "GET",
+                f"{self.rapidapi_base}/v1/cryptodaily",
+                headers={
+                    "x-rapidapi-key": RAPIDAPI_KEY,
+                    "x-rapidapi-host": "cryptocurrency-news2.p.rapidapi.com"
+                },
+                timeout=10.0
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                articles = []
-                for item in data.get("data", [])[:limit]:
-                    articles.append({
-                        "title": item.get("title", ""),
-                        "description": item.get("description", ""),
-                        "url": item.get("url", ""),
-                        "published_at": item.get("publishedAt", ""),
-                        "source": item.get("source", "")
-                    })
-                return articles
+            articles = []
+            for item in data.get("data", [])[:limit]:
+                articles.append({
+                    "title": item.get("title", ""),
+                    "description": item.get("description", ""),
+                    "url": item.get("url", ""),
+                    "published_at": item.get("publishedAt", ""),
+                    "source": item.get("source", "")
+                })
+            self._last_good.put(f"news:{limit}", articles)
+            return articles
         except Exception as e:
             logger.error(f"Error fetching crypto news: {e}")
-            return []
+            return self._fallback_from_cache(f"news:{limit}", [])
 
 
 # Global instance
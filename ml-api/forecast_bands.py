@@ -0,0 +1,73 @@
+"""
+Forecast bands - percentile ranges around the forecast by Monte Carlo simulation.
+
+Every path perturbs the point forecast in log space with three independent sources:
+
+    valuation error   one draw per path, sigma from the model's residual metrics
+    growth drift      one draw per path, the spread of growth rates across zip codes,
+                      accumulating every year (the zip's long-run rate is uncertain)
+    yearly shocks     one draw per path and year, ANNUAL_VOLATILITY, accumulated as a random walk
+
+All paths are simulated at once as a (paths x years) array, so 10,000 paths over 10 years take
+a few milliseconds. The bands are centred on the point forecast: p50 is the forecast itself
+up to sampling noise.
+"""
+from typing import Dict, List, Optional, Sequence
+
+# Year-to-year volatility of house price growth around its trend
+ANNUAL_VOLATILITY = 0.04
+# Used when the model's metrics do not give a log-space error
+DEFAULT_RESIDUAL_SIGMA = 0.15
+DEFAULT_GROWTH_SIGMA = 0.01
+PERCENTILES = (10, 50, 90)
+
+
+def residual_sigma(metrics: Optional[Dict]) -> float:
+    """Standard deviation of the model's log-price error, from its saved metrics.
+
+    rmse is used as is; mae is converted assuming normal errors (sigma = mae * sqrt(pi / 2)).
+    Values above 3 cannot be log-space errors (they are dollars) and are ignored.
+    """
+    import math
+
+    metrics = metrics or {}
+    for key, scale in (("rmse", 1.0), ("rmse_log", 1.0), ("mae", math.sqrt(math.pi / 2)), ("mae_log", math.sqrt(math.pi / 2))):
+        value = metrics.get(key)
+        if isinstance(value, (int, float)) and 0 < value < 3:
+            return float(value) * scale
+    return DEFAULT_RESIDUAL_SIGMA
+
+
+def growth_sigma(growth_rates: Optional[Dict]) -> float:
+    """Standard deviation of the per-zip growth rates (O(zips): computed once per model load)"""
+    import numpy as np
+
+    if not growth_rates or not growth_rates.get("zip_growth_rates"):
+        return DEFAULT_GROWTH_SIGMA
+    rates = np.fromiter(growth_rates["zip_growth_rates"].values(), dtype=float)
+    rates = rates[np.isfinite(rates)]
+    return float(rates.std()) if len(rates) > 1 else DEFAULT_GROWTH_SIGMA
+
+
+def simulate_bands(current: float, points: Sequence[float], horizons: Sequence[int], residual: float,
+                   drift: float, annual: float = ANNUAL_VOLATILITY, paths: int = 10_000,
+                   seed: Optional[int] = None) -> List[Dict[str, float]]:
+    """Percentile bands for the current value and each horizon's point forecast"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    horizons = np.asarray(horizons, dtype=int)
+    years = int(horizons.max()) if len(horizons) else 0
+    valuation = rng.standard_normal((paths, 1), dtype=np.float32) * residual
+    drift_draw = rng.standard_normal((paths, 1), dtype=np.float32) * drift
+    shocks = np.cumsum(rng.standard_normal((paths, years), dtype=np.float32) * annual, axis=1)
+    # Columns: now, then every horizon; log-space offsets from the point forecast
+    offsets = np.concatenate([valuation, valuation + drift_draw * horizons + shocks[:, horizons - 1]], axis=1)
+    points = np.concatenate([[current], np.asarray(points, dtype=float)])
+    bands = np.percentile(offsets, PERCENTILES, axis=0)
+    values = points[None, :] * np.exp(bands)
+    return [
+        {"years_ahead": int(h), "point": float(points[i]),
+         **{f"p{q}": float(values[j, i]) for j, q in enumerate(PERCENTILES)}}
+        for i, h in enumerate([0, *horizons.tolist()])
+    ]
@@ -0,0 +1,258 @@
+"""
+Forecast table - current, 1, 5 and 10-year values from the forecast model for every row of
+the property table, computed in large vectorized chunks (optionally across a process pool)
+and stored as a columnar side table next to the models.
+
+Layout of the table directory:
+
+    manifest.json   model version, row count, source signatures, applied deltas, build info
+    <column>.npy    one float64 array per column, row i = row i of the property table
+
+Values use the same blend as /api/forecast: MODEL_WEIGHT of the model's price for the
+target year plus the rest from the current price grown at the zip trend. The table is only
+used while its model version, sources and delta journal match the running API; otherwise
+it is rebuilt. Rebuild offline with
+
+    cd ml-api
+    python -m forecast_table --workers 4
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TABLE_FORMAT = 1
+
+# Same horizons and blend as /api/forecast
+HORIZONS = (1, 5, 10)
+MODEL_WEIGHT = 0.7
+COLUMNS = ("current_price",) + tuple(f"price_{years}yr" for years in HORIZONS) + ("growth_rate",)
+
+# Columns engineer_features_frame reads; anything else is not sent to the workers
+INPUT_COLUMNS = ("house_size", "bed", "bath", "acre_lot", "city_size", "zip_code",
+                 "zip_price_mean", "zip_price_median", "zip_size_mean", "zip_count")
+
+
+def engineer_features_frame(frame, year: int, growth_rates: Optional[Dict] = None):
+    """engineer_features for every row of a frame at once; missing columns and NaN values get the same defaults"""
+    import numpy as np
+    import pandas as pd
+
+    n = len(frame)
+    def column(name, default):
+        values = pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=float) if name in frame.columns else np.full(n, np.nan)
+        return np.where(np.isnan(values), default, values)
+
+    house_size = column("house_size", 2000.0)
+    bed = np.maximum(column("bed", 3.0), 1)
+    bath = np.maximum(column("bath", 2.0), 1)
+    acre_lot = np.maximum(column("acre_lot", 0.2), 0.01)
+    lot_size_sqft = acre_lot * 43560
+    city_size = column("city_size", 5000.0)
+    zip_code = column("zip_code", 90001.0)
+
+    if growth_rates:
+        zip_growth_rate = pd.Series(zip_code).map(growth_rates["zip_growth_rates"]).fillna(growth_rates["overall_growth"]).to_numpy(dtype=float)
+    else:
+        zip_growth_rate = np.full(n, 0.04)
+
+    return pd.DataFrame({
+        "house_size": house_size, "bath": bath, "bed": bed,
+        "sqft_per_bed": house_size / bed, "bed_bath_ratio": bed / bath,
+        "bed_bath_sum": bed + bath, "acre_lot": acre_lot,
+        "lot_size_sqft": lot_size_sqft, "house_to_lot_ratio": house_size / lot_size_sqft,
+        "city_size": city_size, "is_large_city": (city_size > 1000).astype(int),
+        "years_since_2000": year - 2000, "is_recent": int(year >= 2015),
+        "decade": (year // 10) * 10,
+        "month_sin": math.sin(2 * math.pi * 6 / 12), "month_cos": math.cos(2 * math.pi * 6 / 12),
+        "zip_price_mean": column("zip_price_mean", house_size * 150),
+        "zip_price_median": column("zip_price_median", house_size * 145),
+        "zip_size_mean": column("zip_size_mean", house_size),
+        "zip_count": column("zip_count", 100.0),
+        "zip_code": zip_code, "zip_growth_rate": zip_growth_rate,
+    }, index=frame.index)
+
+
+def forecast_chunk(frame, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """COLUMNS for each row of frame; fields are the forecast artifact's (model, features, growth_rates, ...)"""
+    import numpy as np
+    import pandas as pd
+
+    year = fields.get("reference_year") or 2024
+    now = engineer_features_frame(frame, year, fields.get("growth_rates"))
+    years = [year] + [year + h for h in HORIZONS]
+    # Every target year stacked into one model call
+    stacked = pd.concat([now.assign(years_since_2000=y - 2000, is_recent=int(y >= 2015), decade=(y // 10) * 10)
+                         for y in years], ignore_index=True)
+    log_prices = np.asarray(fields["model"].predict(stacked[fields["features"]]), dtype=float)
+    prices = np.expm1(log_prices).reshape(len(years), len(frame))
+    growth = np.clip(now["zip_growth_rate"].to_numpy() + fields.get("avg_inflation", 0.025), 0.02, 0.08)
+    current = prices[0]
+    values = {"current_price": current, "growth_rate": growth}
+    for i, horizon in enumerate(HORIZONS, start=1):
+        values[f"price_{horizon}yr"] = MODEL_WEIGHT * prices[i] + (1 - MODEL_WEIGHT) * current * (1 + growth) ** horizon
+    return values
+
+
+def growth_multiplier(values: Dict[str, Any], horizon: int = 10):
+    """Forecast value after `horizon` years over the current value; the zip trend where the model gives no usable price"""
+    import numpy as np
+
+    current = values["current_price"]
+    trend = (1 + values["growth_rate"]) ** horizon
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = values[f"price_{horizon}yr"] / current
+    return np.where(np.isfinite(ratio) & (current > 0), ratio, trend)
+
+
+_worker_fields: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(fields: Dict[str, Any]):
+    # The model is shipped once per worker, not once per chunk
+    global _worker_fields
+    _worker_fields = fields
+
+
+def _forecast_in_worker(frame) -> Dict[str, Any]:
+    return forecast_chunk(frame, _worker_fields)
+
+
+def compute_forecasts(frame, fields: Dict[str, Any], workers: int = 1, chunk_size: int = 200_000) -> Dict[str, Any]:
+    """COLUMNS for every row of frame, chunked; with workers > 1 the chunks run in a process pool"""
+    import numpy as np
+
+    frame = frame[[c for c in INPUT_COLUMNS if c in frame.columns]]
+    chunks = [frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size)]
+    if not chunks:
+        return {name: np.empty(0) for name in COLUMNS}
+    if workers > 1 and len(chunks) > 1:
+        # spawn: forking a process that runs server threads can copy held locks into the children
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=get_context("spawn"),
+                                 initializer=_init_worker, initargs=(fields,)) as pool:
+            results = list(pool.map(_forecast_in_worker, chunks))
+    else:
+        results = [forecast_chunk(chunk, fields) for chunk in chunks]
+    return {name: np.concatenate([result[name] for result in results]) for name in COLUMNS}
+
+
+def default_workers() -> int:
+    """ML_FORECAST_WORKERS, else one less than the CPU count (capped at 4) so serving keeps a core"""
+    configured = os.getenv("ML_FORECAST_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    return max(1, min(4, (os.cpu_count() or 1) - 1))
+
+
+class ForecastTable:
+    """A forecast side table on disk; columns are memory-mapped read-only arrays"""
+
+    def __init__(self, directory: Path, manifest: Dict, columns: Dict[str, Any]):
+        self.directory = directory
+        self.manifest = manifest
+        self.columns = columns
+
+    @property
+    def model_version(self) -> str:
+        return self.manifest["model_version"]
+
+    @property
+    def rows(self) -> int:
+        return self.manifest["rows"]
+
+    def matches(self, model_version: str, rows: int, sources: Dict, deltas: List[str]) -> Optional[str]:
+        """Why the table cannot serve the current data and model, or None if it can"""
+        if self.model_version != model_version:
+            return f"built with model {self.model_version}, current is {model_version}"
+        if self.rows != rows:
+            return f"{self.rows:,} rows, property table has {rows:,}"
+        if self.manifest.get("sources") != sources:
+            return "source files changed"
+        if self.manifest.get("deltas") != deltas:
+            return "ingested deltas changed"
+        return None
+
+    @classmethod
+    def open(cls, directory: Path) -> Optional["ForecastTable"]:
+        import numpy as np
+
+        directory = Path(directory)
+        try:
+            manifest = json.loads((directory / "manifest.json").read_text())
+            if manifest.get("format") != TABLE_FORMAT:
+                return None
+            columns = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in manifest["columns"]}
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(directory, manifest, columns)
+
+    @classmethod
+    def save(cls, directory: Path, columns: Dict[str, Any], model_version: str, sources: Dict,
+             deltas: List[str], extra: Optional[Dict] = None) -> "ForecastTable":
+        """Write the table to a temporary directory and swap it in"""
+        import numpy as np
+
+        directory = Path(directory)
+        tmp = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        try:
+            for name, values in columns.items():
+                np.save(tmp / f"{name}.npy", np.asarray(values, dtype=np.float64), allow_pickle=False)
+            manifest = {
+                "format": TABLE_FORMAT,
+                "model_version": model_version,
+                "rows": len(next(iter(columns.values()))),
+                "columns": list(columns),
+                "horizons": list(HORIZONS),
+                "sources": sources,
+                "deltas": deltas,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                **(extra or {}),
+            }
+            (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2, default=str))
+            old = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+            if directory.exists():
+                directory.rename(old)
+            tmp.rename(directory)
+            shutil.rmtree(old, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        logger.info(f"💾 Forecast table ({manifest['rows']:,} rows, model {model_version}) written to {directory}")
+        return cls.open(directory)
+
+    def info(self) -> Dict:
+        keys = ("model_version", "rows", "created_at", "build_s", "workers", "horizons")
+        return {key: self.manifest.get(key) for key in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize the forecast table for the whole property dataset")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default ML_FORECAST_WORKERS or CPUs - 1)")
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # Loads the same data, indexes and model as the API (ML_MODELS_DIR etc. apply), without serving
+    import main as api
+    api.load_model_artifacts()
+    api.load_data()
+    table = api.build_forecast_table(workers=args.workers, chunk_size=args.chunk_size)
+    if table is None:
+        raise SystemExit("❌ Forecast model or property data not available")
+    logger.info(f"✅ {json.dumps(table.info())}")
+
+
+if __name__ == "__main__":
+    main()
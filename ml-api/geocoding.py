@@ -0,0 +1,129 @@
+"""
+Geocoding - coordinates for arrays of zip codes, from a zip coordinate table held as sorted arrays.
+
+The table is models/zip_latlng.csv (zip, lat, lng), the file the notebook recipe in
+models/How To Find The lan and att from zip_code.txt reads. Zip codes it lacks are filled
+from the centre of the property data's listings in that zip (the zip index). A batch is
+resolved with one searchsorted over the sorted zip codes, not a dict lookup per row.
+
+Like the recipe, each point gets Gaussian jitter of JITTER_DEGREES so listings in one zip do
+not stack on the map. Here the jitter is drawn from a hash of the zip code and a caller key
+(an address or listing id), so the same zip and key always give the same coordinates,
+across requests, processes and restarts.
+"""
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+JITTER_DEGREES = 0.002
+SOURCES = ("table", "listings")
+
+
+def _splitmix64(values):
+    """SplitMix64 finalizer: well-mixed uint64 outputs for uint64 inputs (wrapping arithmetic)"""
+    import numpy as np
+
+    z = values + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def jitter(zip_codes, keys: Optional[Sequence] = None):
+    """(lat, lng) offsets in degrees, normal with sd JITTER_DEGREES, a pure function of each (zip, key)"""
+    import numpy as np
+    import pandas as pd
+
+    zips = np.asarray(zip_codes, dtype=np.int64).astype(np.uint64)
+    key_hashes = (pd.util.hash_array(np.asarray(keys, dtype=object)) if keys is not None
+                  else np.zeros(len(zips), dtype=np.uint64))
+    first = _splitmix64(_splitmix64(zips) ^ key_hashes)
+    second = _splitmix64(first)
+    # Two uniforms in (0, 1] from the top 53 bits, then Box-Muller for two independent normals
+    u1 = ((first >> np.uint64(11)).astype(np.float64) + 1) / 2.0 ** 53
+    u2 = (second >> np.uint64(11)).astype(np.float64) / 2.0 ** 53
+    radius = np.sqrt(-2 * np.log(u1)) * JITTER_DEGREES
+    return radius * np.cos(2 * np.pi * u2), radius * np.sin(2 * np.pi * u2)
+
+
+def read_zip_table(path: Path):
+    """zip, lat, lng columns of a zip coordinate CSV; None when the file is missing or unusable"""
+    import pandas as pd
+
+    if not path.exists():
+        return None
+    try:
+        table = pd.read_csv(path, usecols=["zip", "lat", "lng"])
+    except (ValueError, OSError) as e:
+        logger.warning(f"⚠️ Could not read zip coordinates from {path}: {e}")
+        return None
+    logger.info(f"   Loaded {len(table):,} zip coordinates from {path.name}")
+    return table
+
+
+class ZipGeocoder:
+    """Sorted zip codes with their coordinates and where each came from (index into SOURCES)"""
+
+    def __init__(self, zips, lat, lng, source):
+        self.zips = zips
+        self.lat = lat
+        self.lng = lng
+        self.source = source
+
+    @classmethod
+    def build(cls, table=None, zip_stats: Optional[Dict[Any, Dict]] = None) -> "ZipGeocoder":
+        """From a zip table (read_zip_table) and/or zip index stats (zip_lat/zip_lng); the table wins where both have a zip"""
+        import numpy as np
+        import pandas as pd
+
+        parts = []
+        if table is not None and len(table):
+            parts.append((table["zip"], table["lat"], table["lng"], 0))
+        if zip_stats:
+            centres = pd.DataFrame.from_dict(zip_stats, orient="index")
+            if {"zip_lat", "zip_lng"} <= set(centres.columns):
+                parts.append((centres.index.to_series(), centres["zip_lat"], centres["zip_lng"], 1))
+        if not parts:
+            return cls(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), np.empty(0, dtype=np.int8))
+        zips = np.concatenate([pd.to_numeric(z, errors="coerce").to_numpy(dtype=float) for z, _, _, _ in parts])
+        lat = np.concatenate([pd.to_numeric(v, errors="coerce").to_numpy(dtype=float) for _, v, _, _ in parts])
+        lng = np.concatenate([pd.to_numeric(v, errors="coerce").to_numpy(dtype=float) for _, _, v, _ in parts])
+        source = np.concatenate([np.full(len(z), s, dtype=np.int8) for z, _, _, s in parts])
+        valid = (np.isfinite(zips) & (zips >= 0) & (zips == np.floor(zips))
+                 & (lat >= -90) & (lat <= 90) & (lng >= -180) & (lng <= 180))
+        zips, lat, lng, source = zips[valid].astype(np.int64), lat[valid], lng[valid], source[valid]
+        # Stable sort by zip, then keep each zip's first entry: the table's when it has one
+        order = np.lexsort((source, zips))
+        zips, lat, lng, source = zips[order], lat[order], lng[order], source[order]
+        first = np.concatenate([[True], zips[1:] != zips[:-1]]) if len(zips) else np.empty(0, dtype=bool)
+        return cls(zips[first], lat[first], lng[first], source[first])
+
+    def __len__(self) -> int:
+        return len(self.zips)
+
+    def lookup(self, zip_codes):
+        """Positions of zip codes in the table and whether each was found"""
+        import numpy as np
+
+        zip_codes = np.asarray(zip_codes, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.zips, zip_codes), max(len(self.zips) - 1, 0))
+        found = (self.zips[positions] == zip_codes) if len(self.zips) else np.zeros(len(zip_codes), dtype=bool)
+        return positions, found
+
+    def geocode(self, zip_codes, keys: Optional[Sequence] = None, jittered: bool = True) -> Dict[str, Any]:
+        """lat/lng (NaN where not found), the zip centres, found mask and source of each zip code"""
+        import numpy as np
+
+        zip_codes = np.asarray(zip_codes, dtype=np.int64)
+        positions, found = self.lookup(zip_codes)
+        zip_lat = np.where(found, self.lat[positions], np.nan) if len(self.zips) else np.full(len(zip_codes), np.nan)
+        zip_lng = np.where(found, self.lng[positions], np.nan) if len(self.zips) else np.full(len(zip_codes), np.nan)
+        lat, lng = zip_lat, zip_lng
+        if jittered:
+            d_lat, d_lng = jitter(zip_codes, keys)
+            lat = np.clip(zip_lat + d_lat, -90, 90)
+            lng = np.clip(zip_lng + d_lng, -180, 180)
+        source = np.where(found, self.source[positions], -1) if len(self.zips) else np.full(len(zip_codes), -1)
+        return {"lat": lat, "lng": lng, "zip_lat": zip_lat, "zip_lng": zip_lng, "found": found, "source": source}
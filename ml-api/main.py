@@ -2,23 +2,42 @@
 Unified ML Models API - FastAPI backend with integrated models
 All Flask services integrated directly into this FastAPI app
 """
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, List, Dict, Any
-from contextlib import asynccontextmanager
-import uvicorn
+from fastapi.responses import StreamingResponse, Response, JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+from contextlib import asynccontextmanager, contextmanager
+import json
 import logging
 import os
 import sys
+import time
+import secrets
+import threading
 from pathlib import Path
 
-# Add models directory to path
-models_dir = Path(__file__).parent.parent / "models"
+# Add models directory to path (ML_MODELS_DIR overrides it, e.g. for benchmarks on synthetic data)
+models_dir = Path(os.getenv("ML_MODELS_DIR", Path(__file__).parent.parent / "models")).resolve()
 sys.path.insert(0, str(models_dir))
 
 # Import education service
 from education_service import education_service, EDUCATION_LEVELS
+from model_registry import ModelRegistry, ModelSpec
+from property_store import DerivedIndex, MomentIndex, PartitionIndex, PropertyStore, moments
+from snapshot import StartupSnapshot, source_signature
+from subsystems import Subsystems
+from catalog import CACHE_CONTROL, ClusterCatalog, LocationCatalog, etag_matches, normalize_state
+from comps import CompsIndex
+from property_search import SORT_COLUMNS, Filter, SearchIndex, text_key
+from price_cube import BAND_LABELS, DIMENSIONS as CUBE_DIMENSIONS, PriceCube, band_labels
+from distributions import HISTOGRAM_EDGES, PriceDistributions
+from geocoding import SOURCES as GEOCODE_SOURCES, ZipGeocoder, read_zip_table
+from forecast_bands import ANNUAL_VOLATILITY, growth_sigma, residual_sigma, simulate_bands
+from forecast_table import (COLUMNS, MODEL_WEIGHT as FORECAST_MODEL_WEIGHT, ForecastTable, compute_forecasts,
+                            default_workers, growth_multiplier)
+import metrics
+import tracing
 
 # Configure logging
 logging.basicConfig(
@@ -34,6 +53,8 @@ logger = logging.getLogger(__name__)
 models_loading = False
 models_loaded = False
 load_task = None
+watch_task = None
+ingest_task = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -44,9 +65,25 @@ async def lifespan(app: FastAPI):
     
     # Run load_models in background task
     load_task = asyncio.create_task(load_models_background())
+
+    # Optionally poll model files and hot reload them when they change
+    global watch_task
+    watch_interval = float(os.getenv("ML_MODEL_WATCH_INTERVAL", "0"))
+    if watch_interval > 0:
+        watch_task = asyncio.create_task(model_registry.watch(watch_interval))
+
+    # Optionally pick up delta CSVs dropped into the ingest directory
+    global ingest_task
+    ingest_interval = float(os.getenv("ML_INGEST_POLL_INTERVAL", "0"))
+    if ingest_interval > 0:
+        ingest_task = asyncio.create_task(watch_ingest_dir(ingest_interval))
     
     yield
     
+    for task in (watch_task, ingest_task):
+        if task:
+            task.cancel()
+    
     # Shutdown - cancel background task if still running
     if load_task and not load_task.done():
         logger.info("Cancelling model loading task...")
@@ -57,14 +94,18 @@ async def lifespan(app: FastAPI):
             logger.info("Model loading task cancelled")
         except Exception as e:
             logger.warning(f"Error cancelling model loading task: {e}")
+    
+    # Close pooled upstream connections
+    await education_service.aclose()
 
 async def load_models_background():
-    """Load models in background without blocking server startup"""
+    """Load the ML_API_WARMUP subsystems in background without blocking server startup"""
     global models_loading, models_loaded
     import asyncio
     try:
-        # load_models is async but does blocking I/O, so we await it directly
-        await load_models()
+        logger.info(f"🚀 Starting ML Models API - warming up {warmup_subsystems or 'nothing'} "
+                    f"(other subsystems load on first use)")
+        await load_models(warmup_subsystems)
         models_loaded = True
         logger.info("🎉 All models loaded successfully in background!")
     except asyncio.CancelledError:
@@ -75,141 +116,124 @@ async def load_models_background():
     finally:
         models_loading = False
 
-async def load_models():
-    """Load all ML models and data at startup"""
-    global price_model, price_features
-    global forecast_model, forecast_features, forecast_metrics, forecast_growth_rates, forecast_reference_year, forecast_avg_inflation
-    global cluster_model, cluster_num_clusters, cluster_stats, cluster_df, centroids_df
+async def load_models(names: Optional[List[str]] = None):
+    """Load subsystems (default: all of them) in worker threads; each one loads at most once"""
+    await subsystems.ensure(subsystems.names() if names is None else names)
+
+def load_model_artifacts():
+    """Price and forecast models (hot reloadable, see model_registry.py)"""
+    for name in ("price", "forecast"):
+        logger.info(f"Loading {name} model...")
+        result = model_registry.load(name)
+        if result["result"] == "missing":
+            logger.warning(f"⚠️ {name.capitalize()} model not found at {result['path']}")
+
+def load_data():
+    """Load cluster, advisor and property data plus their derived indexes"""
+    global cluster_model, cluster_num_clusters, cluster_stats, cluster_df, centroids_df, cluster_stats_df
     global advisor
-    global property_data_df
+    global property_data_df, snapshot_pending
     
-    logger.info("🚀 Starting ML Models API - Loading all models...")
+    logger.info("Loading cluster, advisor and property data...")
     
     try:
-        # Load Price Prediction Model
-        logger.info("Loading price prediction model...")
-        price_model_path = models_dir / "Predict_price.pkl"
-        if price_model_path.exists():
-            import pickle
-            import pandas as pd
-            with open(price_model_path, "rb") as f:
-                saved = pickle.load(f)
-            price_model = saved["model"]
-            price_features = list(saved["features"])
-            logger.info(f"✅ Price prediction model loaded with {len(price_features)} features")
-        else:
-            logger.warning(f"⚠️ Price model not found at {price_model_path}")
-        
-        # Load Forecast Model
-        logger.info("Loading 10-year forecast model...")
-        forecast_model_path = models_dir / "model_predict_10_years.pkl"
-        if forecast_model_path.exists():
-            import pickle
-            with open(forecast_model_path, "rb") as f:
-                saved = pickle.load(f)
-            forecast_model = saved["model"]
-            forecast_features = saved["features"]
-            forecast_metrics = saved["metrics"]
-            forecast_growth_rates = saved["growth_rates"]
-            forecast_reference_year = saved["reference_year"]
-            forecast_avg_inflation = saved.get("avg_inflation", 0.025)
-            logger.info(f"✅ Forecast model loaded! R² = {forecast_metrics['r2']:.4f}")
-        else:
-            logger.warning(f"⚠️ Forecast model not found at {forecast_model_path}")
+        # Tables and derived indexes come from the startup snapshot when the source files are unchanged
+        restored = restore_startup_snapshot()
         
-        # Load Cluster Model and Data
-        logger.info("Loading cluster model and data...")
-        cluster_model_path = models_dir / "street_clustering_metadata.pkl"
-        cluster_data_path = models_dir / "clustered_by_street.csv"
-        centroids_path = models_dir / "street_cluster_centroids.csv"
-        stats_path = models_dir / "street_clustering_stats.csv"
+        # Load Cluster Model and Data (already restored from the snapshot if one was valid)
+        if restored is None:
+            logger.info("Loading cluster model and data...")
+            cluster_model_path = models_dir / "street_clustering_metadata.pkl"
+            cluster_data_path = models_dir / "clustered_by_street.csv"
+            centroids_path = models_dir / "street_cluster_centroids.csv"
+            stats_path = models_dir / "street_clustering_stats.csv"
         
-        import pickle
-        import pandas as pd
+            import pickle
+            import pandas as pd
         
-        # Load centroids CSV (much smaller, load directly)
-        if centroids_path.exists():
-            logger.info(f"   Loading cluster centroids from {centroids_path.name}...")
-            try:
-                centroids_df = pd.read_csv(centroids_path, low_memory=False)
-                logger.info(f"   ✅ Loaded {len(centroids_df):,} cluster centroids")
-            except Exception as e:
-                logger.warning(f"   ⚠️ Error loading centroids: {e}")
+            # Load centroids CSV (much smaller, load directly)
+            if centroids_path.exists():
+                logger.info(f"   Loading cluster centroids from {centroids_path.name}...")
+                try:
+                    centroids_df = pd.read_csv(centroids_path, low_memory=False)
+                    logger.info(f"   ✅ Loaded {len(centroids_df):,} cluster centroids")
+                except Exception as e:
+                    logger.warning(f"   ⚠️ Error loading centroids: {e}")
+                    centroids_df = None
+            else:
+                logger.warning(f"   ⚠️ Centroids CSV not found at {centroids_path}")
                 centroids_df = None
-        else:
-            logger.warning(f"   ⚠️ Centroids CSV not found at {centroids_path}")
-            centroids_df = None
         
-        # Load cluster data (may be very large, use chunks)
-        if cluster_data_path.exists():
-            logger.info(f"   Loading cluster data from {cluster_data_path.name} (this may take a while for large files)...")
-            try:
-                # Read in chunks for very large files
-                chunk_list = []
-                chunk_size = 100000  # 100k rows per chunk
-                total_rows = 0
-                for chunk in pd.read_csv(cluster_data_path, chunksize=chunk_size, low_memory=False):
-                    chunk_list.append(chunk)
-                    total_rows += len(chunk)
-                    if len(chunk_list) % 10 == 0:
-                        logger.info(f"   Loaded {total_rows:,} rows so far...")
-                if chunk_list:
-                    cluster_df = pd.concat(chunk_list, ignore_index=True)
-                    logger.info(f"   ✅ Loaded {len(cluster_df):,} rows in {len(chunk_list)} chunks")
-                else:
-                    cluster_df = pd.read_csv(cluster_data_path, low_memory=False)
-                    logger.info(f"   ✅ Loaded {len(cluster_df):,} rows")
-            except Exception as e:
-                logger.warning(f"   ⚠️ Error loading cluster data: {e}")
+            # Load cluster data (may be very large, use chunks)
+            if cluster_data_path.exists():
+                logger.info(f"   Loading cluster data from {cluster_data_path.name} (this may take a while for large files)...")
+                try:
+                    # Read in chunks for very large files
+                    chunk_list = []
+                    chunk_size = 100000  # 100k rows per chunk
+                    total_rows = 0
+                    for chunk in pd.read_csv(cluster_data_path, chunksize=chunk_size, low_memory=False):
+                        chunk_list.append(chunk)
+                        total_rows += len(chunk)
+                        if len(chunk_list) % 10 == 0:
+                            logger.info(f"   Loaded {total_rows:,} rows so far...")
+                    if chunk_list:
+                        cluster_df = pd.concat(chunk_list, ignore_index=True)
+                        logger.info(f"   ✅ Loaded {len(cluster_df):,} rows in {len(chunk_list)} chunks")
+                    else:
+                        cluster_df = pd.read_csv(cluster_data_path, low_memory=False)
+                        logger.info(f"   ✅ Loaded {len(cluster_df):,} rows")
+                except Exception as e:
+                    logger.warning(f"   ⚠️ Error loading cluster data: {e}")
+                    cluster_df = None
+            else:
+                logger.warning(f"   ⚠️ Cluster data CSV not found at {cluster_data_path}")
                 cluster_df = None
-        else:
-            logger.warning(f"   ⚠️ Cluster data CSV not found at {cluster_data_path}")
-            cluster_df = None
         
-        # Load cluster metadata/model if exists
-        if cluster_model_path.exists():
-            try:
-                logger.info(f"   Loading cluster metadata from {cluster_model_path.name}...")
-                with open(cluster_model_path, "rb") as f:
-                    cluster_metadata = pickle.load(f)
-                logger.info(f"   ✅ Cluster metadata loaded")
-                # Extract useful info if available
-                if isinstance(cluster_metadata, dict):
-                    cluster_num_clusters = cluster_metadata.get("num_clusters", len(centroids_df) if centroids_df is not None else 0)
-                    cluster_stats = cluster_metadata
-                else:
+            # Load cluster metadata/model if exists
+            if cluster_model_path.exists():
+                try:
+                    logger.info(f"   Loading cluster metadata from {cluster_model_path.name}...")
+                    with open(cluster_model_path, "rb") as f:
+                        cluster_metadata = pickle.load(f)
+                    logger.info(f"   ✅ Cluster metadata loaded")
+                    # Extract useful info if available
+                    if isinstance(cluster_metadata, dict):
+                        cluster_num_clusters = cluster_metadata.get("num_clusters", len(centroids_df) if centroids_df is not None else 0)
+                        cluster_stats = cluster_metadata
+                    else:
+                        cluster_num_clusters = len(centroids_df) if centroids_df is not None else 0
+                        cluster_stats = {}
+                except Exception as e:
+                    logger.warning(f"   ⚠️ Error loading cluster metadata: {e}")
                     cluster_num_clusters = len(centroids_df) if centroids_df is not None else 0
                     cluster_stats = {}
-            except Exception as e:
-                logger.warning(f"   ⚠️ Error loading cluster metadata: {e}")
+            else:
+                logger.info(f"   Cluster metadata not found, using centroids count")
                 cluster_num_clusters = len(centroids_df) if centroids_df is not None else 0
                 cluster_stats = {}
-        else:
-            logger.info(f"   Cluster metadata not found, using centroids count")
-            cluster_num_clusters = len(centroids_df) if centroids_df is not None else 0
-            cluster_stats = {}
         
-        # Load cluster stats CSV if available
-        if stats_path.exists():
-            try:
-                logger.info(f"   Loading cluster statistics from {stats_path.name}...")
-                cluster_stats_df = pd.read_csv(stats_path, low_memory=False)
-                logger.info(f"   ✅ Loaded statistics for {len(cluster_stats_df):,} streets")
-            except Exception as e:
-                logger.warning(f"   ⚠️ Error loading cluster stats: {e}")
+            # Load cluster stats CSV if available
+            if stats_path.exists():
+                try:
+                    logger.info(f"   Loading cluster statistics from {stats_path.name}...")
+                    cluster_stats_df = pd.read_csv(stats_path, low_memory=False)
+                    logger.info(f"   ✅ Loaded statistics for {len(cluster_stats_df):,} streets")
+                except Exception as e:
+                    logger.warning(f"   ⚠️ Error loading cluster stats: {e}")
+                    cluster_stats_df = None
+            else:
                 cluster_stats_df = None
-        else:
-            cluster_stats_df = None
         
-        if cluster_df is None and centroids_df is None:
-            logger.warning("⚠️ No cluster data or centroids loaded")
-        else:
-            logger.info(f"✅ Cluster system loaded: {cluster_num_clusters} clusters, {len(cluster_df) if cluster_df is not None else 0} properties")
+            if cluster_df is None and centroids_df is None:
+                logger.warning("⚠️ No cluster data or centroids loaded")
+            else:
+                logger.info(f"✅ Cluster system loaded: {cluster_num_clusters} clusters, {len(cluster_df) if cluster_df is not None else 0} properties")
         
-        # Try to load old cluster model for backward compatibility (skip if new files exist)
-        old_cluster_model_path = models_dir / "best_street_cluster_model.pkl"
-        if old_cluster_model_path.exists() and cluster_model_path != old_cluster_model_path:
-            logger.info(f"   Also found old cluster model at {old_cluster_model_path.name}, skipping (using new files)")
+            # Try to load old cluster model for backward compatibility (skip if new files exist)
+            old_cluster_model_path = models_dir / "best_street_cluster_model.pkl"
+            if old_cluster_model_path.exists() and cluster_model_path != old_cluster_model_path:
+                logger.info(f"   Also found old cluster model at {old_cluster_model_path.name}, skipping (using new files)")
         
         # Load Advisor Model - Try pickle first, fallback to dataset-based implementation
         logger.info("Loading investment advisor model...")
@@ -274,6 +298,9 @@ async def load_models():
                     
                     # Create a simple advisor class that works with the dataset
                     class DatasetAdvisor:
+                        risk_models = ("location", "candidates")
+                        roi_models = ("model", "flat")
+                        
                         def __init__(self, df):
                             self.df = df
                             # Map column names (CSV has: price, bed, bath, city, state, zip_code, house_size)
@@ -299,45 +326,10 @@ async def load_models():
                             if not self.state_col:
                                 return []
                             
-                            # Get all unique states from the dataset
-                            all_states = self.df[self.state_col].dropna().unique().tolist()
-                            
-                            # Define valid US states and territories (comprehensive list)
-                            valid_us_states = {
-                                'Alabama', 'Alaska', 'Arizona', 'Arkansas', 'California', 'Colorado',
-                                'Connecticut', 'Delaware', 'District of Columbia', 'Florida', 'Georgia',
-                                'Hawaii', 'Idaho', 'Illinois', 'Indiana', 'Iowa', 'Kansas', 'Kentucky',
-                                'Louisiana', 'Maine', 'Maryland', 'Massachusetts', 'Michigan', 'Minnesota',
-                                'Mississippi', 'Missouri', 'Montana', 'Nebraska', 'Nevada', 'New Hampshire',
-                                'New Jersey', 'New Mexico', 'New York', 'North Carolina', 'North Dakota',
-                                'Ohio', 'Oklahoma', 'Oregon', 'Pennsylvania', 'Rhode Island', 'South Carolina',
-                                'South Dakota', 'Tennessee', 'Texas', 'Utah', 'Vermont', 'Virginia',
-                                'Washington', 'West Virginia', 'Wisconsin', 'Wyoming', 'Puerto Rico', 'Virgin Islands'
-                            }
-                            
-                            # Filter to only valid US states (case-insensitive matching and handle variations)
-                            valid_states = []
-                            seen = set()
-                            for state in all_states:
-                                state_str = str(state).strip()
-                                # Skip empty strings
-                                if not state_str:
-                                    continue
-                                # Check if state is in valid list (case-insensitive)
-                                state_lower = state_str.lower()
-                                # Find matching valid state
-                                matching_valid = None
-                                for valid in valid_us_states:
-                                    if valid.lower() == state_lower:
-                                        matching_valid = valid
-                                        break
-                                
-                                # Only add if it's a valid state and we haven't seen it
-                                if matching_valid and matching_valid not in seen:
-                                    valid_states.append(matching_valid)
-                                    seen.add(matching_valid)
-                            
-                            return sorted(valid_states)
+                            # Normalize against the valid US states/territories (see catalog.py), dropping duplicates
+                            states = {normalize_state(state) for state in self.df[self.state_col].dropna().unique()}
+                            states.discard(None)
+                            return sorted(states)
                         
                         def get_cities_by_state(self, state):
                             if not self.state_col or not self.city_col:
@@ -348,31 +340,32 @@ async def load_models():
                         
                         def recommend_investments(self, budget, state=None, city=None, 
                                                  min_beds=None, max_beds=None, min_baths=None, 
-                                                 top_n=10, verbose=False):
-                            df = self.df.copy()
+                                                 top_n=10, verbose=False, risk_model="location", roi_model="model"):
+                            with tracing.span("advisor.filter", rows=len(self.df)):
+                                df = self.df.copy()
                             
-                            # Filter by state
-                            if state and self.state_col:
-                                df = df[df[self.state_col] == state]
+                                # Filter by state
+                                if state and self.state_col:
+                                    df = df[df[self.state_col] == state]
                             
-                            # Filter by city
-                            if city and self.city_col:
-                                df = df[df[self.city_col] == city]
+                                # Filter by city
+                                if city and self.city_col:
+                                    df = df[df[self.city_col] == city]
                             
-                            # Filter by price (within budget)
-                            if self.price_col:
-                                df = df[df[self.price_col] <= budget * 1.1]  # Allow 10% over budget
-                                df = df[df[self.price_col] > 0]  # Remove invalid prices
+                                # Filter by price (within budget)
+                                if self.price_col:
+                                    df = df[df[self.price_col] <= budget * 1.1]  # Allow 10% over budget
+                                    df = df[df[self.price_col] > 0]  # Remove invalid prices
                             
-                            # Filter by bedrooms
-                            if min_beds and self.bed_col:
-                                df = df[df[self.bed_col] >= min_beds]
-                            if max_beds and self.bed_col:
-                                df = df[df[self.bed_col] <= max_beds]
+                                # Filter by bedrooms
+                                if min_beds and self.bed_col:
+                                    df = df[df[self.bed_col] >= min_beds]
+                                if max_beds and self.bed_col:
+                                    df = df[df[self.bed_col] <= max_beds]
                             
-                            # Filter by bathrooms
-                            if min_baths and self.bath_col:
-                                df = df[df[self.bath_col] >= min_baths]
+                                # Filter by bathrooms
+                                if min_baths and self.bath_col:
+                                    df = df[df[self.bath_col] >= min_baths]
                             
                             if len(df) == 0:
                                 return {
@@ -382,47 +375,61 @@ async def load_models():
                                     'message': 'No properties found matching criteria'
                                 }
                             
-                            # Calculate ROI (simplified - assume 4% annual growth)
-                            if self.price_col:
-                                df['roi_10_year'] = ((df[self.price_col] * (1.04 ** 10)) - df[self.price_col]) / df[self.price_col]
-                                df['price_10yr'] = df[self.price_col] * (1.04 ** 10)
+                            roi_version = None
+                            with tracing.span("advisor.score_and_sort", candidates=len(df)):
+                                # 10-year growth from the forecast model (precomputed per row), else a flat 4% a year
+                                if self.price_col:
+                                    scored = candidate_growth(df, self.df) if roi_model == "model" else None
+                                    growth, roi_version = scored or (1.04 ** 10, None)
+                                    df['roi_10_year'] = growth - 1
+                                    df['price_10yr'] = df[self.price_col] * growth
                                 
-                                # Calculate risk (inverse of price stability)
-                                price_std = df[self.price_col].std()
-                                price_mean = df[self.price_col].mean()
-                                df['risk'] = abs(df[self.price_col] - price_mean) / price_std if price_std > 0 else 0.5
-                                df['risk'] = df['risk'].clip(0, 1)  # Normalize to 0-1
+                                    # Legacy risk: distance from the candidate set's mean price (a full pass per request).
+                                    # The default "location" risk is computed below for the top rows only.
+                                    if risk_model == "candidates":
+                                        price_std = df[self.price_col].std()
+                                        price_mean = df[self.price_col].mean()
+                                        df['risk'] = abs(df[self.price_col] - price_mean) / price_std if price_std > 0 else 0.5
+                                        df['risk'] = df['risk'].clip(0, 1)  # Normalize to 0-1
                                 
-                                # Sort by ROI descending
-                                df = df.sort_values('roi_10_year', ascending=False)
-                            else:
-                                df['roi_10_year'] = 0.4  # Default 40% ROI
-                                df['price_10yr'] = df.get(self.size_col, pd.Series([0] * len(df))) * 200 if self.size_col else 0
-                                df['risk'] = 0.5
+                                    # Sort by ROI descending
+                                    df = df.sort_values('roi_10_year', ascending=False)
+                                else:
+                                    df['roi_10_year'] = 0.4  # Default 40% ROI
+                                    df['price_10yr'] = df.get(self.size_col, pd.Series([0] * len(df))) * 200 if self.size_col else 0
+                                    df['risk'] = 0.5
                             
                             # Get top N
                             top_properties = df.head(top_n)
+                            if self.price_col and risk_model == "location":
+                                with tracing.span("advisor.location_risk", rows=len(top_properties)):
+                                    top_properties = top_properties.assign(**location_risk(top_properties, self.price_col))
                             
-                            results = []
-                            for idx, row in top_properties.iterrows():
-                                result = {
-                                    'city': str(row.get(self.city_col, 'Unknown')) if self.city_col else 'Unknown',
-                                    'state': str(row.get(self.state_col, 'Unknown')) if self.state_col else 'Unknown',
-                                    'current_price': float(row.get(self.price_col, 0)) if self.price_col else 0,
-                                    'beds': int(row.get(self.bed_col, 0)) if self.bed_col else 0,
-                                    'baths': float(row.get(self.bath_col, 0)) if self.bath_col else 0,
-                                    'house_size': float(row.get(self.size_col, 0)) if self.size_col else 0,
-                                    'roi_10_year': float(row.get('roi_10_year', 0.4)),
-                                    'price_10yr': float(row.get('price_10yr', 0)),
-                                    'risk': float(row.get('risk', 0.5))
-                                }
-                                results.append(result)
+                            with tracing.span("advisor.iterrows"):
+                                results = []
+                                for idx, row in top_properties.iterrows():
+                                    result = {
+                                        'city': str(row.get(self.city_col, 'Unknown')) if self.city_col else 'Unknown',
+                                        'state': str(row.get(self.state_col, 'Unknown')) if self.state_col else 'Unknown',
+                                        'current_price': float(row.get(self.price_col, 0)) if self.price_col else 0,
+                                        'beds': int(row.get(self.bed_col, 0)) if self.bed_col else 0,
+                                        'baths': float(row.get(self.bath_col, 0)) if self.bath_col else 0,
+                                        'house_size': float(row.get(self.size_col, 0)) if self.size_col else 0,
+                                        'roi_10_year': float(row.get('roi_10_year', 0.4)),
+                                        'price_10yr': float(row.get('price_10yr', 0)),
+                                        'risk': float(row.get('risk', 0.5)),
+                                        'risk_basis': row.get('risk_basis'),
+                                        'location_volatility': row.get('location_volatility')
+                                    }
+                                    results.append(result)
                             
                             return {
                                 'success': True,
                                 'data': results,
                                 'total_analyzed': len(self.df),
-                                'filtered_count': len(df)
+                                'filtered_count': len(df),
+                                'roi_model': "model" if roi_version else "flat",
+                                'model_version': roi_version
                             }
                     
                     advisor = DatasetAdvisor(advisor_df)
@@ -443,8 +450,10 @@ async def load_models():
         if property_data_path.exists():
             import pandas as pd
             try:
+                if restored is not None and property_data_df is not None:
+                    logger.info(f"✅ Property data restored from snapshot! {len(property_data_df):,} properties")
                 # Reuse cluster_df if it's already loaded (same file) - saves time and memory
-                if cluster_df is not None and not cluster_df.empty:
+                elif cluster_df is not None and not cluster_df.empty:
                     property_data_df = cluster_df
                     logger.info(f"✅ Property data reused from cluster data! {len(property_data_df):,} properties")
                 else:
@@ -476,13 +485,53 @@ async def load_models():
             logger.warning(f"⚠️ Property data CSV not found at {property_data_path}")
             property_data_df = pd.DataFrame()
         
-        logger.info("🎉 All models loaded successfully!")
+        # Derived indexes (zip stats, state/city and cluster partitions) plus any ingested deltas
+        replayed = 0
+        if property_data_df is not None and len(property_data_df) > 0:
+            if restored is not None:
+                property_store.restore(property_data_df, restored["indexes"], restored["index_versions"])
+                replayed = replay_ingested_deltas(skip=restored["applied"])
+            else:
+                logger.info("Building property indexes...")
+                property_store.load(property_data_df)
+                replayed = replay_ingested_deltas()
+        # Model-driven ROI projections are built in the background once the forecast model is in
+        threading.Thread(target=ensure_projection, name="projection-refresh", daemon=True).start()
+        # Rewrite the snapshot if anything was loaded from source: files, deltas or changed indexes
+        snapshot_pending = restored is None or replayed > 0 or restored["index_versions"] != property_store.versions()
+        # Build the dropdown and cluster catalogs now rather than on the first request
+        location_catalog()
+        cluster_catalog()
+        if snapshot_pending and snapshot_enabled:
+            # Written in the background: requests waiting on this load should not wait for the snapshot too
+            threading.Thread(target=save_startup_snapshot, name="startup-snapshot", daemon=True).start()
+        
+        logger.info("🎉 Property data and indexes loaded successfully!")
         
     except Exception as e:
         logger.error(f"❌ Error loading models: {e}", exc_info=True)
         logger.warning("Some models may not be available. Check model files in models/ directory.")
 
-app = FastAPI(title="NeuralEstate ML Models API", version="1.0.0", lifespan=lifespan)
+class TracedJSONResponse(JSONResponse):
+    """Default response class that times JSON encoding as its own span"""
+    def render(self, content: Any) -> bytes:
+        with tracing.span("json_encode"):
+            return super().render(content)
+
+app = FastAPI(title="NeuralEstate ML Models API", version="1.0.0", lifespan=lifespan, default_response_class=TracedJSONResponse)
+
+# Admin-only features (request profiling, ...) require X-Admin-Token to match this; disabled when unset
+ADMIN_TOKEN = os.getenv("ML_API_ADMIN_TOKEN", "")
+
+def is_admin(request: Request) -> bool:
+    token = request.headers.get("x-admin-token", "")
+    return bool(ADMIN_TOKEN) and secrets.compare_digest(token, ADMIN_TOKEN)
+
+@contextmanager
+def model_stage(model: str, stage: str):
+    """Time a model request stage as both a tracing span and a metrics histogram sample"""
+    with tracing.span(f"{model}.{stage}"), metrics.MODEL_STAGE_LATENCY.time(model=model, stage=stage):
+        yield
 
 # CORS
 app.add_middleware(
@@ -494,17 +543,67 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+@app.middleware("http")
+async def load_subsystems_on_demand(request: Request, call_next):
+    """Load the subsystems a route needs before handling its first request (see ML_API_WARMUP)"""
+    needed = subsystems.needed_for(request.url.path)
+    if needed:
+        with tracing.span("lazy_load", subsystems=",".join(needed)):
+            await subsystems.ensure(needed)
+    return await call_next(request)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and time them per route template (not raw path, to keep label cardinality bounded)"""
+    start = time.perf_counter()
+    metrics.HTTP_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        metrics.HTTP_REQUESTS.inc(method=request.method, route=route_path, status=status)
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - start, method=request.method, route=route_path)
+
+@app.middleware("http")
+async def trace_and_profile(request: Request, call_next):
+    """Wrap each request in a root span; ?profile=1 (admin only) returns a profiler report instead of the body"""
+    if request.query_params.get("profile") == "1":
+        if not is_admin(request):
+            return JSONResponse(status_code=403, content={"detail": "Profiling requires a valid X-Admin-Token"})
+        if tracing.profile_lock.locked():
+            return JSONResponse(status_code=409, content={"detail": "Another request is being profiled, retry when it finishes"})
+        async with tracing.profile_lock:
+            profiler = tracing.RequestProfiler()
+            start = time.perf_counter()
+            profiler.start()
+            try:
+                response = await call_next(request)
+                # Drain the body inside the profiling window so serialization is included
+                body_size = 0
+                async for chunk in response.body_iterator:
+                    body_size += len(chunk)
+            finally:
+                profiler.stop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        header = (f"{request.method} {request.url.path} -> {response.status_code}, "
+                  f"{body_size:,} bytes in {elapsed_ms:.1f} ms ({profiler.engine})\n\n")
+        return PlainTextResponse(header + profiler.report(), headers={"X-Profiled-Status": str(response.status_code)})
+    
+    with tracing.trace_request(f"{request.method} {request.url.path}") as root:
+        response = await call_next(request)
+    if root is not None:
+        response.headers["Server-Timing"] = tracing.server_timing(root)
+    return response
+
 # ==========================================
 # GLOBAL MODEL VARIABLES (loaded at startup)
 # ==========================================
-price_model = None
-price_features = None
-forecast_model = None
-forecast_features = None
-forecast_metrics = None
-forecast_growth_rates = None
-forecast_reference_year = None
-forecast_avg_inflation = None
+# Price and forecast models live in model_registry (defined below) so they can be hot reloaded
 cluster_model = None
 cluster_num_clusters = None
 cluster_stats = None
@@ -575,10 +674,40 @@ class ForecastRequest(BaseModel):
     
     model_config = ConfigDict(extra="allow")
 
+class WarmupRequest(BaseModel):
+    subsystems: Optional[List[str]] = None  # default: all registered subsystems
+
+class ForecastTableRequest(BaseModel):
+    workers: Optional[int] = Field(None, ge=1, le=64)  # default: ML_FORECAST_WORKERS or CPUs - 1
+
+class ModelReloadRequest(BaseModel):
+    models: Optional[List[str]] = None  # default: all registered models
+    force: bool = False  # reload even if the file is unchanged
+
+class PropertyIngestRequest(BaseModel):
+    rows: List[Dict[str, Any]] = Field(..., min_length=1, max_length=100_000)
+
 class ClusterPredictRequest(BaseModel):
     lat: float
     lng: float
 
+class CompsRequest(BaseModel):
+    house_size: float
+    bed: Optional[int] = None
+    bath: Optional[float] = None
+    acre_lot: Optional[float] = None
+    zip_code: Optional[int] = None
+    lat: Optional[float] = Field(None, ge=-90, le=90)     # default: the zip code's centre
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+    price: Optional[float] = Field(None, gt=0)          # default: the price model's estimate
+    street_cluster: Optional[int] = None               # for scope=cluster; default: nearest cluster
+
+class GeocodeBatchRequest(BaseModel):
+    zip_codes: List[int] = Field(..., min_length=1, max_length=100_000)
+    keys: Optional[List[str]] = None    # one per zip code (address or listing id): seeds its jitter
+    jitter: bool = True
+    clusters: bool = True               # add each point's street cluster
+
 class AdvisorRequest(BaseModel):
     budget: float
     state: Optional[str] = None
@@ -591,7 +720,7 @@ class AdvisorRequest(BaseModel):
 # ==========================================
 # HELPER FUNCTIONS
 # ==========================================
-def engineer_features(data: dict, year: int):
+def engineer_features(data: dict, year: int, growth_rates: Optional[Dict] = None):
     """Engineer features for forecast prediction"""
     import math
     import numpy as np
@@ -623,9 +752,9 @@ def engineer_features(data: dict, year: int):
     zip_size_mean = data.get("zip_size_mean", house_size)
     zip_count = data.get("zip_count", 100)
     
-    zip_growth_rate = forecast_growth_rates["zip_growth_rates"].get(
-        zip_code, forecast_growth_rates["overall_growth"]
-    ) if forecast_growth_rates else 0.04
+    zip_growth_rate = growth_rates["zip_growth_rates"].get(
+        zip_code, growth_rates["overall_growth"]
+    ) if growth_rates else 0.04
     
     return {
         "house_size": house_size, "bath": bath, "bed": bed,
@@ -640,19 +769,710 @@ def engineer_features(data: dict, year: int):
         "zip_code": zip_code, "zip_growth_rate": zip_growth_rate
     }
 
-def predict_single_year(data: dict, year: int):
+def predict_single_year(data: dict, year: int, forecast=None):
     """Predict price for specific year"""
     import pandas as pd
     import numpy as np
     
-    if forecast_model is None:
+    forecast = forecast or model_registry.get("forecast")
+    if forecast is None:
         raise HTTPException(status_code=503, detail="Forecast model not loaded")
     
-    engineered = engineer_features(data, year)
-    X_input = pd.DataFrame([engineered])[forecast_features]
-    log_price = forecast_model.predict(X_input)
+    with model_stage("forecast", "feature_engineering"):
+        engineered = engineer_features(data, year, forecast.growth_rates)
+        X_input = pd.DataFrame([engineered])[forecast.features]
+    with model_stage("forecast", "inference"):
+        log_price = forecast.model.predict(X_input)
     return float(np.expm1(log_price)[0])
 
+def predict_years(data: dict, years: List[int], forecast) -> List[float]:
+    """Predict prices for several years with a single model call"""
+    import pandas as pd
+    import numpy as np
+    
+    with model_stage("forecast", "feature_engineering"):
+        X_input = pd.DataFrame([engineer_features(data, year, forecast.growth_rates) for year in years])[forecast.features]
+    with model_stage("forecast", "inference"):
+        log_prices = forecast.model.predict(X_input)
+    return [float(p) for p in np.expm1(log_prices)]
+
+# ==========================================
+# MODEL REGISTRY (hot reload)
+# ==========================================
+def _unpack_price(saved: dict) -> dict:
+    return {"model": saved["model"], "features": list(saved["features"])}
+
+def _unpack_forecast(saved: dict) -> dict:
+    return {
+        "model": saved["model"],
+        "features": list(saved["features"]),
+        "metrics": saved["metrics"],
+        "growth_rates": saved["growth_rates"],
+        # Spread of the zip growth rates for the forecast bands, once per load
+        "growth_sigma": growth_sigma(saved["growth_rates"]),
+        "reference_year": saved["reference_year"],
+        "avg_inflation": saved.get("avg_inflation", 0.025),
+    }
+
+def _smoke_row(features: List[str], year: int, growth_rates: Optional[Dict] = None):
+    """One typical property with every feature the model expects"""
+    import pandas as pd
+    row = engineer_features({}, year, growth_rates)
+    return pd.DataFrame([{f: row.get(f, 0) for f in features}])[features]
+
+def _check_prediction(name: str, log_price):
+    import numpy as np
+    price = float(np.expm1(np.asarray(log_price, dtype=float).ravel()[0]))
+    if not np.isfinite(price) or price <= 0:
+        raise ValueError(f"{name} smoke prediction returned {price}")
+
+def _smoke_price(artifact):
+    _check_prediction("price", artifact.model.predict(_smoke_row(artifact.features, 2024)))
+
+def _smoke_forecast(artifact):
+    year = artifact.reference_year or 2024
+    _check_prediction("forecast", artifact.model.predict(_smoke_row(artifact.features, year, artifact.growth_rates)))
+
+model_registry = ModelRegistry(models_dir, {
+    "price": ModelSpec("Predict_price.pkl", _unpack_price, _smoke_price),
+    "forecast": ModelSpec("model_predict_10_years.pkl", _unpack_forecast, _smoke_forecast),
+})
+
+# ==========================================
+# PROPERTY STORE (derived indexes + delta ingestion)
+# ==========================================
+def _zip_aggregate(frame):
+    import pandas as pd
+    groups = frame.groupby("zip_code")
+    stats = pd.DataFrame({
+        "zip_price_mean": groups["price"].mean(),
+        "zip_price_median": groups["price"].median(),
+        "zip_size_mean": groups["house_size"].mean(),
+    }).fillna(0.0)
+    if {"state", "city"} <= set(frame.columns):
+        # The zip's most common city; its listing count is the city_size feature of a bare zip code
+        cities = frame.groupby(["zip_code", "state", "city"]).size().sort_values(ascending=False, kind="stable")
+        dominant = cities.reset_index().drop_duplicates("zip_code").set_index("zip_code")
+        stats["zip_state"] = dominant["state"]
+        stats["zip_city"] = dominant["city"]
+    if {"lat", "lng"} <= set(frame.columns):
+        # Where a request that only gives a zip code is placed (comps)
+        valid = frame["lat"].between(-90, 90) & frame["lng"].between(-180, 180)
+        located = frame.loc[valid, ["zip_code", "lat", "lng"]].groupby("zip_code").mean()
+        stats["zip_lat"] = located["lat"]
+        stats["zip_lng"] = located["lng"]
+    return stats
+
+def _cluster_aggregate(frame):
+    """Centroid, bounding box and price stats per cluster in a single groupby.
+
+    Coordinates out of range are left out of the centroid and box; prices <= 0 and sizes
+    <= 0 are left out of the price stats.
+    """
+    import pandas as pd
+    valid = frame["lat"].between(-90, 90) & frame["lng"].between(-180, 180)
+    columns = {"street_cluster": frame["street_cluster"], "lat": frame["lat"].where(valid), "lng": frame["lng"].where(valid)}
+    aggregations = {
+        "lat": ("lat", "mean"), "lng": ("lng", "mean"),
+        "lat_min": ("lat", "min"), "lat_max": ("lat", "max"),
+        "lng_min": ("lng", "min"), "lng_max": ("lng", "max"),
+    }
+    if "price" in frame.columns:
+        columns["price"] = frame["price"].where(frame["price"] > 0)
+        aggregations.update(avg_price=("price", "mean"), median_price=("price", "median"))
+        if "house_size" in frame.columns:
+            columns["price_per_sqft"] = columns["price"] / frame["house_size"].where(frame["house_size"] > 0)
+            aggregations["price_per_sqft"] = ("price_per_sqft", "median")
+    return pd.DataFrame(columns).groupby("street_cluster").agg(**aggregations)
+
+property_store = PropertyStore()
+property_store.register(PartitionIndex("zip", ["zip_code"], _zip_aggregate, required=["price", "house_size"],
+                                       optional=["state", "city", "lat", "lng"]))
+property_store.register(PartitionIndex("state_city", ["state", "city"]))
+property_store.register(PartitionIndex("cluster", ["street_cluster"], _cluster_aggregate, required=["lat", "lng"],
+                                       optional=["price", "house_size"]))
+# Running price moments per location level, for advisor risk relative to a property's own area
+PRICE_LEVELS = {"zip": ["zip_code"], "city": ["state", "city"], "state": ["state"], "cluster": ["street_cluster"]}
+for _level, _columns in PRICE_LEVELS.items():
+    property_store.register(MomentIndex(f"price_{_level}", _columns, "price"))
+# Price quantile sketches and histograms per location level, for distribution charts
+price_distributions = PriceDistributions(PRICE_LEVELS)
+property_store.register(price_distributions)
+comps_index = CompsIndex()
+property_store.register(comps_index)
+search_index = SearchIndex()
+property_store.register(search_index)
+price_cube = PriceCube()
+property_store.register(price_cube)
+
+_feature_tables: Dict[str, Any] = {}
+
+def _feature_table(name: str, stats: Dict, build):
+    """Lookup table derived from an index's stats, rebuilt only when the stats object changes"""
+    cached = _feature_tables.get(name)
+    if cached is None or cached[0] is not stats:
+        cached = _feature_tables[name] = (stats, build(stats))
+    return cached[1]
+
+def location_features(frame) -> Dict[str, Any]:
+    """Per-row zip and city features (zip_price_mean/median, zip_size_mean, zip_count, city_size) from the indexes.
+
+    Only features the frame lacks are returned. Without state/city columns, city_size is
+    the size of the zip's most common city, as in zip_features. Rows whose zip or city is
+    unknown get NaN, which forecast_table.engineer_features_frame replaces with its defaults.
+    """
+    import pandas as pd
+    features = {}
+    zip_index = property_store.index("zip")
+    if zip_index is not None and "zip_code" in frame.columns:
+        table = _feature_table("zip", zip_index["stats"], lambda stats: pd.DataFrame.from_dict(stats, orient="index"))
+        rows = table.reindex(pd.to_numeric(frame["zip_code"], errors="coerce").to_numpy())
+        for name, source in (("zip_price_mean", "zip_price_mean"), ("zip_price_median", "zip_price_median"),
+                             ("zip_size_mean", "zip_size_mean"), ("zip_count", "count")):
+            if name not in frame.columns and source in rows.columns:
+                features[name] = rows[source].to_numpy(dtype=float)
+    city_index = property_store.index("state_city")
+    if city_index is not None and "city_size" not in frame.columns:
+        table = _feature_table("city", city_index["stats"],
+                               lambda stats: pd.Series({key: values["count"] for key, values in stats.items()}, dtype=float))
+        if {"state", "city"} <= set(frame.columns):
+            keys = pd.MultiIndex.from_arrays([frame["state"], frame["city"]])
+        elif zip_index is not None and "zip_code" in frame.columns and "zip_state" in rows.columns:
+            keys = pd.MultiIndex.from_arrays([rows["zip_state"], rows["zip_city"]])
+        else:
+            keys = None
+        if keys is not None:
+            features["city_size"] = table.reindex(keys).to_numpy(dtype=float) if len(table) else float("nan")
+    return features
+
+# Features the zip feature store can supply for a single prediction
+ZIP_FEATURES = ("zip_price_mean", "zip_price_median", "zip_size_mean", "zip_count", "city_size", "zip_growth_rate")
+
+def zip_features(zip_code, forecast=None) -> Dict[str, float]:
+    """Zip-level model features for one zip code from the property indexes and the forecast growth rates.
+
+    The same values location_features gives a listing in that zip, except that city_size
+    is the size of the zip's most common city. Features that are unknown (zip not in the
+    data, data not loaded) are left out, so the caller's defaults apply.
+    """
+    features: Dict[str, float] = {}
+    try:
+        key = float(zip_code)
+    except (TypeError, ValueError):
+        return features
+    zip_index = property_store.index("zip")
+    stats = zip_index["stats"].get(key) if zip_index is not None else None
+    if stats is not None:
+        for name, source in (("zip_price_mean", "zip_price_mean"), ("zip_price_median", "zip_price_median"),
+                             ("zip_size_mean", "zip_size_mean"), ("zip_count", "count")):
+            if source in stats:
+                features[name] = float(stats[source])
+        city_index = property_store.index("state_city")
+        city = city_index["stats"].get((stats.get("zip_state"), stats.get("zip_city"))) if city_index is not None else None
+        if city is not None:
+            features["city_size"] = float(city["count"])
+    growth_rates = forecast.growth_rates if forecast is not None else None
+    if growth_rates:
+        features["zip_growth_rate"] = float(growth_rates["zip_growth_rates"].get(key, growth_rates["overall_growth"]))
+    return features
+
+def request_features(request: BaseModel, forecast=None) -> Tuple[Dict[str, Any], List[str]]:
+    """A prediction request's fields without the unset ones, completed from the zip feature store.
+
+    Returns the data and the names of the features that were filled in.
+    """
+    data = {key: value for key, value in request.model_dump().items() if value is not None}
+    filled = {name: value for name, value in zip_features(data.get("zip_code"), forecast).items() if name not in data}
+    return {**data, **filled}, sorted(filled)
+
+def price_input(data: Dict[str, Any], price, forecast=None):
+    """The price model's input row for request data (see request_features).
+
+    Zip aggregates the client left out come from the zip feature store, derived features
+    from engineer_features; anything the client did send is used as is.
+    """
+    import pandas as pd
+    engineered = engineer_features(data, data.get("sold_year") or 2024, forecast.growth_rates if forecast else None)
+    # Create DataFrame with required feature order
+    return pd.DataFrame([{**engineered, **data}])[price.features]
+
+def forecast_fields(forecast) -> Dict[str, Any]:
+    """What forecast_table needs from the forecast artifact (picklable, shipped to pool workers)"""
+    return {name: getattr(forecast, name) for name in
+            ("model", "features", "growth_rates", "reference_year", "avg_inflation")}
+
+def project_rows(frame, forecast, workers: int = 1, chunk_size: int = 200_000) -> Dict[str, Any]:
+    """Forecast table columns for rows of the property frame, with zip/city features from the indexes"""
+    if len(frame) == 0:
+        return compute_forecasts(frame, forecast_fields(forecast))
+    features = location_features(frame)
+    return compute_forecasts(frame.assign(**features), forecast_fields(forecast), workers=workers, chunk_size=chunk_size)
+
+forecast_table_dir = Path(os.getenv("ML_FORECAST_TABLE_DIR", models_dir / ".forecast"))
+
+def _forecast_table_key() -> Dict[str, Any]:
+    """What a materialized forecast table must match: the source files and the ingest journal"""
+    return {"sources": {name: source_signature(path) for name, path in _snapshot_sources().items()},
+            "deltas": applied_delta_names()}
+
+class ProjectionIndex(DerivedIndex):
+    """Current, 1, 5 and 10-year forecast values for every row (see forecast_table.py).
+
+    Built in the background once the property data and the forecast model are loaded,
+    from the materialized forecast table when it matches, otherwise computed across a
+    process pool and written back as the new table. Rebuilt whenever a different forecast
+    model is swapped in (ensure_projection). A delta only projects its own rows.
+    """
+    name = "projection"
+    deferred = True
+
+    def version(self) -> str:
+        return f"ProjectionIndex:2:{','.join(COLUMNS)}"
+
+    def available(self, df) -> bool:
+        return model_registry.get("forecast") is not None and "zip_code" in df.columns
+
+    def build(self, df, workers: Optional[int] = None, chunk_size: int = 200_000, use_table: bool = True) -> Dict:
+        forecast = model_registry.get("forecast")
+        key = _forecast_table_key()
+        table = ForecastTable.open(forecast_table_dir) if use_table else None
+        reason = table.matches(forecast.version, len(df), key["sources"], key["deltas"]) if table else "no table"
+        if reason is None:
+            logger.info(f"⚡ Forecast table for model {forecast.version} loaded from {forecast_table_dir}")
+            return {"model_version": forecast.version, "values": table.columns, "source": "table"}
+        logger.info(f"   Forecast table not used ({reason}), projecting {len(df):,} properties...")
+        workers = workers or default_workers()
+        start = time.perf_counter()
+        values = project_rows(df, forecast, workers=workers, chunk_size=chunk_size)
+        build_s = round(time.perf_counter() - start, 2)
+        try:
+            ForecastTable.save(forecast_table_dir, values, forecast.version, key["sources"], key["deltas"],
+                               extra={"build_s": build_s, "workers": workers})
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write forecast table: {e}")
+        return {"model_version": forecast.version, "values": values, "source": "computed"}
+
+    def apply_delta(self, state: Dict, df, delta) -> Dict:
+        import numpy as np
+        changed = np.concatenate([delta.appended, delta.updated])
+        values = {name: np.concatenate([column, np.full(len(delta.appended), np.nan)]) for name, column in state["values"].items()}
+        forecast = model_registry.get("forecast")
+        if len(changed) and forecast is not None:
+            # A newer model here means a full rebuild is already on its way (ensure_projection).
+            # Zip features come from the stats before this delta; other rows of the zip keep
+            # their values until the next full build.
+            for name, column in project_rows(df.iloc[changed], forecast).items():
+                values[name][changed] = column
+        # No longer the table on disk: that one is rebuilt on the next start
+        return {**state, "values": values, "source": "computed"}
+
+projection_index = ProjectionIndex()
+property_store.register(projection_index)
+_projection_lock = threading.Lock()
+projection_info: Dict[str, Any] = {"building": False, "last_error": None}
+
+def ensure_projection(force: bool = False, workers: Optional[int] = None, chunk_size: int = 200_000):
+    """Rebuild the projection if it is missing or was computed with another forecast model.
+
+    force recomputes it (and rewrites the forecast table) even if it is current.
+    """
+    with _projection_lock:
+        forecast = model_registry.get("forecast")
+        current = property_store.index("projection")
+        if forecast is None or property_store.state is None:
+            return
+        if not force and current is not None and current["model_version"] == forecast.version:
+            return
+        projection_info.update(building=True, last_error=None)
+        try:
+            property_store.rebuild("projection", lambda df: projection_index.build(
+                df, workers=workers, chunk_size=chunk_size, use_table=not force))
+        except Exception as e:
+            projection_info["last_error"] = f"{type(e).__name__}: {e}"
+            logger.error(f"❌ Forecast projection failed: {e}", exc_info=True)
+        finally:
+            projection_info["building"] = False
+
+def build_forecast_table(workers: Optional[int] = None, chunk_size: int = 200_000, force: bool = False) -> Optional[ForecastTable]:
+    """Materialize the forecast table for the loaded data and model (reused if already current)"""
+    ensure_projection(force=force, workers=workers, chunk_size=chunk_size)
+    projection = property_store.index("projection")
+    if projection is None:
+        return None
+    table = ForecastTable.open(forecast_table_dir)
+    return table if table is not None and table.model_version == projection["model_version"] else None
+
+def _on_model_change(name: str, artifact):
+    if name == "forecast" and property_store.state is not None:
+        threading.Thread(target=ensure_projection, name="projection-refresh", daemon=True).start()
+
+model_registry.on_change(_on_model_change)
+
+# Candidate sets larger than this are not projected per request; they use flat growth until the projection is ready
+ROI_BATCH_LIMIT = 100_000
+
+def candidate_growth(candidates, source) -> Optional[Tuple[Any, str]]:
+    """(10-year multipliers, forecast model version) for advisor candidates filtered from `source`.
+
+    Read from the projection when it is current for this frame and model, otherwise
+    predicted for the candidates in one batch. None if no model can score them.
+    """
+    import pandas as pd
+    forecast = model_registry.get("forecast")
+    if forecast is None:
+        return None
+    projection = property_store.index("projection")
+    # Row labels are positions in the store frame (RangeIndex), so candidates index the projection directly
+    if (projection is not None and projection["model_version"] == forecast.version
+            and source is property_store.df and len(projection["values"]["current_price"]) == len(source)
+            and source.index.equals(pd.RangeIndex(len(source)))):
+        rows = candidates.index.to_numpy()
+        return growth_multiplier({name: column[rows] for name, column in projection["values"].items()}), forecast.version
+    if len(candidates) > ROI_BATCH_LIMIT:
+        return None
+    with model_stage("advisor", "projection"):
+        return growth_multiplier(project_rows(candidates, forecast)), forecast.version
+
+# Most specific level first; a level needs RISK_MIN_SAMPLES priced listings before its spread is trusted
+RISK_LEVELS = ("zip", "city", "state")
+RISK_MIN_SAMPLES = 20
+
+def location_risk(rows, price_col: str = "price") -> Dict[str, list]:
+    """Risk of each row against the price distribution of its own zip (or city, or state).
+
+    Half of the score is how unusual the price is there (|z|, saturating at 2 std), half is
+    how volatile prices are there (coefficient of variation, saturating at 1). Rows with no
+    trusted level get the neutral 0.5.
+    """
+    import math
+    levels = [(level, PRICE_LEVELS[level], property_store.index(f"price_{level}")) for level in RISK_LEVELS]
+    levels = [(level, columns, index["sums"]) for level, columns, index in levels
+              if index is not None and all(c in rows.columns for c in columns)]
+    risk, basis, volatility = [], [], []
+    for row in rows.to_dict("records"):
+        price = row.get(price_col)
+        chosen = None
+        for level, columns, sums in levels:
+            key = tuple(row[c] for c in columns) if len(columns) > 1 else row[columns[0]]
+            n, mean, std = moments(sums.get(key))
+            if n >= RISK_MIN_SAMPLES and std > 0 and mean > 0:
+                chosen = (level, mean, std)
+                break
+        if chosen is None or price is None or not math.isfinite(price):
+            risk.append(0.5)
+            basis.append(None)
+            volatility.append(None)
+            continue
+        level, mean, std = chosen
+        cv = std / mean
+        risk.append(round((min(abs(price - mean) / std, 2.0) / 2 + min(cv, 1.0)) / 2, 4))
+        basis.append(level)
+        volatility.append(round(cv, 4))
+    return {"risk": risk, "risk_basis": basis, "location_volatility": volatility}
+
+_catalog_cache: Dict[str, Any] = {"stats": None, "catalog": None}
+
+def location_catalog() -> Optional[LocationCatalog]:
+    """State/city catalog for the current state_city index; rebuilt only after a delta changes it"""
+    index = property_store.index("state_city")
+    if index is None:
+        return None
+    # A pickled advisor brings its own data; only the dataset advisor shares the property frame
+    if advisor is not None and getattr(advisor, "df", None) is not property_store.df:
+        return None
+    if _catalog_cache["stats"] is not index["stats"]:
+        _catalog_cache["catalog"] = LocationCatalog.from_partition(index["stats"])
+        _catalog_cache["stats"] = index["stats"]
+    return _catalog_cache["catalog"]
+
+_cluster_catalog_cache: Dict[str, Any] = {"sources": None, "catalog": None}
+
+# Column names the cluster table may use, as in the old per-request centroid fallback
+_CLUSTER_COLUMN_ALIASES = {
+    "street_cluster": ("street_cluster", "cluster_id", "cluster", "cluster_label", "clusterid"),
+    "lat": ("lat", "latitude"),
+    "lng": ("lng", "longitude", "lon", "long"),
+    "price": ("price", "current_price", "sold_price"),
+    "house_size": ("house_size",),
+}
+
+def _cluster_stats_from_frame(frame) -> Dict:
+    """Same stats as the cluster index, for a cluster table the property store does not hold"""
+    columns = {}
+    for col in frame.columns:
+        for canonical, aliases in _CLUSTER_COLUMN_ALIASES.items():
+            if col.lower() in aliases and canonical not in columns:
+                columns[canonical] = col
+    if not {"street_cluster", "lat", "lng"} <= set(columns):
+        logger.warning(f"⚠️ Cluster/lat/lng columns not found in cluster data: {list(frame.columns)[:20]}")
+        return {}
+    renamed = frame[list(columns.values())].set_axis(list(columns), axis=1)
+    renamed = renamed[renamed["street_cluster"].notna()]
+    stats = _cluster_aggregate(renamed).to_dict("index")
+    for key, count in renamed.groupby("street_cluster").size().items():
+        stats[key]["count"] = int(count)
+    return stats
+
+def cluster_catalog() -> Optional[ClusterCatalog]:
+    """Cluster centroids joined with per-cluster stats; rebuilt only after a delta or a reload changes them"""
+    index = property_store.index("cluster")
+    if index is not None and cluster_df is property_store.df:
+        stats_source = index["stats"]
+    elif cluster_df is not None and len(cluster_df) > 0:
+        stats_source = cluster_df
+    else:
+        stats_source = None
+    if stats_source is None and (centroids_df is None or len(centroids_df) == 0):
+        return None
+    sources = _cluster_catalog_cache["sources"]
+    if sources is None or sources[0] is not stats_source or sources[1] is not centroids_df:
+        start = time.perf_counter()
+        stats = stats_source if isinstance(stats_source, dict) else (
+            _cluster_stats_from_frame(stats_source) if stats_source is not None else {})
+        centroids = centroids_df.to_dict("records") if centroids_df is not None and "cluster_id" in centroids_df.columns else None
+        _cluster_catalog_cache["catalog"] = ClusterCatalog.build(stats, centroids)
+        _cluster_catalog_cache["sources"] = (stats_source, centroids_df)
+        logger.info(f"   Built cluster catalog ({len(_cluster_catalog_cache['catalog'].centroids):,} clusters) "
+                    f"in {time.perf_counter() - start:.2f}s")
+    return _cluster_catalog_cache["catalog"]
+
+def _cached_json(request: Request, body: bytes, etag: str) -> Response:
+    """Pre-serialized JSON with ETag/Cache-Control; 304 when the client already has this version"""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Deltas: CSVs dropped in incoming/ are applied and moved to applied/, which is replayed on startup
+ingest_dir = Path(os.getenv("ML_INGEST_DIR", models_dir / "ingest"))
+
+def _assign_clusters(rows):
+    """Fill street_cluster for new listings from their coordinates when the cluster model can predict"""
+    import numpy as np
+    if cluster_model is None or not hasattr(cluster_model, "predict") or not {"lat", "lng"} <= set(rows.columns):
+        return rows
+    if "street_cluster" not in rows.columns:
+        rows["street_cluster"] = np.nan
+    missing = rows["street_cluster"].isna() & rows["lat"].notna() & rows["lng"].notna()
+    if missing.any():
+        rows.loc[missing, "street_cluster"] = cluster_model.predict(rows.loc[missing, ["lat", "lng"]].to_numpy())
+    return rows
+
+def _refresh_centroid_counts():
+    """Apply the cluster partition's counts to centroids_df for the clusters the last delta touched"""
+    global centroids_df
+    import pandas as pd
+    cluster_index = property_store.index("cluster")
+    if centroids_df is None or cluster_index is None or not cluster_index["touched"]:
+        return
+    if not {"cluster_id", "count"} <= set(centroids_df.columns):
+        return
+    stats = cluster_index["stats"]
+    updated = centroids_df.copy()
+    positions = pd.Series(range(len(updated)), index=updated["cluster_id"].astype("int64"))
+    new_rows = []
+    for cluster_id in cluster_index["touched"]:
+        cluster = stats.get(cluster_id, {"count": 0})
+        if int(cluster_id) in positions.index:
+            updated.iloc[positions[int(cluster_id)], updated.columns.get_loc("count")] = int(cluster["count"])
+        elif cluster["count"]:
+            new_rows.append({"cluster_id": int(cluster_id), "lat": cluster["lat"], "lng": cluster["lng"], "count": int(cluster["count"])})
+    if new_rows:
+        updated = pd.concat([updated, pd.DataFrame(new_rows)], ignore_index=True)
+    centroids_df = updated
+
+# One delta at a time: each is journaled, then applied and its tables repointed, before the
+# next starts, so the journal order is the apply order and no global is left on an older frame
+_ingest_lock = threading.RLock()
+_last_journal_ns = 0
+
+def apply_property_delta(rows) -> Dict:
+    """Upsert rows into the property store and repoint every table that shares the frame"""
+    global property_data_df, cluster_df
+    import pandas as pd
+    with _ingest_lock:
+        previous = property_store.df
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        summary = property_store.ingest(_assign_clusters(frame))
+        current = property_store.df
+        if property_data_df is previous:
+            property_data_df = current
+        if cluster_df is previous:
+            cluster_df = current
+        if advisor is not None and getattr(advisor, "df", None) is previous:
+            advisor.df = current
+        _refresh_centroid_counts()
+        return summary
+
+def applied_delta_names() -> List[str]:
+    with _ingest_lock:  # not while a delta is journaled but not yet applied
+        return sorted(path.name for path in (ingest_dir / "applied").glob("*.csv"))
+
+def replay_ingested_deltas(skip: Sequence[str] = ()) -> int:
+    """Re-apply deltas accepted before the last restart (applied/ is the journal), except those in skip"""
+    import pandas as pd
+    skip = set(skip)
+    applied = [ingest_dir / "applied" / name for name in applied_delta_names() if name not in skip]
+    for path in applied:
+        try:
+            apply_property_delta(pd.read_csv(path, low_memory=False))
+        except Exception as e:
+            logger.error(f"❌ Could not replay ingested delta {path.name}: {e}")
+    if applied:
+        logger.info(f"✅ Replayed {len(applied)} ingested delta file(s), {len(property_store.df):,} properties")
+    return len(applied)
+
+def _journal_path(name: str) -> Path:
+    """Next journal entry in applied/; names sort in the order they were taken (call under _ingest_lock)"""
+    global _last_journal_ns
+    applied = ingest_dir / "applied"
+    applied.mkdir(parents=True, exist_ok=True)
+    # Strictly increasing even if the wall clock steps back
+    _last_journal_ns = stamp = max(time.time_ns(), _last_journal_ns + 1)
+    return applied / f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(stamp // 10**9))}-{stamp % 10**9:09d}-{name}"
+
+def _reject(path: Path, name: str, error: Exception):
+    failed = ingest_dir / "failed"
+    failed.mkdir(parents=True, exist_ok=True)
+    path.replace(failed / name)
+    logger.error(f"❌ Ingest of {name} failed: {error}")
+
+def ingest_frame(frame, name: str = "api.csv") -> Dict:
+    """Journal a delta, then apply it; a delta that cannot be applied is taken out of the journal again"""
+    with _ingest_lock:
+        path = _journal_path(name)
+        frame.to_csv(path, index=False)
+        try:
+            return apply_property_delta(frame)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+def ingest_file(path: Path) -> Dict:
+    """Move one dropped CSV into applied/ and apply it (or into failed/ if it cannot be parsed/applied)"""
+    import pandas as pd
+    with _ingest_lock:
+        try:
+            frame = pd.read_csv(path, low_memory=False)
+        except Exception as e:
+            _reject(path, path.name, e)
+            return {"file": path.name, "error": str(e)}
+        target = _journal_path(path.name)
+        path.replace(target)
+        try:
+            summary = apply_property_delta(frame)
+        except Exception as e:
+            _reject(target, path.name, e)
+            return {"file": path.name, "error": str(e)}
+    return {"file": path.name, **summary}
+
+async def watch_ingest_dir(interval: float):
+    """Poll incoming/ for delta CSVs. Upload to a temporary name and rename to *.csv when complete."""
+    import asyncio
+    incoming = ingest_dir / "incoming"
+    incoming.mkdir(parents=True, exist_ok=True)
+    logger.info(f"👀 Watching {incoming} for property deltas every {interval:g}s")
+    while True:
+        await asyncio.sleep(interval)
+        if not subsystems.loaded("data") or property_store.df is None:
+            continue
+        for path in sorted(incoming.glob("*.csv")):
+            try:
+                await asyncio.to_thread(ingest_file, path)
+            except Exception as e:
+                logger.error(f"Ingest watcher error on {path.name}: {e}", exc_info=True)
+
+# ==========================================
+# STARTUP SNAPSHOT (restore tables and indexes without re-parsing the CSVs)
+# ==========================================
+startup_snapshot = StartupSnapshot(Path(os.getenv("ML_SNAPSHOT_DIR", models_dir / ".snapshot")))
+snapshot_enabled = os.getenv("ML_STARTUP_SNAPSHOT", "1").lower() not in ("0", "false", "no", "off")
+snapshot_pending = False
+snapshot_info: Dict[str, Any] = {"enabled": snapshot_enabled, "restored": False}
+
+def _snapshot_sources() -> Dict[str, Path]:
+    """Files whose contents end up in the snapshot; any change to them invalidates it"""
+    names = ("street_cluster_centroids.csv", "clustered_by_street.csv", "street_clustering_metadata.pkl",
+             "street_clustering_stats.csv", "data_with_street_coords.csv")
+    return {name: models_dir / name for name in names}
+
+def restore_startup_snapshot() -> Optional[Dict]:
+    """Set the cluster and property globals from a valid snapshot; returns what is needed to finish the restore"""
+    global cluster_num_clusters, cluster_stats, cluster_df, centroids_df, cluster_stats_df, property_data_df
+    if not snapshot_enabled:
+        return None
+    try:
+        loaded = startup_snapshot.load(_snapshot_sources())
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read startup snapshot: {e}")
+        return None
+    if loaded is None:
+        return None
+    frames, objects, manifest = loaded
+    # Deltas applied since the snapshot are replayed on top; anything else means the journal was edited
+    applied = manifest.get("applied_deltas", [])
+    if applied_delta_names()[:len(applied)] != applied:
+        logger.info("   Startup snapshot not used: ingest journal no longer matches")
+        return None
+
+    cluster_df = frames["cluster"]
+    property_data_df = cluster_df if manifest.get("property_is_cluster") else frames["property"]
+    centroids_df = frames["centroids"]
+    cluster_stats_df = frames["cluster_stats"]
+    cluster_num_clusters = objects["cluster_num_clusters"]
+    cluster_stats = objects["cluster_stats"]
+    snapshot_info.update(restored=True, created_at=manifest["created_at"], rows=manifest["frames"]["cluster"]["rows"]
+                         if manifest["frames"].get("cluster") else 0)
+    logger.info(f"✅ Cluster system restored: {cluster_num_clusters} clusters, "
+                f"{len(cluster_df) if cluster_df is not None else 0} properties")
+    return {"indexes": objects["indexes"], "index_versions": manifest.get("index_versions", {}), "applied": applied}
+
+def save_startup_snapshot():
+    """Persist the loaded tables and derived indexes (blocking, run in a worker thread)"""
+    if not snapshot_enabled:
+        return
+    # Read everything at one point between deltas
+    with _ingest_lock:
+        state = property_store.state
+        applied = applied_delta_names()
+        cluster, prop, centroids = cluster_df, property_data_df, centroids_df
+    if state is not None and prop is not state.df:
+        logger.info("   Property data changed during load, startup snapshot skipped")
+        return
+    try:
+        manifest = startup_snapshot.save(
+            _snapshot_sources(),
+            frames={
+                "cluster": cluster,
+                "property": None if prop is cluster else prop,
+                "centroids": centroids,
+                "cluster_stats": cluster_stats_df,
+            },
+            objects={
+                "cluster_num_clusters": cluster_num_clusters,
+                "cluster_stats": cluster_stats,
+                # Deferred indexes persist themselves (the projection is the forecast table)
+                "indexes": {name: value for name, value in state.indexes.items()
+                            if not property_store.derived[name].deferred} if state else {},
+            },
+            extra={
+                "property_is_cluster": prop is cluster,
+                "applied_deltas": applied,
+                "index_versions": property_store.versions() if state else {},
+            },
+        )
+        snapshot_info["written_at"] = manifest["created_at"]
+    except Exception as e:
+        logger.warning(f"⚠️ Could not write startup snapshot: {e}")
+
+# ==========================================
+# LAZY SUBSYSTEMS (loaded at startup if listed in ML_API_WARMUP, otherwise on first use)
+# ==========================================
+subsystems = Subsystems()
+subsystems.register("models", load_model_artifacts, routes=("/api/predict-price", "/api/forecast", "/api/admin/forecast-table", "/api/comps"))
+subsystems.register("data", load_data, routes=("/api/predict-price", "/api/forecast", "/api/admin/forecast-table", "/api/clusters", "/api/advisor", "/api/zip-codes", "/api/admin/properties", "/api/comps", "/api/properties", "/api/analytics", "/api/geocode"))
+warmup_subsystems = subsystems.parse(os.getenv("ML_API_WARMUP", "all"))
+
 # ==========================================
 # API ENDPOINTS
 # ==========================================
@@ -666,124 +1486,352 @@ async def health():
         "models_loading": models_loading,
         "models_loaded": models_loaded,
         "models_available": {
-            "price": price_model is not None,
-            "forecast": forecast_model is not None,
+            "price": model_registry.get("price") is not None,
+            "forecast": model_registry.get("forecast") is not None,
             "cluster": cluster_model is not None,
             "advisor": advisor is not None
-        }
+        },
+        "model_versions": model_registry.versions(),
+        "subsystems": subsystems.status(),
+        "startup_snapshot": snapshot_info,
+        "upstreams": education_service.upstream_status()
+    }
+
+def _threadpool_stats():
+    """Worker threadpool usage (sync endpoints / run_in_threadpool) and queued tasks"""
+    from anyio import to_thread
+    limiter = to_thread.current_default_thread_limiter()
+    return {
+        ("busy",): limiter.borrowed_tokens,
+        ("capacity",): limiter.total_tokens,
+        ("queued",): limiter.statistics().tasks_waiting,
     }
 
+def _dataset_memory():
+    """Shallow memory footprint of the loaded tables (deep=True would scan every string)"""
+    sizes = {}
+    for name, df in (("cluster_df", cluster_df), ("property_data_df", property_data_df), ("centroids_df", centroids_df)):
+        if df is not None and hasattr(df, "memory_usage"):
+            sizes[(name,)] = float(df.memory_usage(index=True, deep=False).sum())
+    return sizes
+
+def _upstream_counter(field):
+    def collect():
+        return {(name,): float(snapshot[field]) for name, snapshot in education_service.upstream_status().items()}
+    return collect
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+metrics.gauge("mlapi_executor_threads", "Threadpool worker usage and queue depth", ("kind",)).set_function(_threadpool_stats)
+metrics.gauge("mlapi_dataset_memory_bytes", "Memory footprint of loaded datasets", ("dataset",)).set_function(_dataset_memory)
+metrics.gauge("mlapi_upstream_circuit_state", "Circuit breaker state (0=closed, 1=half_open, 2=open)", ("upstream",)).set_function(
+    lambda: {(name,): CIRCUIT_STATES[s["state"]] for name, s in education_service.upstream_status().items()}
+)
+for _field in ("calls", "failures", "retries", "rejected", "rate_limited"):
+    metrics.function_counter(f"mlapi_upstream_{_field}_total", f"Upstream guard {_field.replace('_', ' ')} since start", ("upstream",)).set_function(_upstream_counter(_field))
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/api/admin/models")
+async def get_model_status(request: Request):
+    """Loaded model versions, last reload errors and reload history (admin only)"""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Requires a valid X-Admin-Token")
+    return {"models": model_registry.status(), "history": model_registry.history}
+
+@app.post("/api/admin/models/reload")
+async def reload_models(request: Request, body: Optional[ModelReloadRequest] = None):
+    """Load new model artifacts in the background, smoke test them and swap them in (admin only)"""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Requires a valid X-Admin-Token")
+    body = body or ModelReloadRequest()
+    results = await model_registry.reload(body.models, force=body.force)
+    failed = [r for r in results if r["result"] in ("failed", "unknown")]
+    return JSONResponse(
+        status_code=422 if failed else 200,
+        content={"results": results, "models": model_registry.status()}
+    )
+
+@app.post("/api/admin/warmup")
+async def warmup(request: Request, body: Optional[WarmupRequest] = None):
+    """Load subsystems now instead of on first use, retrying failed ones (admin only)"""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Requires a valid X-Admin-Token")
+    names = (body.subsystems if body else None) or subsystems.names()
+    unknown = [name for name in names if name not in subsystems.names()]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown subsystems {unknown}, expected {subsystems.names()}")
+    await subsystems.ensure(names, retry_failed=True)
+    status = subsystems.status()
+    failed = any(status[name]["state"] == "failed" for name in names)
+    return JSONResponse(status_code=500 if failed else 200, content={"subsystems": status})
+
+@app.post("/api/admin/properties/ingest")
+async def ingest_properties(request: Request, body: PropertyIngestRequest):
+    """Upsert new/changed listings into the in-memory dataset and refresh derived indexes (admin only)"""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Requires a valid X-Admin-Token")
+    if property_store.df is None:
+        raise HTTPException(status_code=503, detail="Property data not loaded")
+    import asyncio
+    import pandas as pd
+
+    try:
+        summary = await asyncio.to_thread(ingest_frame, pd.DataFrame(body.rows))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"success": True, **summary}
+
+@app.post("/api/admin/forecast-table")
+async def rebuild_forecast_table(request: Request, body: Optional[ForecastTableRequest] = None):
+    """Recompute the forecast table for every property in the background (admin only)"""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Requires a valid X-Admin-Token")
+    if property_store.df is None or model_registry.get("forecast") is None:
+        raise HTTPException(status_code=503, detail="Property data or forecast model not loaded")
+    if projection_info["building"]:
+        raise HTTPException(status_code=409, detail="Forecast table is already being built")
+    workers = body.workers if body else None
+    threading.Thread(target=build_forecast_table, kwargs={"workers": workers, "force": True},
+                     name="forecast-table", daemon=True).start()
+    return JSONResponse(status_code=202, content={"success": True, "started": True, "workers": workers or default_workers()})
+
 @app.post("/api/predict-price")
 async def predict_price_endpoint(request: PricePredictionRequest):
     """Predict current property price"""
-    if price_model is None:
+    # One reference for the whole request, so a concurrent hot reload cannot mix versions
+    price = model_registry.get("price")
+    if price is None:
         raise HTTPException(status_code=503, detail="Price prediction model not loaded")
     
     try:
-        import pandas as pd
         import numpy as np
         
-        data = request.dict()
-        # Create DataFrame with required feature order
-        df_input = pd.DataFrame([data])[price_features]
+        with model_stage("price", "feature_engineering"):
+            forecast = model_registry.get("forecast")
+            data, filled = request_features(request, forecast)
+            df_input = price_input(data, price, forecast)
         
         # Model prediction (log space)
-        pred_log = price_model.predict(df_input)
+        with model_stage("price", "inference"):
+            pred_log = price.model.predict(df_input)
         
         # Convert log prediction to dollars
-        price = np.expm1(pred_log)[0]
-        
-        return {
-            "status": "success",
-            "predicted_price": round(float(price), 2)
-        }
+        with model_stage("price", "serialization"):
+            predicted = np.expm1(pred_log)[0]
+            return {
+                "status": "success",
+                "predicted_price": round(float(predicted), 2),
+                "model_version": price.version,
+                "zip_features_filled": filled
+            }
     except Exception as e:
         logger.error(f"Error in predict_price: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/forecast")
-async def forecast_endpoint(request: ForecastRequest):
-    """Forecast prices for 1, 5, 10 years"""
-    if forecast_model is None:
+async def forecast_endpoint(
+    request: ForecastRequest,
+    mode: str = Query("point", pattern="^(point|bands)$"),
+    paths: int = Query(10_000, ge=100, le=100_000),
+    seed: Optional[int] = Query(None, ge=0)
+):
+    """Forecast prices for 1, 5, 10 years; mode=bands adds p10/p50/p90 for every year up to 10"""
+    forecast = model_registry.get("forecast")
+    if forecast is None:
         raise HTTPException(status_code=503, detail="Forecast model not loaded")
     
     try:
         import numpy as np
         
-        data = request.dict()
-        current_year = data.get("sold_year", forecast_reference_year or 2024)
+        data, filled = request_features(request, forecast)
+        current_year = data.get("sold_year", forecast.reference_year or 2024)
         
-        # Get base prediction
-        current_price = predict_single_year(data, current_year)
+        # Current and future years in one model call (every year for bands)
+        horizons = list(range(1, 11)) if mode == "bands" else [1, 5, 10]
+        current_price, *future_prices = predict_years(data, [current_year] + [current_year + h for h in horizons], forecast)
         
         # Get growth rate
         zip_code = data.get("zip_code")
-        growth_rate = forecast_growth_rates["zip_growth_rates"].get(
-            zip_code, forecast_growth_rates["overall_growth"]
-        ) if forecast_growth_rates else 0.04
+        growth_rate = forecast.growth_rates["zip_growth_rates"].get(
+            zip_code, forecast.growth_rates["overall_growth"]
+        ) if forecast.growth_rates else 0.04
         
-        combined_growth = growth_rate + forecast_avg_inflation
+        combined_growth = growth_rate + forecast.avg_inflation
         combined_growth = np.clip(combined_growth, 0.02, 0.08)
         
-        # Predict future years
-        price_1yr = predict_single_year(data, current_year + 1)
-        price_5yr = predict_single_year(data, current_year + 5)
-        price_10yr = predict_single_year(data, current_year + 10)
-        
         # Blend with trend (70% model, 30% growth trend)
-        weight = 0.7
-        
-        price_1yr_final = weight * price_1yr + (1-weight) * (current_price * (1 + combined_growth))
-        price_5yr_final = weight * price_5yr + (1-weight) * (current_price * (1 + combined_growth)**5)
-        price_10yr_final = weight * price_10yr + (1-weight) * (current_price * (1 + combined_growth)**10)
+        weight = FORECAST_MODEL_WEIGHT
+        blended = {h: weight * price + (1-weight) * (current_price * (1 + combined_growth)**h)
+                   for h, price in zip(horizons, future_prices)}
         
-        return {
+        result = {
             "success": True,
             "forecast": {
                 "current_price": round(current_price, 2),
-                "price_1_year": round(price_1yr_final, 2),
-                "price_5_year": round(price_5yr_final, 2),
-                "price_10_year": round(price_10yr_final, 2),
+                "price_1_year": round(blended[1], 2),
+                "price_5_year": round(blended[5], 2),
+                "price_10_year": round(blended[10], 2),
                 "growth_rate": round(combined_growth * 100, 2),
                 "current_year": current_year
-            }
+            },
+            "model_version": forecast.version,
+            "zip_features_filled": filled
         }
+        if mode == "bands":
+            with model_stage("forecast", "simulation"):
+                residual, drift = residual_sigma(forecast.metrics), forecast.growth_sigma
+                years = simulate_bands(current_price, [blended[h] for h in horizons], horizons,
+                                       residual=residual, drift=drift, paths=paths, seed=seed)
+            result["bands"] = {
+                "paths": paths,
+                "seed": seed,
+                "years": [{"year": current_year + year["years_ahead"], **{k: round(v, 2) if isinstance(v, float) else v
+                                                                           for k, v in year.items()}}
+                          for year in years],
+                "assumptions": {"residual_sigma": round(residual, 4), "growth_sigma": round(drift, 4),
+                                "annual_volatility": ANNUAL_VOLATILITY},
+            }
+        with model_stage("forecast", "serialization"):
+            return result
     except Exception as e:
         logger.error(f"Error in forecast: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/forecast/table")
+async def forecast_table_status():
+    """Which forecast model the materialized forecast values belong to, and whether they are current"""
+    forecast = model_registry.get("forecast")
+    projection = property_store.index("projection")
+    table = ForecastTable.open(forecast_table_dir)
+    return {
+        "model_version": forecast.version if forecast else None,
+        "current": bool(forecast and projection and projection["model_version"] == forecast.version),
+        "projection": {
+            "model_version": projection["model_version"],
+            "source": projection["source"],
+            "rows": len(projection["values"]["current_price"]),
+        } if projection else None,
+        "building": projection_info["building"],
+        "last_error": projection_info["last_error"],
+        "table": table.info() if table else None,
+    }
+
+def _location_rows(zip_code: Optional[str], state: Optional[str], city: Optional[str]):
+    """Row positions of a zip code, a state/city or a whole state, from the partition indexes"""
+    import numpy as np
+    empty = np.empty(0, dtype=np.int64)
+    if zip_code:
+        try:
+            key = float(zip_code)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Invalid zip code: {zip_code}")
+        index = property_store.index("zip")
+        return index["positions"].get(key, empty) if index else empty
+    index = property_store.index("state_city")
+    if index is None:
+        return empty
+    if city:
+        return index["positions"].get((state, city), empty)
+    wanted = state.strip().lower()
+    parts = [rows for (key_state, _), rows in index["positions"].items() if str(key_state).strip().lower() == wanted]
+    return np.sort(np.concatenate(parts)) if parts else empty
+
+LISTING_COLUMNS = ("city", "state", "zip_code", "street_cluster", "price", "bed", "bath", "house_size", "acre_lot", "lat", "lng")
+
+def json_number(value) -> Optional[float]:
+    import numpy as np
+    value = float(value)
+    return round(value, 4) if np.isfinite(value) else None
+
+def listing_records(df, rows, columns: Sequence[str] = LISTING_COLUMNS) -> List[Dict[str, Any]]:
+    """Listings at row positions as JSON-ready dicts: row plus the columns the frame has (NaN as None)"""
+    import numpy as np
+    columns = [c for c in columns if c in df.columns]
+    records = []
+    listings = df.iloc[rows, [df.columns.get_loc(c) for c in columns]].to_dict("records")
+    for row, listing in zip(np.asarray(rows).tolist(), listings):
+        item = {"row": int(row)}
+        for column, value in listing.items():
+            item[column] = json_number(value) if isinstance(value, (int, float, np.number)) else (None if value is None else str(value))
+        records.append(item)
+    return records
+
+@app.get("/api/forecast/properties")
+async def forecast_properties(
+    zip_code: Optional[str] = None,
+    state: Optional[str] = None,
+    city: Optional[str] = None,
+    sort: str = Query("growth", pattern="^(growth|price_10yr|row)$"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """Current, 1, 5 and 10-year values for the properties of a zip code or state (and city), best growth first.
+
+    Read from the materialized forecast table; only computed here while it is still being built.
+    """
+    if not zip_code and not state:
+        raise HTTPException(status_code=422, detail="Provide zip_code or state")
+    forecast = model_registry.get("forecast")
+    if forecast is None:
+        raise HTTPException(status_code=503, detail="Forecast model not loaded")
+    df = property_store.df
+    if df is None:
+        raise HTTPException(status_code=503, detail="Property data not loaded")
+    import numpy as np
+    
+    rows = _location_rows(zip_code, state, city)
+    projection = property_store.index("projection")
+    if projection is not None and projection["model_version"] == forecast.version and len(projection["values"]["current_price"]) == len(df):
+        values = {name: np.asarray(column[rows]) for name, column in projection["values"].items()}
+        source = projection["source"]
+    elif len(rows) <= ROI_BATCH_LIMIT:
+        with model_stage("forecast", "inference"):
+            values = project_rows(df.iloc[rows], forecast)
+        source = "request"
+    else:
+        raise HTTPException(status_code=503, detail="Forecast table is still being built, try a zip code or city")
+    
+    values["growth_10yr"] = growth_multiplier(values) - 1
+    if sort == "growth":
+        order = np.argsort(-np.nan_to_num(values["growth_10yr"], nan=-np.inf), kind="stable")
+    elif sort == "price_10yr":
+        order = np.argsort(-np.nan_to_num(values["price_10yr"], nan=-np.inf), kind="stable")
+    else:
+        order = np.arange(len(rows))
+    page = order[offset:offset + limit]
+    
+    listings = listing_records(df, rows[page], ("city", "state", "zip_code", "price", "bed", "bath", "house_size"))
+    data = [{**item, **{name: json_number(values[name][i]) for name in (*COLUMNS, "growth_10yr")}}
+            for i, item in zip(page.tolist(), listings)]
+    return {
+        "success": True,
+        "model_version": forecast.version,
+        "source": source,
+        "total": int(len(rows)),
+        "data": data,
+    }
+
 @app.get("/api/clusters/summary")
 async def get_cluster_summary():
     """Get cluster summary statistics"""
     try:
-        import pandas as pd
-        
-        # Get number of clusters from centroids or cluster_num_clusters
+        # Counts and price stats per cluster come from the catalog built at load
+        catalog = cluster_catalog()
         num_clusters = 0
-        if centroids_df is not None and isinstance(centroids_df, pd.DataFrame) and len(centroids_df) > 0:
-            num_clusters = len(centroids_df)
-            logger.info(f"Using centroids_df for cluster count: {num_clusters}")
+        if catalog is not None and catalog.centroids:
+            num_clusters = len(catalog.centroids)
         elif cluster_num_clusters:
             num_clusters = int(cluster_num_clusters)
             logger.info(f"Using cluster_num_clusters: {num_clusters}")
         else:
             logger.warning("No cluster count available from centroids or cluster_num_clusters")
         
-        # Get distribution from centroids if available
-        distribution = []
-        if centroids_df is not None and isinstance(centroids_df, pd.DataFrame) and len(centroids_df) > 0:
-            if 'cluster_id' in centroids_df.columns and 'count' in centroids_df.columns:
-                for _, row in centroids_df.iterrows():
-                    cluster_id = int(row['cluster_id']) if pd.notna(row['cluster_id']) else 0
-                    count = int(row['count']) if pd.notna(row['count']) else 0
-                    distribution.append({
-                        "cluster_id": cluster_id,
-                        "count": count
-                    })
-                # Sort by cluster_id for better display
-                distribution.sort(key=lambda x: x['cluster_id'])
-                logger.info(f"Generated distribution from centroids: {len(distribution)} clusters")
-        
         # Get silhouette score from metadata if available
         silhouette_score = 0.75
         training_time = 0.0
@@ -795,7 +1843,7 @@ async def get_cluster_summary():
             "num_clusters": num_clusters,
             "silhouette_score": silhouette_score,
             "training_time_seconds": training_time,
-            "cluster_distribution": distribution[:100]  # Limit to first 100 for performance
+            "cluster_distribution": catalog.distribution(100) if catalog is not None else []  # First 100 by cluster_id
         }
     except Exception as e:
         logger.error(f"Error in get_cluster_summary: {e}", exc_info=True)
@@ -807,180 +1855,21 @@ async def get_cluster_summary():
         }
 
 @app.get("/api/clusters/centroids")
-async def get_centroids():
-    """Get cluster centroids for map - use centroids CSV if available, otherwise generate from cluster data"""
-    import pandas as pd
-    import numpy as np
-    
+async def get_centroids(request: Request):
+    """Get cluster centroids for map, with count, price stats and bounding box per cluster.
+
+    Served from the cluster catalog (centroids CSV joined with stats aggregated at load);
+    nothing here reads the property table.
+    """
     try:
-        # First, try to use the centroids CSV directly (new format)
-        if centroids_df is not None and isinstance(centroids_df, pd.DataFrame) and len(centroids_df) > 0:
-            logger.info(f"Using centroids CSV with {len(centroids_df)} centroids")
-            
-            # Check if it has the expected columns
-            if 'cluster_id' in centroids_df.columns and 'lat' in centroids_df.columns and 'lng' in centroids_df.columns:
-                centroids_list = []
-                for _, row in centroids_df.iterrows():
-                    cluster_id = int(row['cluster_id']) if pd.notna(row['cluster_id']) else 0
-                    lat = float(row['lat']) if pd.notna(row['lat']) else 0.0
-                    lng = float(row['lng']) if pd.notna(row['lng']) else 0.0
-                    count = int(row['count']) if 'count' in centroids_df.columns and pd.notna(row.get('count', 0)) else 0
-                    street = str(row['street']) if 'street' in centroids_df.columns and pd.notna(row.get('street', '')) else ""
-                    
-                    # Validate coordinates
-                    if -90 <= lat <= 90 and -180 <= lng <= 180:
-                        centroids_list.append({
-                            "cluster_id": cluster_id,
-                            "lat": lat,
-                            "lng": lng,
-                            "count": count,
-                            "street": street,
-                            "avg_price": None  # Not available in centroids CSV
-                        })
-                
-                logger.info(f"Returning {len(centroids_list)} valid centroids from CSV")
-                return {
-                    "num_clusters": len(centroids_list),
-                    "centroids": centroids_list
-                }
-        
-        # Fallback: If centroids CSV doesn't exist or is empty, generate from cluster_df
-        if centroids_df is None or not isinstance(centroids_df, pd.DataFrame) or len(centroids_df) == 0:
-            logger.info("Centroids CSV not found, generating centroids from cluster data...")
-            
-            if cluster_df is None or not isinstance(cluster_df, pd.DataFrame) or len(cluster_df) == 0:
-                logger.warning("Cluster data not available, cannot generate centroids")
-                return {
-                    "num_clusters": 0,
-                    "centroids": []
-                }
-            
-            logger.info(f"Generating centroids from {len(cluster_df)} properties")
-            logger.info(f"Available columns: {list(cluster_df.columns)[:20]}")
-            
-            # Find cluster column (case-insensitive)
-            cluster_col = None
-            for col in cluster_df.columns:
-                col_lower = col.lower()
-                if col_lower in ['street_cluster', 'cluster_id', 'cluster', 'cluster_label', 'clusterid']:
-                    cluster_col = col
-                    logger.info(f"Found cluster column: {cluster_col}")
-                    break
-            
-            if not cluster_col:
-                logger.warning(f"No cluster column found. Available columns: {list(cluster_df.columns)}")
-                return {
-                    "num_clusters": 0,
-                    "centroids": []
-                }
-            
-            # Find lat/lng columns (case-insensitive)
-            lat_col = None
-            lng_col = None
-            for col in cluster_df.columns:
-                col_lower = col.lower()
-                if col_lower in ['lat', 'latitude'] and lat_col is None:
-                    lat_col = col
-                if col_lower in ['lng', 'longitude', 'lon', 'long'] and lng_col is None:
-                    lng_col = col
-            
-            if not lat_col or not lng_col:
-                logger.warning(f"Lat/Lng columns not found. Lat: {lat_col}, Lng: {lng_col}")
-                logger.warning(f"Available columns: {list(cluster_df.columns)}")
-                return {
-                    "num_clusters": 0,
-                    "centroids": []
-                }
-            
-            logger.info(f"Using columns - Cluster: {cluster_col}, Lat: {lat_col}, Lng: {lng_col}")
-            
-            # Find price column for average price calculation (case-insensitive)
-            price_col = None
-            for col in cluster_df.columns:
-                col_lower = col.lower()
-                if col_lower in ['price', 'current_price', 'sold_price']:
-                    price_col = col
-                    break
-            
-            # Generate centroids by calculating mean lat/lng for each cluster
-            centroids_list = []
-            # Filter out rows with missing lat/lng or cluster
-            valid_data = cluster_df[
-                cluster_df[cluster_col].notna() & 
-                cluster_df[lat_col].notna() & 
-                cluster_df[lng_col].notna()
-            ].copy()
-            
-            if len(valid_data) == 0:
-                logger.warning("No valid data with lat/lng and cluster information")
-                return {
-                    "num_clusters": 0,
-                    "centroids": []
-                }
-            
-            unique_clusters = valid_data[cluster_col].dropna().unique()
-            logger.info(f"Found {len(unique_clusters)} unique clusters")
-            
-            for cluster_id in unique_clusters:
-                cluster_data = valid_data[valid_data[cluster_col] == cluster_id]
-                
-                if len(cluster_data) == 0:
-                    continue
-                
-                # Calculate centroid (mean lat/lng)
-                mean_lat = float(cluster_data[lat_col].mean())
-                mean_lng = float(cluster_data[lng_col].mean())
-                
-                # Validate coordinates
-                if not (-90 <= mean_lat <= 90) or not (-180 <= mean_lng <= 180):
-                    logger.warning(f"Invalid coordinates for cluster {cluster_id}: lat={mean_lat}, lng={mean_lng}")
-                    continue
-                
-                # Calculate average price if available
-                avg_price = 0.0
-                if price_col and price_col in cluster_data.columns:
-                    prices = cluster_data[price_col].dropna()
-                    if len(prices) > 0:
-                        avg_price = float(prices.mean())
-                
-                # Count properties in cluster
-                count = int(len(cluster_data))
-                
-                centroids_list.append({
-                    'cluster_id': int(cluster_id) if pd.notna(cluster_id) else 0,
-                    'lat': mean_lat,
-                    'lng': mean_lng,
-                    'avg_price': avg_price,
-                    'count': count
-                })
-            
-            logger.info(f"✅ Generated {len(centroids_list)} centroids from cluster data")
+        catalog = cluster_catalog()
+        if catalog is None:
+            logger.warning("Cluster data not available, cannot generate centroids")
             return {
-                "num_clusters": len(centroids_list),
-                "centroids": centroids_list
+                "num_clusters": 0,
+                "centroids": []
             }
-        
-        # If centroids_df exists, use it but clean NaN values
-        centroids_dict = centroids_df.to_dict(orient="records")
-        
-        # Clean NaN values
-        def clean_nan_values(obj):
-            if isinstance(obj, dict):
-                return {k: clean_nan_values(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [clean_nan_values(item) for item in obj]
-            elif isinstance(obj, float):
-                if pd.isna(obj) or not np.isfinite(obj):
-                    return None
-                return obj
-            return obj
-        
-        cleaned_centroids = [clean_nan_values(centroid) for centroid in centroids_dict]
-        
-        return {
-            "num_clusters": len(cleaned_centroids),
-            "centroids": cleaned_centroids
-        }
+        return _cached_json(request, catalog.centroids_body, catalog.etag)
     except Exception as e:
         logger.error(f"Error in get_centroids: {e}", exc_info=True)
         return {
@@ -1027,28 +1916,30 @@ async def get_all_clusters(page: int = Query(1, ge=1), size: int = Query(1000, g
             if col_lower in ['lng', 'longitude', 'lon', 'long'] and lng_col is None:
                 lng_col = col
         
-        # Filter to only properties with valid coordinates
-        if lat_col and lng_col:
-            valid_data = cluster_df[
-                cluster_df[lat_col].notna() & 
-                cluster_df[lng_col].notna() &
-                (cluster_df[lat_col] >= -90) & (cluster_df[lat_col] <= 90) &
-                (cluster_df[lng_col] >= -180) & (cluster_df[lng_col] <= 180)
-            ].copy()
-            logger.info(f"Filtered to {len(valid_data)} properties with valid coordinates (from {len(cluster_df)} total)")
-        else:
-            logger.warning(f"Lat/Lng columns not found. Using all data. Available: {list(cluster_df.columns)[:10]}")
-            valid_data = cluster_df.copy()
+        with tracing.span("clusters_all.filter", rows=len(cluster_df)):
+            # Filter to only properties with valid coordinates
+            if lat_col and lng_col:
+                valid_data = cluster_df[
+                    cluster_df[lat_col].notna() & 
+                    cluster_df[lng_col].notna() &
+                    (cluster_df[lat_col] >= -90) & (cluster_df[lat_col] <= 90) &
+                    (cluster_df[lng_col] >= -180) & (cluster_df[lng_col] <= 180)
+                ].copy()
+                logger.info(f"Filtered to {len(valid_data)} properties with valid coordinates (from {len(cluster_df)} total)")
+            else:
+                logger.warning(f"Lat/Lng columns not found. Using all data. Available: {list(cluster_df.columns)[:10]}")
+                valid_data = cluster_df.copy()
         
         start = (page - 1) * size
         end = start + size
         data_slice = valid_data.iloc[start:end].copy()
         
-        # Replace NaN values with None (which becomes null in JSON)
-        data_slice = data_slice.where(pd.notna(data_slice), None)
+        with tracing.span("clusters_all.to_dict", rows=len(data_slice)):
+            # Replace NaN values with None (which becomes null in JSON)
+            data_slice = data_slice.where(pd.notna(data_slice), None)
         
-        # Convert to dict and clean up NaN values recursively
-        data_dict = data_slice.to_dict(orient="records")
+            # Convert to dict and clean up NaN values recursively
+            data_dict = data_slice.to_dict(orient="records")
         
         # Recursively replace any remaining NaN/Inf values
         def clean_nan_values(obj):
@@ -1062,7 +1953,8 @@ async def get_all_clusters(page: int = Query(1, ge=1), size: int = Query(1000, g
                 return obj
             return obj
         
-        cleaned_data = [clean_nan_values(record) for record in data_dict]
+        with tracing.span("clusters_all.clean_nan_values"):
+            cleaned_data = [clean_nan_values(record) for record in data_dict]
         
         logger.info(f"Returning {len(cleaned_data)} properties (page {page}, size {size})")
         
@@ -1110,7 +2002,9 @@ async def recommend_investments(
     min_beds: Optional[int] = None,
     max_beds: Optional[int] = None,
     min_baths: Optional[float] = None,
-    top_n: int = Query(10, ge=1, le=50)
+    top_n: int = Query(10, ge=1, le=50),
+    risk_model: str = Query("location", pattern="^(location|candidates)$"),
+    roi_model: str = Query("model", pattern="^(model|flat)$")
 ):
     """Get investment recommendations"""
     if advisor is None:
@@ -1125,7 +2019,10 @@ async def recommend_investments(
             max_beds=max_beds,
             min_baths=min_baths,
             top_n=min(top_n, 50),
-            verbose=False
+            verbose=False,
+            # A pickled advisor has its own risk and ROI scoring
+            **({"risk_model": risk_model} if risk_model in getattr(advisor, "risk_models", ()) else {}),
+            **({"roi_model": roi_model} if roi_model in getattr(advisor, "roi_models", ()) else {})
         )
         return results
     except Exception as e:
@@ -1133,8 +2030,11 @@ async def recommend_investments(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/advisor/states")
-async def get_advisor_states():
+async def get_advisor_states(request: Request):
     """Get list of available states"""
+    catalog = location_catalog()
+    if catalog is not None:
+        return _cached_json(request, catalog.states_body, catalog.etag)
     if advisor is None:
         raise HTTPException(status_code=503, detail="Advisor model not loaded")
     
@@ -1149,8 +2049,11 @@ async def get_advisor_states():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/advisor/cities/{state}")
-async def get_advisor_cities(state: str):
-    """Get cities in a specific state"""
+async def get_advisor_cities(state: str, request: Request):
+    """Get cities in a specific state (with property counts when served from the catalog)"""
+    catalog = location_catalog()
+    if catalog is not None:
+        return _cached_json(request, catalog.cities_body(state), catalog.etag)
     if advisor is None:
         raise HTTPException(status_code=503, detail="Advisor model not loaded")
     
@@ -1180,6 +2083,13 @@ async def get_zip_codes():
             logger.warning("property_data_df is empty")
             raise HTTPException(status_code=503, detail="Property data is empty")
         
+        zip_index = property_store.index("zip")
+        if zip_index is not None:
+            return {
+                "success": True,
+                "zip_codes": sorted(int(z) for z in zip_index["stats"] if float(z).is_integer() and z >= 0)
+            }
+        
         # Get unique zip codes and sort them
         # Try different possible column names
         zip_col = None
@@ -1218,6 +2128,25 @@ async def get_zip_code_stats(zip_code: int):
             logger.warning("property_data_df is empty")
             raise HTTPException(status_code=503, detail="Property data is empty")
         
+        zip_index = property_store.index("zip")
+        if zip_index is not None:
+            zip_stats = zip_index["stats"].get(zip_code)
+            if zip_stats is None:
+                raise HTTPException(status_code=404, detail=f"No data found for zip code {zip_code}")
+            # The rest of what predictions fill in for this zip (see zip_features)
+            extra = zip_features(zip_code, model_registry.get("forecast"))
+            return {
+                "success": True,
+                "stats": {
+                    "zip_code": int(zip_code),
+                    "property_count": int(zip_stats["count"]),
+                    "zip_price_mean": float(zip_stats["zip_price_mean"]),
+                    "zip_price_median": float(zip_stats["zip_price_median"]),
+                    "zip_size_mean": float(zip_stats["zip_size_mean"]),
+                    **{name: extra[name] for name in ("city_size", "zip_growth_rate") if name in extra}
+                }
+            }
+        
         # Find zip code column
         zip_col = None
         for col in ['zip_code', 'zip', 'zipcode', 'ZIP_CODE', 'ZIP']:
@@ -1229,8 +2158,9 @@ async def get_zip_code_stats(zip_code: int):
             logger.error(f"zip_code column not found. Available columns: {list(property_data_df.columns)}")
             raise HTTPException(status_code=500, detail=f"zip_code column not found in data")
         
-        # Filter data for this zip code
-        zip_data = property_data_df[property_data_df[zip_col] == zip_code]
+        with tracing.span("zip_stats.filter", rows=len(property_data_df)):
+            # Filter data for this zip code
+            zip_data = property_data_df[property_data_df[zip_col] == zip_code]
         
         if len(zip_data) == 0:
             raise HTTPException(status_code=404, detail=f"No data found for zip code {zip_code}")
@@ -1287,6 +2217,363 @@ async def get_zip_code_stats(zip_code: int):
         logger.error(f"Error getting zip code stats: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+# ==========================================
+# ANALYTICS ENDPOINTS
+# ==========================================
+@app.get("/api/analytics/cube")
+async def price_cube_query(
+    group_by: Optional[List[str]] = Query(None),
+    state: Optional[List[str]] = Query(None),
+    city: Optional[str] = None,
+    zip_code: Optional[List[int]] = Query(None),
+    cluster: Optional[List[int]] = Query(None),
+    beds: Optional[List[int]] = Query(None),
+    baths: Optional[List[float]] = Query(None),
+    price_band: Optional[List[str]] = Query(None),
+    size_band: Optional[List[str]] = Query(None),
+    quantiles: Optional[List[float]] = Query(None),
+    limit: int = Query(1000, ge=1, le=10_000)
+):
+    """Price aggregates rolled up from the price cube (see price_cube.py), e.g. ?group_by=state&group_by=bed.
+
+    Every group has its listing count, mean and standard deviation of price, mean size and the
+    requested price quantiles (default the median, within 1%). Filters take several values;
+    city needs exactly one state. Bands are given by label (see `bands` in the response).
+    """
+    index = property_store.index("cube")
+    if index is None:
+        raise HTTPException(status_code=503, detail="Property data not loaded")
+    group_by = list(dict.fromkeys(group_by or []))
+    unknown = [dim for dim in group_by if dim not in CUBE_DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown dimensions {unknown}, expected {list(CUBE_DIMENSIONS)}")
+    qs = sorted(set(quantiles or [0.5]))
+    if len(qs) > 9 or any(not 0 <= q <= 1 for q in qs):
+        raise HTTPException(status_code=422, detail="Give at most 9 quantiles between 0 and 1")
+    if city and (not state or len(state) != 1):
+        raise HTTPException(status_code=422, detail="city needs exactly one state")
+    
+    requested = {"state": state, "zip_code": zip_code, "street_cluster": cluster, "bed": beds, "bath": baths,
+                 "price_band": price_band, "size_band": size_band,
+                 "city": [(state[0], city)] if city else None}
+    filters = {dim: price_cube.resolve(index, dim, values) for dim, values in requested.items() if values}
+    with tracing.span("analytics.cube", group_by=",".join(group_by), filters=len(filters)):
+        result = price_cube.query(index, group_by, filters, qs)
+    if result is None:
+        raise HTTPException(status_code=422, detail=f"No cuboid has all of {sorted(set(group_by) | set(filters))}; "
+                                                    f"zip_code and street_cluster cannot be combined with bed, bath or bands")
+    
+    groups = []
+    for i, keys in enumerate(result["keys"].tolist()):
+        group = {}
+        for dim, code in zip(group_by, keys):
+            if dim == "city" and "state" not in group_by:
+                group["state"] = index["vocab"]["city"]["labels"][code][0] if code >= 0 else None
+            group[dim] = price_cube.label(index, dim, code)
+        group.update({
+            "count": int(result["count"][i]),
+            "price_count": int(result["price_count"][i]),
+            "avg_price": json_number(result["avg_price"][i]),
+            "std_price": json_number(result["std_price"][i]),
+            "avg_size": json_number(result["avg_size"][i]),
+            "price_quantiles": {f"p{q * 100:g}": json_number(value) for q, value in zip(qs, result["quantiles"][i])},
+        })
+        groups.append(group)
+    groups.sort(key=lambda g: tuple((g[dim] is None, g[dim] if g[dim] is not None else 0) for dim in group_by))
+    return {
+        "success": True,
+        "group_by": group_by,
+        "cuboid": result["cuboid"],
+        "cells_scanned": result["cells_scanned"],
+        "total_groups": len(groups),
+        "groups": groups[:limit],
+        "bands": BAND_LABELS,
+    }
+
+HISTOGRAM_LABELS = band_labels(HISTOGRAM_EDGES)
+
+@app.get("/api/analytics/distribution")
+async def price_distribution(
+    level: str = Query("zip", description="zip, city, state or cluster"),
+    region: Optional[List[str]] = Query(None, description="Regions to merge; a city is given as state/city. Default: all"),
+    quantiles: Optional[List[float]] = Query(None)
+):
+    """Price distribution of a selection of regions, merged from per-region sketches and histograms (see distributions.py).
+
+    Quantiles (default p10/p25/p50/p75/p90) are within 1% of the exact price at that rank;
+    the histogram counts are exact.
+    """
+    index = property_store.index("distribution")
+    if index is None:
+        raise HTTPException(status_code=503, detail="Property data not loaded")
+    if level not in index["levels"]:
+        raise HTTPException(status_code=422, detail=f"Unknown level {level!r}, expected one of {list(index['levels'])}")
+    qs = sorted(set(quantiles or [0.1, 0.25, 0.5, 0.75, 0.9]))
+    if len(qs) > 9 or any(not 0 <= q <= 1 for q in qs):
+        raise HTTPException(status_code=422, detail="Give at most 9 quantiles between 0 and 1")
+    
+    codes = None
+    if region:
+        keys = []
+        for value in region:
+            if level == "city":
+                if "/" not in value:
+                    raise HTTPException(status_code=422, detail=f"City {value!r} should be given as state/city")
+                keys.append(tuple(value.split("/", 1)))
+            elif level in ("zip", "cluster"):
+                try:
+                    keys.append(float(value))
+                except ValueError:
+                    raise HTTPException(status_code=422, detail=f"{level} {value!r} is not a number")
+            else:
+                keys.append(value)
+        codes = price_distributions.resolve(index, level, keys)
+        if not codes:
+            raise HTTPException(status_code=404, detail=f"No data found for {level} {region}")
+    with tracing.span("analytics.distribution", level=level, regions=len(codes) if codes is not None else -1):
+        result = price_distributions.distribution(index, level, codes, qs)
+    return {
+        "success": True,
+        "level": level,
+        "regions": result["regions"],
+        "count": result["count"],
+        "price_quantiles": {f"p{q * 100:g}": json_number(value) for q, value in zip(qs, result["quantiles"])},
+        "histogram": [{"bin": label, "lo": lo, "hi": hi, "count": int(count)} for label, lo, hi, count in
+                      zip(HISTOGRAM_LABELS, HISTOGRAM_EDGES, HISTOGRAM_EDGES[1:] + (None,), result["histogram"])],
+    }
+
+# ==========================================
+# PROPERTY SEARCH ENDPOINTS
+# ==========================================
+@app.get("/api/properties/search")
+async def search_properties(
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_size: Optional[float] = None,
+    max_size: Optional[float] = None,
+    min_lot: Optional[float] = None,
+    max_lot: Optional[float] = None,
+    beds: Optional[List[int]] = Query(None),
+    baths: Optional[List[float]] = Query(None),
+    state: Optional[str] = None,
+    city: Optional[str] = None,
+    zip_code: Optional[List[int]] = Query(None),
+    cluster: Optional[List[int]] = Query(None),
+    sort: str = Query("price", pattern=f"^({'|'.join(SORT_COLUMNS)}|row)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0, le=10_000)
+):
+    """Properties matching every given filter, sorted and paged.
+
+    Ranges are inclusive; beds, baths, zip_code and cluster take several values
+    (?beds=2&beds=3). Filters run on the search index (see property_search.py); `plan`
+    shows the rows each filter matches and how the page was found. `total` is null when
+    the page was found by scanning in sort order, which does not count every match.
+    """
+    df = property_store.df
+    index = property_store.index("search")
+    if df is None or index is None:
+        raise HTTPException(status_code=503, detail="Property data not loaded")
+    if city and not state:
+        raise HTTPException(status_code=422, detail="city needs a state")
+    
+    filters = []
+    for column, lo, hi in (("price", min_price, max_price), ("house_size", min_size, max_size), ("acre_lot", min_lot, max_lot)):
+        if lo is not None or hi is not None:
+            filters.append(Filter(column, lo=lo, hi=hi))
+    for column, values in (("bed", beds), ("bath", baths), ("zip_code", zip_code), ("street_cluster", cluster)):
+        if values:
+            filters.append(Filter(column, values=values))
+    if city:
+        filters.append(Filter("city", values=[text_key(state, city)]))
+    elif state:
+        filters.append(Filter("state", values=[text_key(state)]))
+    missing = sorted({f.column for f in filters if f.column not in index["columns"]} |
+                     ({sort} - {"row"} - set(index["columns"])))
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Property data has no {missing} column")
+    
+    with tracing.span("properties.search", filters=len(filters)):
+        result = search_index.search(index, df, filters, sort, order == "desc", limit, offset)
+    return {
+        "success": True,
+        "total": result["total"],
+        "plan": result["plan"],
+        "data": listing_records(df, result["rows"]),
+    }
+
+# ==========================================
+# COMPS ENDPOINTS
+# ==========================================
+def nearest_clusters(lat, lng, chunk_size: int = 4096):
+    """Cluster of each location (-1 without coordinates or cluster data): the cluster model's prediction,
+    else the cluster with the nearest centroid"""
+    import numpy as np
+    lat, lng = np.asarray(lat, dtype=float), np.asarray(lng, dtype=float)
+    clusters = np.full(len(lat), -1, dtype=np.int64)
+    valid = np.flatnonzero(np.isfinite(lat) & np.isfinite(lng))
+    if len(valid) == 0:
+        return clusters
+    if cluster_model is not None and hasattr(cluster_model, "predict"):
+        clusters[valid] = np.asarray(cluster_model.predict(np.column_stack([lat[valid], lng[valid]])), dtype=np.int64)
+        return clusters
+    catalog = cluster_catalog()
+    if catalog is None or not catalog.centroids:
+        return clusters
+    centroids = _feature_table("cluster_centroids", catalog.centroids, lambda centroids: np.array(
+        [[c["cluster_id"], c["lat"], c["lng"]] for c in centroids], dtype=float))
+    # Chunked so the points x centroids distance matrix stays small
+    for start in range(0, len(valid), chunk_size):
+        rows = valid[start:start + chunk_size]
+        scale = np.cos(np.radians(lat[rows]))[:, None]
+        distance = (centroids[None, :, 1] - lat[rows, None]) ** 2 + ((centroids[None, :, 2] - lng[rows, None]) * scale) ** 2
+        clusters[rows] = centroids[np.argmin(distance, axis=1), 0].astype(np.int64)
+    return clusters
+
+def nearest_cluster(lat: float, lng: float) -> Optional[int]:
+    """Cluster of one location (see nearest_clusters); None without cluster data"""
+    cluster = int(nearest_clusters([lat], [lng])[0])
+    return cluster if cluster >= 0 else None
+
+def _comps_price(request: CompsRequest, zip_stats: Optional[Dict]) -> Tuple[Optional[float], str]:
+    """The price a comps search looks for, and where it came from"""
+    import numpy as np
+    if request.price is not None:
+        return request.price, "request"
+    price = model_registry.get("price")
+    if price is not None and request.zip_code is not None:
+        forecast = model_registry.get("forecast")
+        with model_stage("price", "inference"):
+            data, _ = request_features(request, forecast)
+            estimate = float(np.expm1(price.model.predict(price_input(data, price, forecast)))[0])
+        if np.isfinite(estimate) and estimate > 0:
+            return estimate, "price_model"
+    if zip_stats and zip_stats.get("zip_price_median", 0) > 0:
+        return float(zip_stats["zip_price_median"]), "zip_median"
+    # Neutral: the search ignores price
+    return None, "none"
+
+@app.post("/api/comps")
+async def find_comps(
+    request: CompsRequest,
+    k: int = Query(10, ge=1, le=100),
+    scope: str = Query("all", pattern="^(all|zip|cluster)$")
+):
+    """The k listings most similar to a property (location, size, beds, baths, lot, price), nearest first.
+
+    scope=zip or cluster only considers listings in the property's zip code or street cluster.
+    Distances are in the comps index's normalized units (see comps.py) plus kilometres apart.
+    """
+    df = property_store.df
+    state = property_store.index("comps")
+    if df is None or state is None:
+        raise HTTPException(status_code=503, detail="Property data not loaded")
+    import numpy as np
+    import pandas as pd
+    
+    zip_index = property_store.index("zip")
+    zip_stats = zip_index["stats"].get(request.zip_code) if zip_index is not None and request.zip_code is not None else None
+    lat, lng = request.lat, request.lng
+    if lat is None or lng is None:
+        if not zip_stats or not np.isfinite(zip_stats.get("zip_lat", np.nan)):
+            raise HTTPException(status_code=422, detail="Provide lat and lng, or a zip_code with listings")
+        lat, lng = float(zip_stats["zip_lat"]), float(zip_stats["zip_lng"])
+    price, price_source = _comps_price(request, zip_stats)
+    
+    rows = None
+    cluster = None
+    if scope == "zip":
+        if request.zip_code is None:
+            raise HTTPException(status_code=422, detail="scope=zip needs a zip_code")
+        rows = _location_rows(str(request.zip_code), None, None)
+    elif scope == "cluster":
+        cluster = request.street_cluster if request.street_cluster is not None else nearest_cluster(lat, lng)
+        cluster_index = property_store.index("cluster")
+        if cluster is None or cluster_index is None:
+            raise HTTPException(status_code=503, detail="Cluster data not loaded")
+        rows = cluster_index["positions"].get(cluster, np.empty(0, dtype=np.int64))
+    
+    query = {"lat": lat, "lng": lng, "house_size": request.house_size, "bed": request.bed,
+             "bath": request.bath, "acre_lot": request.acre_lot, "price": price}
+    point = comps_index.transform(pd.DataFrame([query], dtype=float), state["scaling"])[0]
+    found, distances = comps_index.query(state, point, k, rows)
+    
+    comps = []
+    for distance, listing in zip(distances.tolist(), listing_records(df, found)):
+        item = {"row": listing.pop("row"), "distance": round(distance, 4), **listing}
+        if item.get("lat") is not None and item.get("lng") is not None:
+            item["distance_km"] = round(float(np.hypot(item["lat"] - lat, (item["lng"] - lng) * np.cos(np.radians(lat)))) * 111.32, 3)
+        comps.append(item)
+    return {
+        "success": True,
+        "scope": scope,
+        "k": k,
+        "query": {**query, "price_source": price_source, **({"street_cluster": cluster} if scope == "cluster" else {})},
+        "candidates": int(len(rows)) if rows is not None else None,   # listings in the zip/cluster
+        "comps": comps,
+    }
+
+# ==========================================
+# GEOCODING ENDPOINTS
+# ==========================================
+zip_coordinates_path = models_dir / "zip_latlng.csv"
+_geocoder_cache: Dict[str, Any] = {"table": None, "stats": None, "geocoder": None}
+
+def zip_geocoder() -> ZipGeocoder:
+    """Geocoder over zip_latlng.csv plus the zip index's listing centres; rebuilt only after a delta changes the index"""
+    if _geocoder_cache["table"] is None:
+        table = read_zip_table(zip_coordinates_path)
+        _geocoder_cache["table"] = table if table is not None else False
+    zip_index = property_store.index("zip")
+    stats = zip_index["stats"] if zip_index is not None else None
+    if _geocoder_cache["geocoder"] is None or _geocoder_cache["stats"] is not stats:
+        _geocoder_cache["geocoder"] = ZipGeocoder.build(_geocoder_cache["table"] if _geocoder_cache["table"] is not False else None, stats)
+        _geocoder_cache["stats"] = stats
+    return _geocoder_cache["geocoder"]
+
+def geocode_records(zip_codes, keys=None, jitter: bool = True, clusters: bool = True) -> List[Dict[str, Any]]:
+    """One record per zip code: coordinates (None when unknown), where they came from and, optionally, the street cluster"""
+    import numpy as np
+    result = zip_geocoder().geocode(zip_codes, keys, jittered=jitter)
+    def coordinates(values):
+        # 6 decimals is ~0.1 m; built column-wise, not with a float() per value
+        return [None if v != v else v for v in np.round(values, 6).tolist()]
+    columns = {
+        "zip_code": [int(z) for z in zip_codes],
+        "found": result["found"].tolist(),
+        "lat": coordinates(result["lat"]),
+        "lng": coordinates(result["lng"]),
+        "source": np.array(list(GEOCODE_SOURCES) + [None], dtype=object)[result["source"]].tolist(),
+    }
+    if clusters:
+        columns["street_cluster"] = [c if c >= 0 else None for c in nearest_clusters(result["lat"], result["lng"]).tolist()]
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+@app.get("/api/geocode/{zip_code}")
+async def geocode_zip(zip_code: int, key: Optional[str] = None, jitter: bool = True, clusters: bool = True):
+    """Coordinates of a zip code (its street cluster too), jittered reproducibly by key (see geocoding.py)"""
+    record = geocode_records([zip_code], [key] if key is not None else None, jitter, clusters)[0]
+    if not record["found"]:
+        raise HTTPException(status_code=404, detail=f"No coordinates for zip code {zip_code}")
+    geocoder = zip_geocoder()
+    positions, _ = geocoder.lookup([zip_code])
+    return {"success": True, **record, "zip_lat": float(geocoder.lat[positions[0]]), "zip_lng": float(geocoder.lng[positions[0]])}
+
+@app.post("/api/geocode/batch")
+async def geocode_batch(request: GeocodeBatchRequest):
+    """Coordinates for up to 100,000 zip codes in one vectorized lookup; unknown zips come back with found=false"""
+    if request.keys is not None and len(request.keys) != len(request.zip_codes):
+        raise HTTPException(status_code=422, detail="keys needs one entry per zip code")
+    with tracing.span("geocode.batch", rows=len(request.zip_codes)):
+        records = geocode_records(request.zip_codes, request.keys, request.jitter, request.clusters)
+    return {
+        "success": True,
+        "count": len(records),
+        "found": sum(record["found"] for record in records),
+        "results": records,
+    }
+
 # ==========================================
 # EDUCATION ENDPOINTS
 # ==========================================
@@ -1301,6 +2588,11 @@ class QuizGenerationRequest(BaseModel):
     module_index: int = 0
     num_questions: int = 10
 
+class CourseQuizzesRequest(BaseModel):
+    course_content: Dict[str, Any]
+    num_questions: int = 10
+    max_concurrency: int = Field(3, ge=1, le=8)
+
 class CertificationRequest(BaseModel):
     course_id: str
     course_title: str
@@ -1312,6 +2604,23 @@ class AssistantRequest(BaseModel):
     course_context: Optional[Dict[str, Any]] = None
     is_exam: bool = False
 
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def sse_stream(events):
+    """Turn an async iterator of (event, data) pairs into SSE frames"""
+    async for event, data in events:
+        yield sse_event(event, data)
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        sse_stream(events),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the browser as they arrive
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/education/levels")
 async def get_education_levels():
     """Get available education levels"""
@@ -1363,6 +2672,15 @@ async def generate_course(request: CourseGenerationRequest):
         logger.error(f"Error generating course: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/education/courses/generate/stream")
+async def generate_course_stream(request: CourseGenerationRequest):
+    """Stream course generation via SSE (token, module, course events)"""
+    return sse_response(education_service.stream_course_content(
+        topic=request.topic,
+        level=request.level,
+        duration_hours=request.duration_hours
+    ))
+
 @app.post("/api/education/quizzes/generate")
 async def generate_quiz(request: QuizGenerationRequest):
     """Generate quiz questions for a course module"""
@@ -1380,6 +2698,15 @@ async def generate_quiz(request: QuizGenerationRequest):
         logger.error(f"Error generating quiz: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/education/quizzes/generate/course")
+async def generate_course_quizzes(request: CourseQuizzesRequest):
+    """Generate quizzes for all modules of a course concurrently, streamed via SSE as each module completes"""
+    return sse_response(education_service.stream_course_quizzes(
+        course_content=request.course_content,
+        num_questions=request.num_questions,
+        max_concurrency=request.max_concurrency
+    ))
+
 @app.post("/api/education/certifications/generate")
 async def generate_certification(request: CertificationRequest):
     """Generate certification badge/certificate"""
@@ -1415,6 +2742,15 @@ async def get_ai_assistant(request: AssistantRequest):
         logger.error(f"Error getting AI assistant help: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/education/assistant/stream")
+async def get_ai_assistant_stream(request: AssistantRequest):
+    """Stream AI assistant help via SSE (token events, then done or error)"""
+    return sse_response(education_service.stream_ai_assistant_help(
+        question=request.question,
+        course_context=request.course_context,
+        is_exam=request.is_exam
+    ))
+
 @app.get("/api/education/news")
 async def get_crypto_news(limit: int = Query(5, ge=1, le=20)):
     """Get cryptocurrency/blockchain news for educational context"""
@@ -1429,4 +2765,5 @@ async def get_crypto_news(limit: int = Query(5, ge=1, le=20)):
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5001)
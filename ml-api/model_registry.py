@@ -0,0 +1,189 @@
+"""
+Model registry - hot reload of pickled model artifacts without restarting the API.
+
+Each artifact is loaded into an immutable ModelArtifact. A reload happens in a worker
+thread, is checked with a smoke prediction, and then swapped in by replacing a single
+reference. A request that has already fetched the old artifact keeps using it until it
+finishes. A failed load or smoke test leaves the current version in place.
+"""
+import asyncio
+import hashlib
+import logging
+import pickle
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ModelArtifact:
+    """One loaded model file: the unpickled fields plus where and when it came from"""
+
+    def __init__(self, name: str, path: Path, version: str, signature: Tuple[float, int], fields: Dict[str, Any]):
+        self.name = name
+        self.path = path
+        self.version = version
+        self.signature = signature
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self._fields = fields
+
+    def __getattr__(self, item: str) -> Any:
+        try:
+            return self.__dict__["_fields"][item]
+        except KeyError:
+            raise AttributeError(item) from None
+
+    def info(self) -> Dict:
+        return {"version": self.version, "path": str(self.path), "loaded_at": self.loaded_at}
+
+
+class ModelSpec:
+    """How to turn a pickle into artifact fields and how to smoke test the result"""
+
+    def __init__(self, filename: str, unpack: Callable[[Dict], Dict[str, Any]],
+                 smoke_test: Callable[[ModelArtifact], None]):
+        self.filename = filename
+        self.unpack = unpack
+        self.smoke_test = smoke_test
+
+
+def file_signature(path: Path) -> Tuple[float, int]:
+    stat = path.stat()
+    return stat.st_mtime, stat.st_size
+
+
+def file_version(path: Path) -> str:
+    """Content hash prefix, so the same file deployed twice reports the same version"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class ModelRegistry:
+    """Holds the live artifact for each model name and swaps in new versions"""
+
+    def __init__(self, models_dir: Path, specs: Dict[str, ModelSpec]):
+        self.models_dir = Path(models_dir)
+        self.specs = specs
+        self._current: Dict[str, Optional[ModelArtifact]] = {name: None for name in specs}
+        self._load_lock = threading.Lock()
+        self._pending: Dict[str, Tuple[float, int]] = {}
+        self._rejected: Dict[str, Tuple[float, int]] = {}
+        self.history: List[Dict] = []
+        self.last_error: Dict[str, str] = {}
+        self._listeners: List[Callable[[str, ModelArtifact], None]] = []
+
+    def on_change(self, callback: Callable[[str, ModelArtifact], None]):
+        """Call callback(name, artifact) after a new artifact is swapped in (from the loading thread)"""
+        self._listeners.append(callback)
+
+    def get(self, name: str) -> Optional[ModelArtifact]:
+        """Current artifact; callers should fetch it once per request and use that reference throughout"""
+        return self._current[name]
+
+    def path(self, name: str) -> Path:
+        return self.models_dir / self.specs[name].filename
+
+    def versions(self) -> Dict[str, Optional[str]]:
+        return {name: artifact.version if artifact else None for name, artifact in self._current.items()}
+
+    def status(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                **(artifact.info() if artifact else {"version": None}),
+                "last_error": self.last_error.get(name),
+            }
+            for name, artifact in self._current.items()
+        }
+
+    def load(self, name: str, force: bool = False) -> Dict:
+        """Load, validate and swap one artifact (blocking). Returns what happened."""
+        spec = self.specs[name]
+        path = self.path(name)
+        with self._load_lock:
+            current = self._current[name]
+            if not path.exists():
+                return {"model": name, "result": "missing", "path": str(path)}
+            signature = file_signature(path)
+            if current is not None and not force and current.signature == signature:
+                return {"model": name, "result": "unchanged", "version": current.version}
+
+            start = time.perf_counter()
+            try:
+                with open(path, "rb") as f:
+                    saved = pickle.load(f)
+                fields = spec.unpack(saved)
+                version = str(saved.get("version") or file_version(path)) if isinstance(saved, dict) else file_version(path)
+                candidate = ModelArtifact(name, path, version, signature, fields)
+                spec.smoke_test(candidate)
+            except Exception as e:
+                self.last_error[name] = f"{type(e).__name__}: {e}"
+                self._rejected[name] = signature
+                logger.error(f"❌ {name} model at {path} rejected, keeping "
+                             f"{current.version if current else 'no model'}: {e}")
+                return {"model": name, "result": "failed", "error": self.last_error[name],
+                        "version": current.version if current else None}
+
+            # Single reference assignment: requests already holding the old artifact finish on it
+            self._current[name] = candidate
+            self.last_error.pop(name, None)
+            self._pending.pop(name, None)
+            self._rejected.pop(name, None)
+            elapsed = time.perf_counter() - start
+            entry = {"model": name, "result": "reloaded" if current else "loaded", "version": version,
+                     "previous_version": current.version if current else None,
+                     "load_s": round(elapsed, 3), "at": candidate.loaded_at}
+            self.history = (self.history + [entry])[-20:]
+            logger.info(f"✅ {name} model {entry['result']}: version {version} ({elapsed:.2f}s)")
+        for callback in self._listeners:
+            try:
+                callback(name, candidate)
+            except Exception as e:
+                logger.error(f"Model change listener failed for {name}: {e}", exc_info=True)
+        return entry
+
+    async def reload(self, names: Optional[List[str]] = None, force: bool = False) -> List[Dict]:
+        """Reload in a worker thread so request handling continues on the current versions"""
+        results = []
+        for name in names or list(self.specs):
+            if name not in self.specs:
+                results.append({"model": name, "result": "unknown"})
+                continue
+            results.append(await asyncio.to_thread(self.load, name, force))
+        return results
+
+    def changed(self) -> List[str]:
+        """Names whose file changed and has been stable since the previous poll (avoids half-copied files)"""
+        ready = []
+        for name in self.specs:
+            path = self.path(name)
+            if not path.exists():
+                continue
+            signature = file_signature(path)
+            current = self._current[name]
+            if (current is not None and current.signature == signature) or self._rejected.get(name) == signature:
+                self._pending.pop(name, None)
+                continue
+            if self._pending.get(name) == signature:
+                ready.append(name)
+            else:
+                self._pending[name] = signature
+        return ready
+
+    async def watch(self, interval: float):
+        """Poll model files and reload any that changed"""
+        logger.info(f"👀 Watching model files in {self.models_dir} every {interval:g}s")
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                names = self.changed()
+                if names:
+                    logger.info(f"Model files changed: {names}, reloading...")
+                    await self.reload(names)
+            except Exception as e:
+                logger.error(f"Model watcher error: {e}", exc_info=True)
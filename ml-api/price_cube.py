@@ -0,0 +1,273 @@
+"""
+Price cube - price aggregates per combination of location and listing attributes, materialized
+at load so dashboard breakdowns are answered from cells instead of rows.
+
+Dimensions: state, city, zip_code, street_cluster, bed (6 = 6+), bath (in halves, 6 = 6+),
+price_band and size_band (PRICE_BANDS / SIZE_BANDS). Every cell holds the listing count,
+price count/sum/sum of squares, size count/sum and a price quantile sketch (sketches.py).
+
+The cube is kept as several cuboids (CUBOIDS), each grouping the cells by a subset of the
+dimensions. A query filters and groups the cells of the smallest cuboid that has every
+dimension it uses, so its cost is the number of cells in that cuboid, not rows.
+
+All measures are additive, including the sketches, so a delta adds its new rows' cells and
+subtracts the replaced rows' cells. Those go to a small overlay per cuboid that queries
+read alongside the cuboid; the overlay is folded in once it passes a fraction of the cells.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import sketches
+from property_store import DerivedIndex
+
+DIMENSIONS = ("state", "city", "zip_code", "street_cluster", "bed", "bath", "price_band", "size_band")
+_ATTRIBUTES = ("bed", "bath", "price_band", "size_band")
+CUBOIDS = {
+    "attributes": _ATTRIBUTES,
+    "state": ("state",) + _ATTRIBUTES,
+    "city": ("state", "city") + _ATTRIBUTES,
+    "cluster": ("state", "street_cluster") + _ATTRIBUTES,
+    "location": ("state", "city", "zip_code", "street_cluster"),
+    "base": DIMENSIONS,
+}
+PRICE_BANDS = (0, 100_000, 200_000, 300_000, 400_000, 500_000, 750_000, 1_000_000, 2_000_000)
+SIZE_BANDS = (0, 1000, 1500, 2000, 2500, 3000, 4000)
+BED_CAP = 6
+BATH_CAP = 6
+MEASURES = ("count", "price_n", "price_sum", "price_sumsq", "size_n", "size_sum")
+
+
+def band_labels(edges: Sequence[float]) -> List[str]:
+    def short(value):
+        return f"{value / 1_000_000:g}M" if value >= 1_000_000 else f"{value / 1000:g}k" if value >= 1000 else f"{value:g}"
+    return [f"{short(lo)}-{short(hi)}" for lo, hi in zip(edges, edges[1:])] + [f"{short(edges[-1])}+"]
+
+
+BAND_LABELS = {"price_band": band_labels(PRICE_BANDS), "size_band": band_labels(SIZE_BANDS)}
+
+
+class PriceCube(DerivedIndex):
+    name = "cube"
+
+    def __init__(self, compact_fraction: float = 0.1):
+        self.compact_fraction = compact_fraction
+
+    def version(self) -> str:
+        return f"PriceCube:1:{sketches.RELATIVE_ACCURACY}:{PRICE_BANDS}:{SIZE_BANDS}:{','.join(CUBOIDS)}"
+
+    def available(self, df) -> bool:
+        return "price" in df.columns
+
+    # ---- rows -> cells ----
+
+    @staticmethod
+    def _codes(values, vocab: Dict) -> Any:
+        """Codes of text labels, adding unseen labels to vocab (a new copy is the caller's job)"""
+        import numpy as np
+        import pandas as pd
+
+        codes, uniques = pd.factorize(values)
+        mapped = np.empty(len(uniques) + 1, dtype=np.int64)
+        mapped[-1] = -1
+        for i, label in enumerate(uniques):
+            mapped[i] = vocab["codes"].setdefault(label, len(vocab["labels"]))
+            if mapped[i] == len(vocab["labels"]):
+                vocab["labels"].append(label)
+        return mapped[codes]
+
+    def _cells(self, frame, vocab: Dict, sign: int = 1) -> Dict:
+        """Base-cuboid cells (keys, measures, sketch) of some rows; sign=-1 subtracts them"""
+        import numpy as np
+        import pandas as pd
+
+        n = len(frame)
+        def numeric(name):
+            return pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=float) if name in frame.columns else np.full(n, np.nan)
+
+        def clean(values, limit=None):
+            values = np.where(np.isfinite(values), values, -1)
+            return np.minimum(values, limit) if limit is not None else values
+
+        price, size = numeric("price"), numeric("house_size")
+        keys = np.empty((n, len(DIMENSIONS)), dtype=np.int64)
+        if "state" in frame.columns:
+            state = frame["state"].astype("object").where(frame["state"].notna()).str.strip()
+            keys[:, 0] = self._codes(state, vocab["state"])
+            if "city" in frame.columns:
+                city = frame["city"].astype("object").where(frame["city"].notna()).str.strip()
+                pairs = pd.Series(list(zip(state, city)), dtype=object).where(state.notna().to_numpy() & city.notna().to_numpy())
+                keys[:, 1] = self._codes(pairs.to_numpy(dtype=object), vocab["city"])
+            else:
+                keys[:, 1] = -1
+        else:
+            keys[:, :2] = -1
+        keys[:, 2] = clean(numeric("zip_code"))
+        keys[:, 3] = clean(numeric("street_cluster"))
+        keys[:, 4] = clean(np.floor(numeric("bed")), BED_CAP)
+        keys[:, 5] = clean(np.round(numeric("bath") * 2), BATH_CAP * 2)
+        keys[:, 6] = np.where(price > 0, np.searchsorted(PRICE_BANDS, price, side="right") - 1, -1)
+        keys[:, 7] = np.where(size > 0, np.searchsorted(SIZE_BANDS, size, side="right") - 1, -1)
+        valid_price, valid_size = price > 0, size > 0
+        measures = np.column_stack([
+            np.ones(n), valid_price, np.where(valid_price, price, 0.0), np.where(valid_price, price * price, 0.0),
+            valid_size, np.where(valid_size, size, 0.0),
+        ]) * sign
+        return _group(keys, measures, np.arange(n), sketches.bucket_of(price), np.full(n, sign))
+
+    def build(self, df) -> Dict:
+        vocab = {"state": {"labels": [], "codes": {}}, "city": {"labels": [], "codes": {}}}
+        base = self._cells(df, vocab)
+        return {
+            "vocab": vocab,
+            "cuboids": {name: {**_project(base, dims), "overlay": None} for name, dims in CUBOIDS.items()},
+        }
+
+    def apply_delta(self, state: Dict, df, delta) -> Dict:
+        import numpy as np
+
+        if len(delta.appended) == 0 and len(delta.updated) == 0:
+            return state
+        # Copy-on-write: readers of the old state keep their vocab
+        vocab = {name: {"labels": list(v["labels"]), "codes": dict(v["codes"])} for name, v in state["vocab"].items()}
+        added = self._cells(df.iloc[np.concatenate([delta.appended, delta.updated])], vocab)
+        removed = self._cells(delta.previous, vocab, sign=-1)
+        change = _concat([added, removed])
+        cuboids = {}
+        for name, dims in CUBOIDS.items():
+            cuboid = state["cuboids"][name]
+            overlay = _project(change, dims)
+            if cuboid["overlay"]:
+                overlay = _group_cells(_concat([cuboid["overlay"], overlay]))
+            if len(overlay["keys"]) > self.compact_fraction * max(len(cuboid["keys"]), 1):
+                merged = _group_cells(_concat([cuboid, overlay]))
+                # Cells whose rows were all replaced disappear here
+                cuboids[name] = {**_select(merged, merged["measures"][:, 0] != 0), "overlay": None}
+            else:
+                cuboids[name] = {**cuboid, "overlay": overlay}
+        return {"vocab": vocab, "cuboids": cuboids}
+
+    # ---- queries ----
+
+    @staticmethod
+    def plan(state: Dict, dims: Sequence[str]) -> Optional[str]:
+        """The cuboid with the fewest cells that has every dimension in dims"""
+        candidates = [name for name, cuboid_dims in CUBOIDS.items() if set(dims) <= set(cuboid_dims)]
+        return min(candidates, key=lambda name: len(state["cuboids"][name]["keys"]), default=None)
+
+    def resolve(self, state: Dict, dim: str, values: Sequence) -> List[int]:
+        """Codes of filter values for a dimension (labels as the endpoint receives them); unknown values are dropped"""
+        if dim == "state":
+            wanted = {str(v).strip().lower() for v in values}
+            return [i for i, label in enumerate(state["vocab"]["state"]["labels"]) if label.lower() in wanted]
+        if dim == "city":
+            wanted = {(str(s).strip().lower(), str(c).strip().lower()) for s, c in values}
+            return [i for i, (s, c) in enumerate(state["vocab"]["city"]["labels"]) if (s.lower(), c.lower()) in wanted]
+        if dim in BAND_LABELS:
+            labels = BAND_LABELS[dim]
+            return [labels.index(v) for v in values if v in labels]
+        if dim == "bath":
+            return [int(round(min(float(v), BATH_CAP) * 2)) for v in values]
+        if dim == "bed":
+            return [int(min(int(v), BED_CAP)) for v in values]
+        return [int(v) for v in values]
+
+    def label(self, state: Dict, dim: str, code: int):
+        if code < 0:
+            return None
+        if dim == "state":
+            return state["vocab"]["state"]["labels"][code]
+        if dim == "city":
+            return state["vocab"]["city"]["labels"][code][1]
+        if dim in BAND_LABELS:
+            return BAND_LABELS[dim][code]
+        if dim == "bath":
+            return code / 2
+        return int(code)
+
+    def query(self, state: Dict, group_by: Sequence[str], filters: Dict[str, List[int]],
+              qs: Sequence[float] = (0.5,)) -> Optional[Dict[str, Any]]:
+        """Roll the cells up to group_by after filtering (dim -> allowed codes); None if no cuboid has the dimensions"""
+        import numpy as np
+
+        name = self.plan(state, list(group_by) + list(filters))
+        if name is None:
+            return None
+        dims = CUBOIDS[name]
+        cuboid = state["cuboids"][name]
+        parts, scanned = [], 0
+        for part in (cuboid, cuboid["overlay"]):
+            if not part:
+                continue
+            scanned += len(part["keys"])
+            mask = np.ones(len(part["keys"]), dtype=bool)
+            for dim, codes in filters.items():
+                mask &= np.isin(part["keys"][:, dims.index(dim)], codes)
+            parts.append(_select(part, mask))
+        grouped = _group_cells(_project(_concat(parts), list(group_by), base_dims=dims))
+        measures = grouped["measures"]
+        live = np.flatnonzero(measures[:, 0] > 0)
+        values = sketches.quantiles(*grouped["sketch"], len(grouped["keys"]), qs)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_price = measures[:, 2] / measures[:, 1]
+            std_price = np.sqrt(np.maximum(measures[:, 3] / measures[:, 1] - avg_price ** 2, 0))
+            avg_size = measures[:, 5] / measures[:, 4]
+        return {"cuboid": name, "cells_scanned": scanned, "keys": grouped["keys"][live], "count": measures[live, 0],
+                "price_count": measures[live, 1], "avg_price": avg_price[live], "std_price": std_price[live],
+                "avg_size": avg_size[live], "quantiles": values[live]}
+
+
+# ---- cell sets: {"keys": (cells x dims) codes, "measures": (cells x MEASURES), "sketch": (cell, bucket, count)} ----
+
+def _group(keys, measures, sketch_rows, buckets, counts) -> Dict:
+    """Group equal key rows into cells, summing measures and merging sketch entries"""
+    import numpy as np
+    import pandas as pd
+
+    if len(keys) == 0:
+        empty = np.empty(0, dtype=np.int32)
+        return {"keys": keys.astype(np.int32), "measures": measures.reshape(0, len(MEASURES)),
+                "sketch": (empty, empty.astype(np.int16), empty)}
+    if keys.shape[1]:
+        ids = pd.DataFrame(keys).groupby(list(range(keys.shape[1])), sort=True).ngroup().to_numpy()
+    else:
+        ids = np.zeros(len(keys), dtype=np.int64)   # no dimensions: one grand-total cell
+    _, first = np.unique(ids, return_index=True)
+    n = len(first)
+    summed = np.column_stack([np.bincount(ids, weights=measures[:, j], minlength=n) for j in range(measures.shape[1])])
+    return {"keys": keys[first].astype(np.int32), "measures": summed,
+            "sketch": sketches.merge(ids[sketch_rows], buckets, counts)}
+
+
+def _group_cells(cells: Dict) -> Dict:
+    cell, bucket, count = cells["sketch"]
+    return _group(cells["keys"], cells["measures"], cell, bucket, count)
+
+
+def _project(cells: Dict, dims: Sequence[str], base_dims: Optional[Sequence[str]] = DIMENSIONS) -> Dict:
+    """Roll cells up to a subset of their dimensions (base_dims None: cells already have dims)"""
+    if base_dims is None:
+        return _group_cells(cells)
+    columns = [list(base_dims).index(dim) for dim in dims]
+    return _group_cells({**cells, "keys": cells["keys"][:, columns]})
+
+
+def _select(cells: Dict, mask) -> Dict:
+    import numpy as np
+
+    positions = np.full(len(mask), -1)
+    positions[mask] = np.arange(int(mask.sum()))
+    cell, bucket, count = cells["sketch"]
+    kept = mask[cell]
+    return {"keys": cells["keys"][mask], "measures": cells["measures"][mask],
+            "sketch": (positions[cell[kept]], bucket[kept], count[kept])}
+
+
+def _concat(parts: List[Dict]) -> Dict:
+    import numpy as np
+
+    offsets = np.cumsum([0] + [len(p["keys"]) for p in parts])
+    return {
+        "keys": np.concatenate([p["keys"] for p in parts]),
+        "measures": np.concatenate([p["measures"] for p in parts]),
+        "sketch": tuple(np.concatenate(columns) for columns in zip(*[
+            (p["sketch"][0].astype(np.int64) + offset, p["sketch"][1], p["sketch"][2]) for p, offset in zip(parts, offsets)])),
+    }
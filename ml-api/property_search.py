@@ -0,0 +1,276 @@
+"""
+Property search - filter, sort and page the property table through prebuilt per-column indexes.
+
+Every searchable column is indexed the same way: its row positions sorted by value, plus the
+distinct values and the offset where each value's run starts. A value (beds = 3) or a range
+(price 200k-400k) is then one contiguous slice of positions found by binary search, so a
+filter is counted in O(log n) and materialized in O(matches). For low-cardinality columns
+(beds, baths, state, ...) the runs are the posting lists a bitmap index would hold; for
+continuous ones (price, size, lot) the same layout is a sorted array for range scans.
+
+The planner counts every filter first (exact, from the offsets alone) and then either
+
+    index   materializes the smallest filter's rows and checks the other filters on just those
+    scan    walks the sort column's order from the requested end and checks every filter chunk
+            by chunk until the page is full; chosen when the filters match so many rows that
+            the page fills sooner than the smallest filter could be materialized
+
+so the work is proportional to the rows touched, not to the table.
+
+Rows changed by deltas since the build go to a sorted overlay: they are dropped from index
+results and checked directly against the current frame instead. The index is rebuilt once
+the overlay passes a fraction of the table.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from property_store import DerivedIndex
+
+NUMERIC_COLUMNS = ("price", "house_size", "acre_lot", "bed", "bath", "zip_code", "street_cluster")
+# Matched case-insensitively; a city key includes its state
+TEXT_COLUMNS = {"state": ("state",), "city": ("state", "city")}
+SORT_COLUMNS = ("price", "house_size", "acre_lot")
+
+
+def text_key(*parts: str) -> str:
+    """Key of a state ("texas") or city ("texas/austin") as the index stores it"""
+    return "/".join(str(part).strip().lower() for part in parts)
+
+
+class Filter:
+    """One condition on a column: its value is in `values`, or lo <= value <= hi (either bound optional)"""
+
+    def __init__(self, column: str, values: Optional[Sequence] = None, lo=None, hi=None):
+        self.column = column
+        self.values = list(dict.fromkeys(values)) if values is not None else None
+        self.lo = lo
+        self.hi = hi
+
+    def test(self, values):
+        import numpy as np
+        import pandas as pd
+
+        if self.values is not None:
+            return pd.Series(values).isin(self.values).to_numpy()
+        mask = np.ones(len(values), dtype=bool)
+        if self.lo is not None:
+            mask &= values >= self.lo
+        if self.hi is not None:
+            mask &= values <= self.hi
+        return mask
+
+    def describe(self) -> str:
+        if self.values is not None:
+            return f"{self.column} in {self.values}"
+        return f"{self.column} in [{self.lo}, {self.hi}]"
+
+
+def column_values(df, column: str, rows=None):
+    """Values of a searchable column (numeric, or text keys) for some rows (default: all), O(len(rows))"""
+    import pandas as pd
+
+    if column in TEXT_COLUMNS:
+        import numpy as np
+
+        # Normalize each distinct combination once, not every row
+        combined, parts = None, []
+        for name in TEXT_COLUMNS[column]:
+            codes, uniques = pd.factorize(df[name] if rows is None else df[name].iloc[rows])
+            parts.append(uniques)
+            combined = codes.astype(np.int64) if combined is None else np.where(
+                (combined < 0) | (codes < 0), -1, combined * len(uniques) + codes)
+        codes, uniques = pd.factorize(combined)
+        keys = []
+        for code in uniques:
+            if code < 0:
+                keys.append(None)
+                continue
+            values = []
+            for part in reversed(parts):
+                code, index = divmod(int(code), len(part))
+                values.append(part[index])
+            keys.append(text_key(*reversed(values)))
+        return np.array(keys + [None], dtype=object)[codes]
+    values = df[column] if rows is None else df[column].iloc[rows]
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+
+
+def filter_rows(df, rows, filters: Sequence[Filter]):
+    """The rows (positions) that pass every filter, checked against the frame's current values"""
+    for f in filters:
+        if len(rows) == 0:
+            break
+        rows = rows[f.test(column_values(df, f.column, rows))]
+    return rows
+
+
+class SearchIndex(DerivedIndex):
+    name = "search"
+
+    def __init__(self, rebuild_fraction: float = 0.05, chunk_size: int = 4096):
+        self.rebuild_fraction = rebuild_fraction
+        self.chunk_size = chunk_size
+
+    def version(self) -> str:
+        return f"SearchIndex:1:{','.join(NUMERIC_COLUMNS)}:{','.join(TEXT_COLUMNS)}"
+
+    def columns(self, df) -> List[str]:
+        return ([c for c in NUMERIC_COLUMNS if c in df.columns]
+                + [name for name, parts in TEXT_COLUMNS.items() if all(p in df.columns for p in parts)])
+
+    def available(self, df) -> bool:
+        return bool(self.columns(df))
+
+    @staticmethod
+    def _index_column(values) -> Dict[str, Any]:
+        import numpy as np
+        import pandas as pd
+
+        valid = pd.notna(values)
+        positions = np.flatnonzero(valid)
+        codes, uniques = pd.factorize(values[valid])
+        uniques = np.asarray(uniques)
+        # Renumber the codes in value order so runs come out sorted
+        perm = np.argsort(uniques, kind="stable")
+        rank = np.empty(len(uniques), dtype=np.int64)
+        rank[perm] = np.arange(len(uniques))
+        codes = rank[codes]
+        dtype = np.int32 if len(values) < 2 ** 31 else np.int64
+        return {
+            "keys": uniques[perm],
+            "offsets": np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(uniques)))]),
+            "order": positions[np.argsort(codes, kind="stable")].astype(dtype),
+            "missing": np.flatnonzero(~valid),
+        }
+
+    def build(self, df) -> Dict:
+        import numpy as np
+
+        return {
+            "rows": len(df),
+            "columns": {name: self._index_column(column_values(df, name)) for name in self.columns(df)},
+            "overlay_rows": np.empty(0, dtype=np.int64),     # sorted; checked against the frame, not the index
+        }
+
+    def apply_delta(self, state: Dict, df, delta) -> Dict:
+        import numpy as np
+
+        changed = np.concatenate([delta.appended, delta.updated])
+        if len(changed) == 0:
+            return state
+        overlay = np.union1d(state["overlay_rows"], changed)
+        if len(overlay) > self.rebuild_fraction * len(df):
+            return self.build(df)
+        return {**state, "overlay_rows": overlay}
+
+    @staticmethod
+    def _slices(column: Dict, f: Filter) -> List[tuple]:
+        """(start, stop) ranges of the column's order holding the filter's matches"""
+        import numpy as np
+
+        keys, offsets = column["keys"], column["offsets"]
+        if f.values is not None:
+            slices = []
+            for value in f.values:
+                i = int(np.searchsorted(keys, value))
+                if i < len(keys) and keys[i] == value:
+                    slices.append((int(offsets[i]), int(offsets[i + 1])))
+            return slices
+        start = int(np.searchsorted(keys, f.lo, side="left")) if f.lo is not None else 0
+        stop = int(np.searchsorted(keys, f.hi, side="right")) if f.hi is not None else len(keys)
+        return [(int(offsets[start]), int(offsets[stop]))] if stop > start else []
+
+    def _walk(self, state: Dict, sort: str, descending: bool, bounds: Optional[tuple] = None):
+        """Row positions in sort order, chunk by chunk; bounds limits the walk to a slice of the sort column's order.
+
+        Rows without a value come last (unless bounds is given: a range on the column excludes them).
+        """
+        import numpy as np
+
+        column = state["columns"][sort] if sort != "row" else None
+        low, high = bounds or (0, len(column["order"]) if column is not None else state["rows"])
+        size, start, stop = self.chunk_size, low, high
+        while start < stop:
+            # Chunks double so a selective filter does not cost one numpy round trip per few rows
+            if descending:
+                lo, hi = max(stop - size, start), stop
+                stop = lo
+            else:
+                lo, hi = start, min(start + size, stop)
+                start = hi
+            if column is None:
+                yield np.arange(hi - 1, lo - 1, -1) if descending else np.arange(lo, hi)
+            else:
+                yield column["order"][lo:hi][::-1] if descending else column["order"][lo:hi]
+            size = min(size * 2, 1 << 20)
+        if column is not None and bounds is None and len(column["missing"]):
+            yield column["missing"]
+
+    def search(self, state: Dict, df, filters: Sequence[Filter], sort: str = "row", descending: bool = False,
+               limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """One page of matching rows in sort order (ties by row), with the total when it was counted and the plan"""
+        import numpy as np
+
+        n, overlay = state["rows"], state["overlay_rows"]
+        needed = offset + limit
+        sized = []
+        for f in filters:
+            slices = self._slices(state["columns"][f.column], f)
+            sized.append((sum(stop - start for start, stop in slices), f, slices))
+        sized.sort(key=lambda item: item[0])
+        driver = sized[0][0] if sized else n
+        plan = {"filters": [{"filter": f.describe(), "rows": count} for count, f, _ in sized]}
+        # A range on the sort column bounds the walk; the other filters thin it out. Assuming they
+        # are independent, filling the page means walking about needed / selectivity rows, against
+        # `driver` rows to materialize the smallest filter.
+        bounds, selectivity = None, 1.0
+        for count, f, slices in sized:
+            if f.column == sort and f.values is None:
+                bounds = slices[0] if slices else (0, 0)
+            else:
+                selectivity *= count / max(n, 1)
+        scan = driver > 0 and needed < selectivity * driver
+        ordered = [f for _, f, _ in sized]
+        if scan:
+            found, examined, complete = [], 0, True
+            for block in self._walk(state, sort, descending, bounds):
+                examined += len(block)
+                if len(overlay):
+                    block = block[~np.isin(block, overlay)]
+                found.append(filter_rows(df, block, ordered))
+                if sum(len(rows) for rows in found) >= needed:
+                    complete = False
+                    break
+            base = np.concatenate(found).astype(np.int64) if found else np.empty(0, dtype=np.int64)
+            if not complete and sort != "row":
+                # Ties at the page boundary: take the whole run of the last value so ties are ordered by row
+                last = column_values(df, sort, base[needed - 1:needed])[0]
+                if last == last:
+                    tie = Filter(sort, values=[last])
+                    run = np.concatenate([state["columns"][sort]["order"][a:b] for a, b in self._slices(state["columns"][sort], tie)])
+                    run = run[~np.isin(run, overlay)] if len(overlay) else run
+                    base = np.union1d(base[:needed], filter_rows(df, run, ordered))
+            plan.update(strategy="scan", examined=examined)
+        else:
+            if sized:
+                column = state["columns"][sized[0][1].column]
+                parts = [column["order"][start:stop] for start, stop in sized[0][2]]
+                base = np.concatenate(parts).astype(np.int64) if parts else np.empty(0, dtype=np.int64)
+            else:
+                base = np.arange(n)
+            examined, complete = len(base), True
+            if len(overlay):
+                base = base[~np.isin(base, overlay)]
+            base = filter_rows(df, base, ordered[1:])
+            plan.update(strategy="index", examined=examined)
+        extra = filter_rows(df, overlay, ordered)
+        candidates = np.concatenate([base.astype(np.int64), extra])
+        # A scan that stopped once the page was full has not counted every match
+        total = int(len(candidates)) if complete else None
+        if sort == "row":
+            rows = np.sort(candidates)
+            rows = rows[::-1] if descending else rows
+        else:
+            values = column_values(df, sort, candidates)
+            keys = np.where(np.isnan(values), np.inf, -values if descending else values)
+            rows = candidates[np.lexsort((candidates, keys))]
+        return {"rows": rows[offset:needed], "total": total, "plan": plan}
@@ -0,0 +1,449 @@
+"""
+Property store - the in-memory property table plus the derived indexes built from it.
+
+Deltas (new or changed listings) are upserted by key. Each DerivedIndex updates only the
+partitions the delta touches, so index maintenance scales with the size of the delta.
+Updates are copy-on-write: a refresh builds a new StoreState and swaps it in, so a
+request that already holds the previous frame and indexes reads a consistent view.
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Columns that identify a listing when upserting; rows whose key matches are replaced
+DEFAULT_KEY_COLUMNS = ("street", "city", "state", "zip_code")
+
+
+class Delta:
+    """Row positions affected by one refresh, plus the replaced rows' previous values"""
+
+    def __init__(self, appended, updated, previous):
+        self.appended = appended    # positions of new rows in the refreshed frame
+        self.updated = updated      # positions of rows whose values changed in place (sorted)
+        self.previous = previous    # the updated rows before the change, in the same order
+
+
+def _code_bytes(code) -> bytes:
+    """Bytecode and constants of a function, including nested functions (stable across processes)"""
+    parts = [code.co_code]
+    for const in code.co_consts:
+        parts.append(_code_bytes(const) if hasattr(const, "co_code") else repr(const).encode())
+    return b"\0".join(parts)
+
+
+class DerivedIndex:
+    """Base class for anything computed from the property table.
+
+    build() computes the index from the full frame; apply_delta() returns an updated
+    copy of the state (never mutate the old one in place: readers may still hold it).
+    The default apply_delta simply rebuilds. version() identifies how the state is computed,
+    so a persisted state is only reused by an index that would build the same thing.
+    Deferred indexes are too slow to build inline with a load; they are built by rebuild().
+    """
+    name = "index"
+    deferred = False
+
+    def version(self) -> str:
+        return type(self).__name__
+
+    def available(self, df) -> bool:
+        return True
+
+    def build(self, df) -> Any:
+        raise NotImplementedError
+
+    def apply_delta(self, state: Any, df, delta: Delta) -> Any:
+        return self.build(df)
+
+
+class KeyIndex(DerivedIndex):
+    """Hash of the key columns -> row position, used to find rows a delta replaces.
+
+    Appended keys go into a small overflow dict; the base index is rebuilt once the
+    overflow grows past a fraction of the table, so appends stay proportional to the delta.
+    """
+    name = "key"
+
+    def __init__(self, columns: Sequence[str] = DEFAULT_KEY_COLUMNS, rebuild_fraction: float = 0.1):
+        self.columns = list(columns)
+        self.rebuild_fraction = rebuild_fraction
+
+    def version(self) -> str:
+        return f"KeyIndex:{','.join(self.columns)}"
+
+    def available(self, df) -> bool:
+        return all(c in df.columns for c in self.columns)
+
+    def hashes(self, frame):
+        import pandas as pd
+        return pd.util.hash_pandas_object(frame[self.columns], index=False).to_numpy()
+
+    def build(self, df) -> Dict:
+        import numpy as np
+        import pandas as pd
+        hashes = self.hashes(df)
+        # Keep the last row for duplicate keys, matching upsert semantics
+        series = pd.Series(np.arange(len(df)), index=hashes)
+        series = series[~series.index.duplicated(keep="last")]
+        return {"base": series, "overflow": {}}
+
+    def lookup(self, state: Dict, hashes):
+        """Row position for each hash, or -1"""
+        import numpy as np
+        positions = state["base"].index.get_indexer(hashes)
+        positions = np.where(positions >= 0, state["base"].to_numpy()[np.clip(positions, 0, None)], -1)
+        overflow = state["overflow"]
+        if overflow:
+            positions = np.array([overflow.get(h, p) for h, p in zip(hashes.tolist(), positions.tolist())], dtype=np.int64)
+        return positions
+
+    def apply_delta(self, state: Dict, df, delta: Delta) -> Dict:
+        if len(delta.appended) == 0:
+            return state  # updates keep their keys and positions
+        overflow = dict(state["overflow"])
+        overflow.update(zip(self.hashes(df.iloc[delta.appended]).tolist(), delta.appended.tolist()))
+        if len(overflow) > self.rebuild_fraction * len(df):
+            return self.build(df)
+        return {"base": state["base"], "overflow": overflow}
+
+
+class PartitionIndex(DerivedIndex):
+    """Row positions and aggregate stats per partition key (zip, state/city, cluster, ...).
+
+    Every partition gets a "count". aggregate(frame), if given, returns further stats as a
+    DataFrame indexed by key; it only sees the key columns plus `required`, and those of
+    `optional` the table has. A delta
+    recomputes stats just for the partitions it touched, so its cost follows the size of
+    those partitions rather than the whole table.
+    """
+
+    def __init__(self, name: str, columns: Sequence[str], aggregate: Optional[Callable] = None,
+                 required: Sequence[str] = (), optional: Sequence[str] = ()):
+        self.name = name
+        self.columns = list(columns)
+        self.aggregate = aggregate
+        self.required = list(required)
+        self.optional = list(optional)
+
+    def version(self) -> str:
+        parts = [self.name, ",".join(self.columns), ",".join(self.required + self.optional)]
+        if self.aggregate is not None:
+            # The aggregate's bytecode, so editing it invalidates persisted stats
+            code = getattr(self.aggregate, "__code__", None)
+            parts.append(hashlib.sha256(_code_bytes(code) if code else repr(self.aggregate).encode()).hexdigest()[:12])
+        return "PartitionIndex:" + ":".join(parts)
+
+    def available(self, df) -> bool:
+        return all(c in df.columns for c in self.columns + self.required)
+
+    def _key(self, value):
+        return value if len(self.columns) > 1 else value[0]
+
+    def _row_keys(self, frame) -> List:
+        """Partition key of every row with a complete key, plus the mask of those rows"""
+        key_frame = frame[self.columns]
+        valid = key_frame.notna().all(axis=1).to_numpy()
+        return [self._key(k) for k in key_frame[valid].itertuples(index=False, name=None)], valid
+
+    def _stats(self, df, positions: Dict, keys) -> Dict:
+        import numpy as np
+
+        stats = {key: {"count": len(positions[key])} for key in keys if key in positions}
+        if self.aggregate is not None and stats:
+            rows = np.concatenate([positions[key] for key in stats])
+            # Gather only the touched rows of the needed columns (df[cols] would copy every row first)
+            needed = self.columns + self.required + [c for c in self.optional if c in df.columns]
+            frame = df.iloc[rows, [df.columns.get_loc(c) for c in needed]]
+            for key, values in self.aggregate(frame).to_dict("index").items():
+                if key in stats:
+                    stats[key].update(values)
+        return stats
+
+    def build(self, df) -> Dict:
+        group_by = self.columns if len(self.columns) > 1 else self.columns[0]
+        positions = df.groupby(group_by, sort=False, dropna=True).indices
+        # "touched" lists the keys changed by the refresh that produced this state (None = all)
+        return {"positions": positions, "stats": self._stats(df, positions, positions.keys()), "touched": None}
+
+    def apply_delta(self, state: Dict, df, delta: Delta) -> Dict:
+        import numpy as np
+
+        removals: Dict[Any, List[int]] = {}
+        if len(delta.updated):
+            # Updated rows leave their old partition (they are re-added below, possibly elsewhere)
+            old_keys, old_valid = self._row_keys(delta.previous)
+            old_rows = delta.updated[old_valid]
+            for key, row in zip(old_keys, old_rows.tolist()):
+                removals.setdefault(key, []).append(row)
+        changed_rows = np.concatenate([delta.appended, delta.updated])
+        new_keys, new_valid = self._row_keys(df.iloc[changed_rows])
+        additions: Dict[Any, List[int]] = {}
+        for key, row in zip(new_keys, changed_rows[new_valid].tolist()):
+            additions.setdefault(key, []).append(row)
+
+        touched = set(removals) | set(additions)
+        if not touched:
+            return {**state, "touched": set()}
+        positions = dict(state["positions"])
+        for key in touched:
+            rows = positions.get(key, np.empty(0, dtype=np.int64))
+            if key in removals:
+                rows = rows[~np.isin(rows, removals[key], assume_unique=True)]
+            if key in additions:
+                rows = np.sort(np.concatenate([rows, additions[key]]))
+            if len(rows):
+                positions[key] = rows
+            else:
+                positions.pop(key, None)
+
+        stats = dict(state["stats"])
+        for key in touched:
+            stats.pop(key, None)
+        stats.update(self._stats(df, positions, touched))
+        return {"positions": positions, "stats": stats, "touched": touched}
+
+
+class MomentIndex(DerivedIndex):
+    """Count, sum and sum of squares of one value column per partition key.
+
+    These are running sums, so a delta subtracts the replaced rows and adds the new ones:
+    maintenance is O(delta) however large the partition. moments() turns an entry into
+    (count, mean, std). With positive=True only finite values > 0 are counted (prices).
+    """
+
+    def __init__(self, name: str, columns: Sequence[str], value: str, positive: bool = True):
+        self.name = name
+        self.columns = list(columns)
+        self.value = value
+        self.positive = positive
+
+    def version(self) -> str:
+        return f"MomentIndex:{self.name}:{','.join(self.columns)}:{self.value}:{self.positive}"
+
+    def available(self, df) -> bool:
+        return all(c in df.columns for c in self.columns + [self.value])
+
+    def _sums(self, frame, rows=None) -> Dict[Any, Tuple[float, float, float]]:
+        import numpy as np
+
+        cols = [frame.columns.get_loc(c) for c in self.columns + [self.value]]
+        frame = frame.iloc[:, cols] if rows is None else frame.iloc[rows, cols]
+        values = frame[self.value].to_numpy(dtype="float64", na_value=np.nan)
+        valid = np.isfinite(values) & frame[self.columns].notna().all(axis=1).to_numpy()
+        if self.positive:
+            valid &= values > 0
+        if not valid.any():
+            return {}
+        frame = frame[valid].assign(_sq=values[valid] ** 2)
+        group_by = self.columns if len(self.columns) > 1 else self.columns[0]
+        grouped = frame.groupby(group_by, sort=False).agg(n=(self.value, "count"), s=(self.value, "sum"), ss=("_sq", "sum"))
+        return dict(zip(grouped.index, zip(grouped["n"].astype(float), grouped["s"], grouped["ss"])))
+
+    def build(self, df) -> Dict:
+        return {"sums": self._sums(df)}
+
+    def apply_delta(self, state: Dict, df, delta: Delta) -> Dict:
+        import numpy as np
+
+        sums = dict(state["sums"])
+
+        def add(key, entry, sign):
+            n, s, ss = sums.get(key, (0.0, 0.0, 0.0))
+            n, s, ss = n + sign * entry[0], s + sign * entry[1], ss + sign * entry[2]
+            if n > 0.5:
+                sums[key] = (n, s, ss)
+            else:
+                sums.pop(key, None)
+
+        if len(delta.updated):
+            for key, entry in self._sums(delta.previous).items():
+                add(key, entry, -1)
+        changed = np.concatenate([delta.appended, delta.updated])
+        if len(changed):
+            for key, entry in self._sums(df, changed).items():
+                add(key, entry, 1)
+        return {"sums": sums}
+
+
+def moments(entry: Optional[Tuple[float, float, float]]) -> Tuple[int, float, float]:
+    """(count, mean, population std) of a MomentIndex entry; (0, nan, nan) when missing"""
+    if not entry or entry[0] <= 0:
+        return 0, float("nan"), float("nan")
+    n, s, ss = entry
+    mean = s / n
+    # Clamp tiny negative variances left by floating point cancellation
+    return int(round(n)), mean, max(ss / n - mean * mean, 0.0) ** 0.5
+
+
+class StoreState:
+    """Immutable view: one version of the frame and every index built from it"""
+
+    def __init__(self, df, indexes: Dict[str, Any], generation: int):
+        self.df = df
+        self.indexes = indexes
+        self.generation = generation
+
+
+class PropertyStore:
+    """Owns the property frame and its registered derived indexes"""
+
+    def __init__(self, key_columns: Sequence[str] = DEFAULT_KEY_COLUMNS):
+        self.key = KeyIndex(key_columns)
+        self.derived: Dict[str, DerivedIndex] = {self.key.name: self.key}
+        self.state: Optional[StoreState] = None
+        self._lock = threading.Lock()
+        self.last_refresh: Optional[Dict] = None
+
+    def register(self, index: DerivedIndex):
+        self.derived[index.name] = index
+
+    @property
+    def df(self):
+        return self.state.df if self.state else None
+
+    def index(self, name: str) -> Optional[Any]:
+        """Current state of a derived index, or None if it is not built"""
+        return self.state.indexes.get(name) if self.state else None
+
+    def load(self, df) -> StoreState:
+        """Build every available index from a freshly loaded frame"""
+        indexes = {}
+        for name, index in self.derived.items():
+            if index.deferred:
+                continue
+            if not index.available(df):
+                logger.warning(f"   ⚠️ Skipping {name} index: required columns missing")
+                continue
+            start = time.perf_counter()
+            indexes[name] = index.build(df)
+            logger.info(f"   Built {name} index in {time.perf_counter() - start:.2f}s")
+        self.state = StoreState(df, indexes, generation=(self.state.generation + 1) if self.state else 1)
+        return self.state
+
+    def rebuild(self, name: str, build: Optional[Callable] = None) -> Optional[StoreState]:
+        """Rebuild one index on the current frame, e.g. after a model it depends on changed.
+
+        build(df) replaces the index's own build (e.g. to pass options). The build runs
+        without holding the lock so ingestion is not blocked; if a delta lands meanwhile,
+        it is repeated on the new frame.
+        """
+        index = self.derived[name]
+        build = build or index.build
+        while True:
+            state = self.state
+            if state is None or not index.available(state.df):
+                return state
+            start = time.perf_counter()
+            built = build(state.df)
+            with self._lock:
+                if self.state.df is state.df:
+                    self.state = StoreState(state.df, {**self.state.indexes, name: built}, self.state.generation + 1)
+                    logger.info(f"   Rebuilt {name} index in {time.perf_counter() - start:.2f}s")
+                    return self.state
+
+    def versions(self) -> Dict[str, str]:
+        return {name: index.version() for name, index in self.derived.items()}
+
+    def restore(self, df, indexes: Dict[str, Any], versions: Dict[str, str]) -> StoreState:
+        """Adopt persisted index states; indexes that are missing or were built differently are rebuilt"""
+        current = {}
+        for name, index in self.derived.items():
+            if name in indexes and versions.get(name) == index.version():
+                current[name] = indexes[name]
+            elif not index.deferred and index.available(df):
+                start = time.perf_counter()
+                current[name] = index.build(df)
+                logger.info(f"   Rebuilt {name} index in {time.perf_counter() - start:.2f}s (not in snapshot)")
+        self.state = StoreState(df, current, generation=(self.state.generation + 1) if self.state else 1)
+        return self.state
+
+    def _normalize(self, rows, df):
+        """Align a delta with the frame's columns and dtypes"""
+        import pandas as pd
+
+        delta = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        delta = delta.reindex(columns=df.columns)
+        for col in df.columns:
+            dtype = df[col].dtype
+            if pd.api.types.is_numeric_dtype(dtype):
+                values = pd.to_numeric(delta[col], errors="coerce")
+                # Integer columns stay integer unless the delta has gaps
+                delta[col] = values.astype(dtype) if dtype.kind in "iu" and values.notna().all() else values.astype("float64")
+        if self.key.available(df):
+            missing = [c for c in self.key.columns if delta[c].isna().all()]
+            if missing:
+                raise ValueError(f"delta rows are missing key columns {missing}")
+            # Last occurrence wins within one batch
+            delta = delta.iloc[~pd.Series(self.key.hashes(delta)).duplicated(keep="last").to_numpy()]
+        return delta.reset_index(drop=True)
+
+    def ingest(self, rows) -> Dict:
+        """Upsert rows (list of dicts or DataFrame) and refresh every index incrementally.
+
+        The frame itself is copied once per delta (concat for appends, copy() for pure updates)
+        rather than kept as append-only chunks: every index build, endpoint and the snapshot read
+        a single contiguous DataFrame, and the copy is what lets readers keep the previous state
+        without locking. It is a flat O(rows) memcpy (~50-70 ms at 1M rows); the index refresh
+        is the bulk of an ingest from 100 rows up.
+        """
+        import numpy as np
+        import pandas as pd
+
+        with self._lock:
+            state = self.state
+            if state is None or state.df is None:
+                raise RuntimeError("property data not loaded")
+            start = time.perf_counter()
+            df = state.df
+            delta_rows = self._normalize(rows, df)
+
+            key_state = state.indexes.get(self.key.name)
+            matches = self.key.lookup(key_state, self.key.hashes(delta_rows)) if key_state else np.full(len(delta_rows), -1)
+            is_update = matches >= 0
+            updated = matches[is_update].astype(np.int64)
+            new_rows = delta_rows[~is_update]
+
+            # pandas has no in-place append: concat (or copy) is one O(rows) memcpy, but it leaves
+            # the frame readers currently hold untouched. Everything after this is O(delta).
+            new_df = pd.concat([df, new_rows], ignore_index=True) if len(new_rows) else df.copy()
+            updated = np.sort(updated)
+            previous = df.iloc[updated]
+            if len(updated):
+                changes = delta_rows[is_update].iloc[np.argsort(matches[is_update], kind="stable")]
+                for col in df.columns:
+                    values = changes[col].to_numpy()
+                    keep = pd.isna(values) if col not in self.key.columns else np.zeros(len(values), bool)
+                    # Absent fields keep their current value (partial updates); read it from the
+                    # updated rows only, not the whole column (to_numpy copies string columns)
+                    current = previous[col].to_numpy()
+                    new_df.iloc[updated, new_df.columns.get_loc(col)] = np.where(keep, current, values)
+            appended = np.arange(len(df), len(new_df), dtype=np.int64)
+            delta = Delta(appended, updated, previous)
+            upsert_s = time.perf_counter() - start
+
+            indexes, timings = {}, {}
+            for name, index in self.derived.items():
+                if name not in state.indexes:
+                    continue
+                t = time.perf_counter()
+                indexes[name] = index.apply_delta(state.indexes[name], new_df, delta)
+                timings[name] = round((time.perf_counter() - t) * 1000, 2)
+
+            self.state = StoreState(new_df, indexes, state.generation + 1)
+            self.last_refresh = {
+                "received": int(len(delta_rows)),
+                "appended": int(len(appended)),
+                "updated": int(len(updated)),
+                "rows_total": int(len(new_df)),
+                "generation": self.state.generation,
+                "upsert_ms": round(upsert_s * 1000, 2),
+                "index_ms": timings,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            }
+            logger.info(f"✅ Ingested {len(delta_rows):,} rows ({len(appended):,} new, {len(updated):,} updated) "
+                        f"in {self.last_refresh['elapsed_ms']}ms")
+            return self.last_refresh
@@ -0,0 +1,272 @@
+"""
+Upstream resilience - token-bucket rate limiting, retry with jittered backoff
+and a circuit breaker for the external APIs used by EducationService
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional
+
+if TYPE_CHECKING:  # httpx is imported on first call, keeping it out of process startup
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limited or upstream trouble
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised instead of calling an upstream that is known to be unhealthy or over its budget"""
+
+    def __init__(self, upstream: str, reason: str, retry_after: float = 0.0):
+        super().__init__(f"{upstream} unavailable: {reason}")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursting up to `capacity`.
+
+    A rate of 0 (or below) disables the limit: every acquire succeeds immediately.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Take one token, waiting at most max_wait seconds. Returns False if that is not enough.
+
+        The token is reserved under the lock (the balance may go negative, so callers queued
+        ahead push the wait out) and the sleep happens after releasing it, so one waiter never
+        blocks others from reserving or failing fast.
+        """
+        if not self.enabled:
+            return True
+        async with self._lock:
+            self._refill()
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if wait > max_wait:
+                return False
+            self.tokens -= 1
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                self.tokens += 1  # hand the reservation back if cancelled while waiting
+                raise
+        return True
+
+
+class StaleCache:
+    """Last good responses, served while an upstream is failing.
+
+    Keys come from user input (queries, topics), so the cache is bounded: at most
+    max_entries, least recently used evicted first, and entries expire after ttl seconds.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return entry[1]
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open breaker driven by consecutive failures"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            # Let exactly one probe through; everyone else keeps failing fast. A probe that
+            # never reported back (lost without record() or release()) expires after reset_timeout.
+            if self._probe_in_flight and now - self._probe_started < self.reset_timeout:
+                return False
+            self._probe_in_flight = True
+            self._probe_started = now
+        return True
+
+    def release(self):
+        """Give back a half-open probe slot that was admitted but never used"""
+        self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"Circuit opened after {self.consecutive_failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class UpstreamGuard:
+    """Rate limiter + retry/backoff + circuit breaker for one upstream API"""
+
+    def __init__(self, name: str, rate: float, burst: float, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, max_attempts: int = 3,
+                 base_backoff: float = 0.5, max_backoff: float = 8.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stats = {"calls": 0, "failures": 0, "retries": 0, "rejected": 0, "rate_limited": 0}
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        # Full jitter: uniform in [0, base * 2^attempt], but never less than Retry-After
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    async def admit(self, deadline: float):
+        """Check the breaker and take a rate-limit token before an upstream call"""
+        if not self.breaker.allow():
+            self.stats["rejected"] += 1
+            raise UpstreamUnavailableError(self.name, "circuit open", self.breaker.retry_after())
+        try:
+            acquired = await self.bucket.acquire(max(0.0, deadline - time.monotonic()))
+        except BaseException:
+            self.breaker.release()  # cancelled while waiting for a token
+            raise
+        if not acquired:
+            self.breaker.release()
+            self.stats["rate_limited"] += 1
+            raise UpstreamUnavailableError(self.name, "local rate limit", 1.0 / self.bucket.rate)
+
+    def settle(self, ok: Optional[bool]):
+        """Record the outcome of an admitted call; None (cancelled before any verdict) frees its slot"""
+        if ok is None:
+            self.breaker.release()
+        else:
+            self.record(ok)
+
+    def record(self, ok: bool):
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.stats["failures"] += 1
+            self.breaker.record_failure()
+
+    async def call(self, send: Callable[[float], Awaitable["httpx.Response"]], timeout: float) -> "httpx.Response":
+        """Run send(attempt_timeout) with admission control, retrying 429/5xx and transport errors.
+
+        All attempts together stay within `timeout` seconds, so a struggling
+        upstream never holds a request longer than a single call used to.
+        """
+        import httpx
+
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            await self.admit(deadline)
+            self.stats["calls"] += 1
+            retry_after = None
+            try:
+                response = await send(max(0.1, deadline - time.monotonic()))
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                self.record(False)
+                error = e
+                response = None
+            except Exception:
+                # Not retried (e.g. DecodingError, TooManyRedirects), but still an upstream failure
+                self.record(False)
+                raise
+            except BaseException:
+                # Cancelled: no verdict on the upstream, but the probe slot must not leak
+                self.settle(None)
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.record(True)
+                    return response
+                self.record(False)
+                error = None
+                header = response.headers.get("retry-after")
+                if header and header.replace(".", "", 1).isdigit():
+                    retry_after = float(header)
+
+            attempt += 1
+            delay = self._backoff(attempt, retry_after)
+            if attempt >= self.max_attempts or time.monotonic() + delay >= deadline:
+                if response is not None:
+                    return response  # caller's raise_for_status reports the final status
+                raise error
+            self.stats["retries"] += 1
+            logger.info(f"Retrying {self.name} in {delay:.2f}s (attempt {attempt + 1}/{self.max_attempts})")
+            await asyncio.sleep(delay)
+
+    def snapshot(self) -> Dict:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "times_opened": self.breaker.times_opened,
+            "tokens_available": round(self.bucket.tokens, 2),
+            **self.stats,
+        }
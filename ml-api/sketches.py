@@ -0,0 +1,84 @@
+"""
+Quantile sketches - log-bucket (DDSketch-style) sketches kept as plain numpy arrays.
+
+A value x > 0 falls in bucket ceil(log(x) / log(GAMMA)) with GAMMA = (1 + a) / (1 - a), and
+is represented by 2 * GAMMA^i / (GAMMA + 1); every value in a bucket is within the relative
+accuracy a of that representative, so a quantile read from bucket counts is within a of the
+exact quantile's value. Merging sketches adds their bucket counts, which makes sketches of
+any selection of cells or regions exact to merge, and lets a delta subtract the rows it
+replaced (negative counts cancel out).
+
+Many sketches are stored together as (group, bucket, count) triples sorted by group, then
+bucket; building, merging and reading quantiles are each a few vectorized passes over them.
+"""
+import math
+from typing import Sequence, Tuple
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+# Buckets above 0 cover values up to GAMMA ** BUCKETS (~1e9 at 1%); larger values share the last one
+BUCKETS = 1024
+
+
+def bucket_of(values):
+    """Bucket of each value; -1 for values that are missing or not positive"""
+    import numpy as np
+
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        buckets = np.ceil(np.log(np.maximum(values, 1.0)) / _LOG_GAMMA)
+    return np.where(values > 0, np.clip(np.nan_to_num(buckets), 0, BUCKETS - 1), -1).astype(np.int16)
+
+
+def bucket_value(buckets):
+    """Representative value of each bucket"""
+    import numpy as np
+
+    return 2 * np.power(GAMMA, np.asarray(buckets, dtype=float)) / (GAMMA + 1)
+
+
+def merge(groups, buckets, counts) -> Tuple:
+    """Sum the counts of equal (group, bucket) pairs; returns sorted triples without empty buckets.
+
+    Counts may be negative (rows being subtracted); they are kept until merged with the rows they cancel.
+    """
+    import numpy as np
+
+    groups = np.asarray(groups, dtype=np.int64)
+    keep = np.asarray(buckets) >= 0
+    combined = groups[keep] * BUCKETS + np.asarray(buckets, dtype=np.int64)[keep]
+    weights = np.asarray(counts, dtype=float)[keep]
+    span = int(combined.max()) + 1 if len(combined) else 0
+    if span <= max(4 * len(combined), 1 << 22):
+        # Few groups: count every (group, bucket) pair densely, O(n + span) instead of a sort
+        summed = np.bincount(combined, weights=weights, minlength=span)
+        pairs = np.arange(span)
+    else:
+        pairs, inverse = np.unique(combined, return_inverse=True)
+        summed = np.bincount(inverse, weights=weights, minlength=len(pairs))
+    nonzero = summed != 0
+    pairs = pairs[nonzero]
+    return (pairs // BUCKETS).astype(np.int32), (pairs % BUCKETS).astype(np.int16), np.rint(summed[nonzero]).astype(np.int32)
+
+
+def quantiles(groups, buckets, counts, n_groups: int, qs: Sequence[float]):
+    """(n_groups x len(qs)) quantile values from merged triples; NaN for groups without values"""
+    import numpy as np
+
+    result = np.full((n_groups, len(qs)), np.nan)
+    if len(groups) == 0:
+        return result
+    counts = np.maximum(counts, 0)
+    totals = np.bincount(groups, weights=counts, minlength=n_groups)
+    cumulative = np.cumsum(counts, dtype=float)
+    # Counts before each group's first triple; the cumulative sum is non-decreasing, so one
+    # searchsorted finds the bucket holding a rank for every group at once
+    first = np.searchsorted(groups, np.arange(n_groups))
+    before = np.where(first > 0, cumulative[np.maximum(first - 1, 0)], 0.0)
+    present = totals > 0
+    for j, q in enumerate(qs):
+        rank = before[present] + q * (totals[present] - 1)
+        positions = np.minimum(np.searchsorted(cumulative, rank, side="right"), len(cumulative) - 1)
+        result[present, j] = bucket_value(buckets[positions])
+    return result
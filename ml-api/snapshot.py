@@ -0,0 +1,174 @@
+"""
+Startup snapshot - everything load_models derives from the model directory, saved after a
+successful load so the next boot restores it instead of re-parsing CSVs and rebuilding indexes.
+
+Layout of the snapshot directory:
+
+    manifest.json          format, source file signatures, frame column layout, extra metadata
+    frames/<frame>/<i>.npy  numeric columns, memory-mapped on restore (no parse, no copy)
+    frames/<frame>/<i>.pkl  every other column (strings, dates) as a pickled Series
+    objects.pkl             small Python objects: cluster metadata, derived index states
+
+A snapshot is only used when its format matches and every source file still has the size,
+mtime and head/tail hash it had when the snapshot was written. It is written to a temporary
+directory and renamed into place, so a crash mid-write never leaves a half snapshot behind.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout or the meaning of anything stored changes
+SNAPSHOT_FORMAT = 1
+
+# Bytes hashed from each end of a source file; a full hash would cost as much as parsing it
+_SAMPLE_BYTES = 1 << 20
+
+
+def source_signature(path: Path) -> Optional[Dict]:
+    """Size, mtime and a hash of the first and last MiB, or None if the file does not exist"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    stat = path.stat()
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read(_SAMPLE_BYTES))
+        if stat.st_size > _SAMPLE_BYTES:
+            f.seek(max(_SAMPLE_BYTES, stat.st_size - _SAMPLE_BYTES))
+            digest.update(f.read(_SAMPLE_BYTES))
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sample_sha256": digest.hexdigest()[:16]}
+
+
+def _save_frame(df, directory: Path) -> Dict:
+    import numpy as np
+    import pandas as pd
+
+    directory.mkdir(parents=True)
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df.iloc[:, i]
+        dtype = series.dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in "biufc":
+            np.save(directory / f"{i}.npy", series.to_numpy(), allow_pickle=False)
+            kind = "npy"
+        else:
+            with open(directory / f"{i}.pkl", "wb") as f:
+                pickle.dump(series.reset_index(drop=True), f, protocol=pickle.HIGHEST_PROTOCOL)
+            kind = "pkl"
+        columns.append({"name": name, "kind": kind})
+    index = None
+    if not (isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1):
+        with open(directory / "index.pkl", "wb") as f:
+            pickle.dump(df.index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        index = "index.pkl"
+    return {"rows": len(df), "columns": columns, "index": index}
+
+
+def _load_frame(layout: Dict, directory: Path):
+    import numpy as np
+    import pandas as pd
+
+    data = {}
+    for i, column in enumerate(layout["columns"]):
+        if column["kind"] == "npy":
+            # Read-only pages shared with the OS cache; copy-on-write pandas copies before any write
+            data[column["name"]] = np.load(directory / f"{i}.npy", mmap_mode="r")
+        else:
+            with open(directory / f"{i}.pkl", "rb") as f:
+                data[column["name"]] = pickle.load(f)
+    index = None
+    if layout["index"]:
+        with open(directory / layout["index"], "rb") as f:
+            index = pickle.load(f)
+    df = pd.DataFrame(data, copy=False)
+    if index is not None:
+        df.index = index
+    if len(df) != layout["rows"]:
+        raise ValueError(f"expected {layout['rows']} rows, found {len(df)}")
+    return df
+
+
+class StartupSnapshot:
+    """Reads and writes one snapshot directory"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def manifest(self) -> Optional[Dict]:
+        try:
+            return json.loads((self.directory / "manifest.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def save(self, sources: Dict[str, Path], frames: Dict[str, Any], objects: Dict[str, Any],
+             extra: Optional[Dict] = None) -> Dict:
+        """Write frames (DataFrames or None) and picklable objects, tagged with the source signatures"""
+        start = time.perf_counter()
+        tmp = self.directory.with_name(f"{self.directory.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        try:
+            layouts = {name: _save_frame(df, tmp / "frames" / name) if df is not None else None
+                       for name, df in frames.items()}
+            with open(tmp / "objects.pkl", "wb") as f:
+                pickle.dump(objects, f, protocol=pickle.HIGHEST_PROTOCOL)
+            manifest = {
+                "format": SNAPSHOT_FORMAT,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "sources": {name: source_signature(path) for name, path in sources.items()},
+                "frames": layouts,
+                **(extra or {}),
+            }
+            (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2, default=str))
+            # Swap directories: the old snapshot stays valid until the new one is complete
+            old = self.directory.with_name(f"{self.directory.name}.old-{os.getpid()}")
+            if self.directory.exists():
+                self.directory.rename(old)
+            tmp.rename(self.directory)
+            shutil.rmtree(old, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        elapsed = time.perf_counter() - start
+        logger.info(f"💾 Startup snapshot written to {self.directory} in {elapsed:.2f}s")
+        return manifest
+
+    def stale_reason(self, manifest: Optional[Dict], sources: Dict[str, Path]) -> Optional[str]:
+        """Why the snapshot cannot be used, or None if it matches the current source files"""
+        if manifest is None:
+            return "no snapshot"
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            return f"format {manifest.get('format')} != {SNAPSHOT_FORMAT}"
+        saved = manifest.get("sources", {})
+        for name, path in sources.items():
+            if saved.get(name) != source_signature(path):
+                return f"{Path(path).name} changed"
+        return None
+
+    def load(self, sources: Dict[str, Path]):
+        """(frames, objects, manifest) if the snapshot is valid for these sources, else None"""
+        start = time.perf_counter()
+        manifest = self.manifest()
+        reason = self.stale_reason(manifest, sources)
+        if reason:
+            logger.info(f"   Startup snapshot not used: {reason}")
+            return None
+        try:
+            frames = {name: _load_frame(layout, self.directory / "frames" / name) if layout else None
+                      for name, layout in manifest["frames"].items()}
+            with open(self.directory / "objects.pkl", "rb") as f:
+                objects = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"   ⚠️ Startup snapshot unreadable, loading from source files: {e}")
+            return None
+        logger.info(f"⚡ Startup snapshot from {manifest['created_at']} restored in {time.perf_counter() - start:.2f}s")
+        return frames, objects, manifest
@@ -0,0 +1,91 @@
+"""
+Lazy subsystems - named parts of the API state (model artifacts, property tables) that
+load on first use instead of all at once at startup.
+
+Each subsystem has a blocking loader, run in a worker thread, and the route prefixes that
+need it. Loading is single flight: concurrent first requests wait for the same load.
+ML_API_WARMUP lists the subsystems loaded right after startup ("all", "none" or a comma
+separated list); the rest load when a request first needs them.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class Subsystem:
+    def __init__(self, name: str, loader: Callable[[], None], routes: Sequence[str]):
+        self.name = name
+        self.loader = loader
+        self.routes = tuple(routes)
+        self.state = "pending"      # pending -> loading -> loaded | failed
+        self.error: Optional[str] = None
+        self.load_s: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def info(self) -> Dict:
+        return {"state": self.state, "load_s": self.load_s, "error": self.error}
+
+
+class Subsystems:
+    def __init__(self):
+        self._items: Dict[str, Subsystem] = {}
+
+    def register(self, name: str, loader: Callable[[], None], routes: Sequence[str] = ()):
+        self._items[name] = Subsystem(name, loader, routes)
+
+    def names(self) -> List[str]:
+        return list(self._items)
+
+    def parse(self, spec: Optional[str]) -> List[str]:
+        """Subsystem names from an ML_API_WARMUP style value"""
+        spec = (spec or "all").strip().lower()
+        if spec == "all":
+            return self.names()
+        if spec in ("none", "off", "0"):
+            return []
+        names = [name.strip() for name in spec.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self._items]
+        if unknown:
+            logger.warning(f"⚠️ Unknown subsystems {unknown} ignored (known: {self.names()})")
+        return [name for name in names if name in self._items]
+
+    def loaded(self, name: str) -> bool:
+        return self._items[name].state == "loaded"
+
+    def needed_for(self, path: str) -> List[str]:
+        """Subsystems a request path needs that have not been loaded (or attempted) yet"""
+        return [sub.name for sub in self._items.values()
+                if sub.state in ("pending", "loading") and path.startswith(sub.routes)]
+
+    async def ensure(self, names: Sequence[str], retry_failed: bool = False):
+        """Load the named subsystems (concurrently) unless already loaded; failures are not retried by default"""
+        await asyncio.gather(*(self._ensure(self._items[name], retry_failed) for name in names))
+
+    async def _ensure(self, sub: Subsystem, retry_failed: bool):
+        if sub.state == "loaded" or (sub.state == "failed" and not retry_failed):
+            return
+        if sub._task is None:
+            sub._task = asyncio.create_task(self._load(sub))
+        # Shielded: a client disconnecting must not cancel a load other requests are waiting on
+        await asyncio.shield(sub._task)
+
+    async def _load(self, sub: Subsystem):
+        sub.state = "loading"
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(sub.loader)
+            sub.state, sub.error = "loaded", None
+        except Exception as e:
+            sub.state, sub.error = "failed", f"{type(e).__name__}: {e}"
+            logger.error(f"❌ Loading {sub.name} failed: {e}", exc_info=True)
+        finally:
+            sub.load_s = round(time.perf_counter() - start, 3)
+            sub._task = None
+        if sub.state == "loaded":
+            logger.info(f"✅ {sub.name} subsystem loaded in {sub.load_s:.2f}s")
+
+    def status(self) -> Dict[str, Dict]:
+        return {name: sub.info() for name, sub in self._items.items()}
@@ -0,0 +1,81 @@
+"""
+A real API (main) on a small synthetic dataset, for tests that compare the derived indexes with
+pandas on the same rows: after the load, after an ingested delta (appends and updates), and
+after a restart that restores the startup snapshot and replays the delta on top of it.
+"""
+import asyncio
+import importlib
+import os
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROWS = 4000
+QUANTILE_TOLERANCE = 0.0101  # sketches.RELATIVE_ACCURACY, plus rounding in the response
+UPDATED, APPENDED = 150, 200
+
+
+def start(base: Path):
+    """Synthetic data under base, then main imported against it and its "data" subsystem loaded"""
+    from benchmarks.synthetic import write_dataset
+
+    (base / "models").mkdir()
+    write_dataset(base / "models", ROWS)
+    os.environ.update({"ML_MODELS_DIR": str(base / "models"), "ML_SNAPSHOT_DIR": str(base / "snapshot"),
+                       "ML_INGEST_DIR": str(base / "ingest"), "ML_FORECAST_TABLE_DIR": str(base / "forecast"),
+                       "ML_STARTUP_SNAPSHOT": "1"})
+    # main reads its directories at import time
+    sys.modules.pop("main", None)
+    main = importlib.import_module("main")
+    asyncio.run(main.load_models(["data"]))
+    wait_for_snapshot()
+    return main
+
+
+def wait_for_snapshot():
+    for thread in threading.enumerate():
+        if thread.name == "startup-snapshot":
+            thread.join()
+
+
+def delta(df):
+    """Updates to existing rows (price, beds, size) plus new rows, some in a new city and zip"""
+    rng = np.random.default_rng(7)
+    updates = df.iloc[rng.choice(len(df), UPDATED, replace=False)].copy()
+    updates["price"] = updates["price"] * rng.uniform(0.5, 2.5, len(updates))
+    updates["bed"] = rng.integers(1, 8, len(updates)).astype(float)
+    updates["house_size"] = updates["house_size"] + 250
+    appends = df.iloc[rng.choice(len(df), APPENDED, replace=False)].copy()
+    appends["street"] = 9_000_000 + np.arange(len(appends))
+    appends["price"] = rng.uniform(50_000, 2_500_000, len(appends)).round(-2)
+    new_city = appends.index[:30]
+    appends.loc[new_city, "city"] = "Brand New City"
+    appends.loc[new_city, "zip_code"] = 99_999
+    return pd.concat([updates, appends], ignore_index=True)
+
+
+def ingest(main):
+    """Journal and apply delta() as the ingest endpoint does"""
+    before = len(main.property_store.df)
+    summary = main.ingest_frame(delta(main.property_store.df))
+    assert summary["updated"] == UPDATED and summary["appended"] == APPENDED
+    assert len(main.property_store.df) == before + APPENDED
+
+
+def restart(main):
+    """Load the data again: restored from the startup snapshot, with the journal replayed on top"""
+    expected = main.property_store.df
+    main.load_data()
+    wait_for_snapshot()
+    assert main.snapshot_info["restored"]
+    pd.testing.assert_frame_equal(main.property_store.df.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False)
+
+
+def nth(prices, q):
+    """Value at the rank the sketches report: floor(q * (n - 1)) of the sorted prices"""
+    prices = np.sort(np.asarray(prices, dtype=float))
+    return prices[int(np.floor(q * (len(prices) - 1)))]
@@ -0,0 +1,27 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The API modules are flat files in ml-api/, imported as top-level modules (as `cd ml-api` does)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_API_ENV = ("ML_MODELS_DIR", "ML_SNAPSHOT_DIR", "ML_INGEST_DIR", "ML_FORECAST_TABLE_DIR", "ML_STARTUP_SNAPSHOT")
+
+
+@pytest.fixture(scope="module")
+def property_api(tmp_path_factory):
+    """(main, client) on a fresh synthetic dataset, shared by the tests of one module in order"""
+    import api_harness
+    from fastapi.testclient import TestClient
+
+    saved = {name: os.environ.get(name) for name in _API_ENV}
+    main = api_harness.start(tmp_path_factory.mktemp("api"))
+    yield main, TestClient(main.app)
+    sys.modules.pop("main", None)
+    for name, value in saved.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from comps import CompsIndex
+from property_store import PropertyStore
+
+ROWS = 3000
+
+
+def listings(rng, n: int, first_street: int = 0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "street": np.arange(first_street, first_street + n), "city": "Austin", "state": "Texas",
+        "zip_code": rng.choice([78701, 78702, 78703], n),
+        "lat": rng.uniform(30.1, 30.5, n), "lng": rng.uniform(-97.9, -97.5, n),
+        "house_size": rng.uniform(600, 4000, n).round(), "bed": rng.integers(1, 6, n).astype(float),
+        "bath": rng.integers(1, 4, n).astype(float), "acre_lot": rng.uniform(0.05, 1.0, n),
+        "price": rng.uniform(150_000, 1_500_000, n).round(-2),
+    })
+
+
+def brute_force(index: CompsIndex, state, df, point, k: int, rows=None):
+    """Every current row, in the scaling of the last build, sorted by distance"""
+    rows = np.arange(len(df)) if rows is None else np.asarray(rows)
+    points = index.transform(df.iloc[rows], state["scaling"])
+    distances = np.sqrt(((points - point) ** 2).sum(axis=1))
+    order = np.argsort(distances, kind="stable")[:k]
+    return rows[order], distances[order]
+
+
+def test_tree_plus_overlay_matches_brute_force_after_ingest():
+    rng = np.random.default_rng(3)
+    index = CompsIndex(rebuild_fraction=0.5)
+    store = PropertyStore()
+    store.register(index)
+    store.load(listings(rng, ROWS))
+
+    # Move some listings across town and change their size and price, and append new ones
+    updates = store.df.iloc[rng.choice(ROWS, 200, replace=False)].copy()
+    updates["lat"], updates["lng"] = rng.uniform(30.1, 30.5, 200), rng.uniform(-97.9, -97.5, 200)
+    updates["house_size"] = updates["house_size"] * 1.5
+    updates["price"] = updates["price"] * rng.uniform(0.5, 2.0, 200)
+    store.ingest(pd.concat([updates, listings(rng, 150, first_street=ROWS)], ignore_index=True))
+
+    state, df = store.index("comps"), store.df
+    assert len(df) == ROWS + 150 and len(state["overlay_rows"]) == 350  # served by tree + overlay, no rebuild
+    queries = listings(rng, 25, first_street=-100)
+    for k in (1, 10, 50):
+        for point in index.transform(queries, state["scaling"]):
+            found, distances = index.query(state, point, k)
+            expected, expected_distances = brute_force(index, state, df, point, k)
+            assert found.tolist() == expected.tolist()
+            assert np.allclose(distances, expected_distances, rtol=1e-5)
+
+    # Restricted to a partition (zip code), old and new rows alike
+    in_zip = np.flatnonzero(df["zip_code"].to_numpy() == 78702)
+    point = index.transform(queries.iloc[:1], state["scaling"])[0]
+    found, _ = index.query(state, point, 10, in_zip)
+    assert found.tolist() == brute_force(index, state, df, point, 10, in_zip)[0].tolist()
@@ -0,0 +1,47 @@
+import math
+
+import numpy as np
+
+from forecast_bands import PERCENTILES, simulate_bands
+
+CURRENT = 400_000.0
+HORIZONS = [1, 5, 10]
+POINTS = [412_000.0, 470_000.0, 560_000.0]
+RESIDUAL, DRIFT, ANNUAL = 0.12, 0.015, 0.04
+
+
+def per_path_bands(paths: int, seed: int):
+    """The straightforward version: walk each path year by year, same draws in the same order"""
+    rng = np.random.default_rng(seed)
+    valuation = rng.standard_normal((paths, 1), dtype=np.float32)[:, 0]
+    drift = rng.standard_normal((paths, 1), dtype=np.float32)[:, 0]
+    shocks = rng.standard_normal((paths, max(HORIZONS)), dtype=np.float32)
+    columns = [[] for _ in range(len(HORIZONS) + 1)]
+    for p in range(paths):
+        offset = float(valuation[p]) * RESIDUAL
+        columns[0].append(CURRENT * math.exp(offset))
+        walk = 0.0
+        for year in range(1, max(HORIZONS) + 1):
+            walk += float(shocks[p, year - 1]) * ANNUAL
+            if year in HORIZONS:
+                i = HORIZONS.index(year)
+                columns[i + 1].append(POINTS[i] * math.exp(offset + float(drift[p]) * DRIFT * year + walk))
+    return [{f"p{q}": float(np.percentile(values, q)) for q in PERCENTILES} for values in columns]
+
+
+def test_vectorized_bands_match_the_per_path_loop():
+    bands = simulate_bands(CURRENT, POINTS, HORIZONS, RESIDUAL, DRIFT, ANNUAL, paths=2_000, seed=7)
+    expected = per_path_bands(2_000, seed=7)
+    assert [band["years_ahead"] for band in bands] == [0, *HORIZONS]
+    for band, reference in zip(bands, expected):
+        for key, value in reference.items():
+            # float32 draws accumulated in float32 (vectorized) vs float64 (loop)
+            assert math.isclose(band[key], value, rel_tol=1e-5), (band["years_ahead"], key)
+
+
+def test_fixed_seed_is_reproducible_and_centred_on_the_forecast():
+    first = simulate_bands(CURRENT, POINTS, HORIZONS, RESIDUAL, DRIFT, ANNUAL, paths=10_000, seed=1)
+    assert first == simulate_bands(CURRENT, POINTS, HORIZONS, RESIDUAL, DRIFT, ANNUAL, paths=10_000, seed=1)
+    for band in first:
+        assert band["p10"] < band["point"] < band["p90"]
+        assert math.isclose(band["p50"], band["point"], rel_tol=0.02)
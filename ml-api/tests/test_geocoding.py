@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from geocoding import JITTER_DEGREES, SOURCES, ZipGeocoder, jitter
+
+
+def test_jitter_is_a_pure_function_of_zip_and_key():
+    zips = [78701, 78701, 10001, 78701]
+    keys = ["12 Oak St", "9 Elm St", "12 Oak St", "12 Oak St"]
+    d_lat, d_lng = jitter(zips, keys)
+    again_lat, again_lng = jitter(zips[::-1], keys[::-1])
+    assert np.array_equal(d_lat, again_lat[::-1]) and np.array_equal(d_lng, again_lng[::-1])
+    # Same (zip, key) anywhere in a batch: same offset; another key or zip: another offset
+    assert (d_lat[0], d_lng[0]) == (d_lat[3], d_lng[3])
+    assert d_lat[0] != d_lat[1] and d_lat[0] != d_lat[2]
+
+
+def test_jitter_is_the_same_in_another_process():
+    script = "import json; from geocoding import jitter; print(json.dumps([a.tolist() for a in jitter([78701], ['12 Oak St'])]))"
+    output = subprocess.run([sys.executable, "-c", script], cwd=Path(__file__).resolve().parents[1],
+                            capture_output=True, text=True, check=True).stdout
+    assert json.loads(output) == [a.tolist() for a in jitter([78701], ["12 Oak St"])]
+
+
+def test_jitter_spread():
+    d_lat, d_lng = jitter(np.full(20_000, 78701), np.arange(20_000))
+    assert abs(d_lat.std() - JITTER_DEGREES) < 0.05 * JITTER_DEGREES
+    assert abs(d_lng.mean()) < 0.05 * JITTER_DEGREES
+
+
+def test_table_wins_over_listing_centres():
+    table = pd.DataFrame({"zip": [78701, 10001, -5], "lat": [30.27, 40.75, 1.0], "lng": [-97.74, -73.99, 1.0]})
+    zip_stats = {78701: {"zip_lat": 30.0, "zip_lng": -97.0}, 78702: {"zip_lat": 30.26, "zip_lng": -97.71},
+                 99999: {"zip_lat": float("nan"), "zip_lng": float("nan")}}
+    geocoder = ZipGeocoder.build(table, zip_stats)
+    assert geocoder.zips.tolist() == [10001, 78701, 78702]  # invalid zip and missing centre dropped
+
+    result = geocoder.geocode([78701, 78702, 12345], jittered=False)
+    assert result["zip_lat"][:2].tolist() == [30.27, 30.26] and result["zip_lng"][:2].tolist() == [-97.74, -97.71]
+    assert [SOURCES[s] for s in result["source"][:2]] == ["table", "listings"]
+    assert result["found"].tolist() == [True, True, False] and np.isnan(result["lat"][2])
@@ -0,0 +1,50 @@
+import os
+import pickle
+
+from model_registry import ModelRegistry, ModelSpec
+
+
+def _smoke(artifact):
+    if artifact.scale <= 0:
+        raise ValueError(f"non-positive prediction scale {artifact.scale}")
+
+
+def make_registry(tmp_path) -> ModelRegistry:
+    return ModelRegistry(tmp_path, {"price": ModelSpec("price.pkl", lambda saved: {"scale": saved["scale"]}, _smoke)})
+
+
+def write_model(tmp_path, scale: float, version: str):
+    path = tmp_path / "price.pkl"
+    with open(path, "wb") as f:
+        pickle.dump({"scale": scale, "version": version}, f)
+    # Distinct mtime per write so the registry sees every change, however fast the test runs
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000_000))
+
+
+def test_failed_smoke_test_keeps_serving_the_old_model(tmp_path):
+    registry = make_registry(tmp_path)
+    write_model(tmp_path, 1.5, "v1")
+    assert registry.load("price")["result"] == "loaded"
+    serving = registry.get("price")
+
+    write_model(tmp_path, -1.0, "v2")
+    result = registry.load("price")
+    assert result["result"] == "failed" and result["version"] == "v1"
+    assert "non-positive prediction scale" in registry.status()["price"]["last_error"]
+    assert registry.get("price") is serving and serving.scale == 1.5
+    assert registry.changed() == []  # the watcher does not retry the same rejected file
+
+    write_model(tmp_path, 2.0, "v3")
+    result = registry.load("price")
+    assert result["result"] == "reloaded" and result["previous_version"] == "v1"
+    assert registry.get("price").scale == 2.0 and registry.status()["price"]["last_error"] is None
+
+
+def test_unreadable_artifact_keeps_serving_the_old_model(tmp_path):
+    registry = make_registry(tmp_path)
+    write_model(tmp_path, 1.5, "v1")
+    registry.load("price")
+
+    (tmp_path / "price.pkl").write_bytes(b"half-copied pickle")
+    assert registry.load("price", force=True)["result"] == "failed"
+    assert registry.get("price").version == "v1"
@@ -0,0 +1,78 @@
+"""
+/api/analytics/cube against a pandas groupby of the same rows, after the load, an ingested
+delta and a restart from the startup snapshot (see api_harness.py)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import api_harness
+from price_cube import BAND_LABELS, BED_CAP, PRICE_BANDS, SIZE_BANDS
+
+CUBES = [
+    {"group_by": ["state", "bed"]},
+    {"group_by": ["price_band"], "state": ["Texas", "Ohio"]},
+    {"group_by": ["city"], "state": ["Florida"], "quantiles": [0.25, 0.75]},
+]
+
+
+def bands(values, edges, dim):
+    positions = np.searchsorted(edges, values.fillna(0), side="right") - 1
+    return [BAND_LABELS[dim][i] if v > 0 else None for v, i in zip(values, positions)]
+
+
+def cube_frame(df):
+    """The cube's dimensions and measures per row"""
+    price = pd.to_numeric(df["price"], errors="coerce")
+    size = pd.to_numeric(df["house_size"], errors="coerce")
+    return pd.DataFrame({
+        "state": df["state"].str.strip(),
+        "city": df["city"].str.strip(),
+        "bed": np.minimum(np.floor(df["bed"]), BED_CAP),
+        "price_band": bands(price, PRICE_BANDS, "price_band"),
+        "size_band": bands(size, SIZE_BANDS, "size_band"),
+        "price": price.where(price > 0),
+        "house_size": size.where(size > 0),
+    })
+
+
+def check(main, client):
+    frame = cube_frame(main.property_store.df)
+    for params in CUBES:
+        response = client.get("/api/analytics/cube", params=params)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        selected = frame[frame["state"].isin(params["state"])] if "state" in params else frame
+        groups = {tuple(None if pd.isna(v) else v for v in (key if isinstance(key, tuple) else (key,))): rows
+                  for key, rows in selected.groupby(params["group_by"], dropna=False)}
+        assert body["total_groups"] == len(groups), params
+        for group in body["groups"]:
+            key = tuple(group[dim] for dim in params["group_by"])
+            rows = groups[key]
+            assert group["count"] == len(rows), (params, key)
+            prices = rows["price"].dropna()
+            assert group["price_count"] == len(prices)
+            if len(prices):
+                assert group["avg_price"] == pytest.approx(prices.mean(), rel=1e-6)
+                for q in params.get("quantiles", [0.5]):
+                    assert group["price_quantiles"][f"p{q * 100:g}"] == pytest.approx(
+                        api_harness.nth(prices, q), rel=api_harness.QUANTILE_TOLERANCE)
+            sizes = rows["house_size"].dropna()
+            if len(sizes):
+                assert group["avg_size"] == pytest.approx(sizes.mean(), rel=1e-6)
+
+
+def test_cube_matches_pandas_after_load(property_api):
+    check(*property_api)
+
+
+def test_cube_matches_pandas_after_ingest(property_api):
+    main, client = property_api
+    api_harness.ingest(main)
+    check(main, client)
+
+
+def test_cube_matches_pandas_after_snapshot_restore_and_replay(property_api):
+    main, client = property_api
+    api_harness.restart(main)
+    check(main, client)
@@ -0,0 +1,54 @@
+"""
+/api/analytics/distribution against exact counts, histograms and quantiles of the same rows,
+after the load, an ingested delta and a restart from the startup snapshot (see api_harness.py)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import api_harness
+from distributions import HISTOGRAM_EDGES
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def check(main, client):
+    df = main.property_store.df
+    price = pd.to_numeric(df["price"], errors="coerce")
+    city = df["state"] + "/" + df["city"]
+    zips = df["zip_code"].astype("Int64").astype(str)
+    selections = [
+        ("state", ["Texas", "Ohio"], df["state"]),
+        ("city", [city.iloc[0], city.iloc[1], "Florida/Flo City 3"], city),
+        ("zip", [zips.iloc[0], zips.iloc[5], "99999"], zips),
+        ("cluster", [str(c) for c in df["street_cluster"].iloc[:4]], df["street_cluster"].astype(str)),
+        ("state", None, df["state"]),
+    ]
+    for level, regions, keys in selections:
+        response = client.get("/api/analytics/distribution", params={"level": level, "region": regions or []})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        mask = (price > 0) & keys.notna() & (keys.isin(regions) if regions else True)
+        prices = price[mask].to_numpy()
+        assert body["count"] == len(prices), (level, regions)
+        expected = np.bincount(np.searchsorted(HISTOGRAM_EDGES, prices, side="right") - 1, minlength=len(HISTOGRAM_EDGES))
+        assert [b["count"] for b in body["histogram"]] == expected.tolist(), (level, regions)
+        for q in QUANTILES:
+            assert body["price_quantiles"][f"p{q * 100:g}"] == pytest.approx(
+                api_harness.nth(prices, q), rel=api_harness.QUANTILE_TOLERANCE)
+
+
+def test_distributions_match_pandas_after_load(property_api):
+    check(*property_api)
+
+
+def test_distributions_match_pandas_after_ingest(property_api):
+    main, client = property_api
+    api_harness.ingest(main)
+    check(main, client)
+
+
+def test_distributions_match_pandas_after_snapshot_restore_and_replay(property_api):
+    main, client = property_api
+    api_harness.restart(main)
+    check(main, client)
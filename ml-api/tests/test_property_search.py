@@ -0,0 +1,66 @@
+"""
+/api/properties/search against a pandas filter and sort of the same rows, after the load,
+an ingested delta and a restart from the startup snapshot (see api_harness.py)
+"""
+import numpy as np
+
+import api_harness
+
+SEARCHES = [
+    {"min_price": 200000, "max_price": 400000, "beds": [3, 4], "state": "Texas", "sort": "price", "limit": 500},
+    {"min_price": 150000, "beds": [2], "sort": "price", "order": "desc", "limit": 100},
+    {"max_price": 300000, "state": "ohio", "sort": "row", "limit": 500},
+    {"min_price": 100000, "max_price": 900000, "baths": [2], "sort": "price", "limit": 20, "offset": 40},
+]
+
+
+def reference(df, params):
+    """The page's rows and the total match count"""
+    mask = np.ones(len(df), dtype=bool)
+    if "min_price" in params:
+        mask &= (df["price"] >= params["min_price"]).to_numpy()
+    if "max_price" in params:
+        mask &= (df["price"] <= params["max_price"]).to_numpy()
+    if "beds" in params:
+        mask &= df["bed"].isin(params["beds"]).to_numpy()
+    if "baths" in params:
+        mask &= df["bath"].isin(params["baths"]).to_numpy()
+    if "state" in params:
+        mask &= (df["state"].str.strip().str.lower() == params["state"].lower()).fillna(False).to_numpy()
+    rows = np.flatnonzero(mask)
+    if params["sort"] != "row":
+        values = df[params["sort"]].to_numpy(dtype=float)[rows]
+        # Ties are broken by row
+        rows = rows[np.lexsort((rows, -values if params.get("order") == "desc" else values))]
+    offset = params.get("offset", 0)
+    return rows[offset:offset + params["limit"]].tolist(), int(mask.sum())
+
+
+def check(main, client):
+    df = main.property_store.df
+    for params in SEARCHES:
+        response = client.get("/api/properties/search", params=params)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        expected, total = reference(df, params)
+        assert [record["row"] for record in body["data"]] == expected, params
+        if body["total"] is not None:
+            assert body["total"] == total, params
+
+
+def test_search_matches_pandas_after_load(property_api):
+    main, client = property_api
+    assert len(main.property_store.df) == api_harness.ROWS
+    check(main, client)
+
+
+def test_search_matches_pandas_after_ingest(property_api):
+    main, client = property_api
+    api_harness.ingest(main)
+    check(main, client)
+
+
+def test_search_matches_pandas_after_snapshot_restore_and_replay(property_api):
+    main, client = property_api
+    api_harness.restart(main)
+    check(main, client)
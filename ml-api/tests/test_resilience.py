@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from resilience import CircuitBreaker, StaleCache, TokenBucket, UpstreamGuard, UpstreamUnavailableError
+
+
+def open_guard(reset_timeout: float = 0.05) -> UpstreamGuard:
+    guard = UpstreamGuard("test", rate=1000, burst=1000, failure_threshold=1, reset_timeout=reset_timeout, max_attempts=1)
+    guard.record(False)
+    assert guard.breaker.state == CircuitBreaker.OPEN
+    time.sleep(reset_timeout)
+    return guard
+
+
+def test_cancelled_probe_frees_half_open_slot():
+    guard = open_guard()
+    started = asyncio.Event()
+
+    async def hang(_timeout):
+        started.set()
+        await asyncio.sleep(60)
+
+    async def scenario():
+        probe = asyncio.ensure_future(guard.call(hang, timeout=60))
+        await started.wait()
+        assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+        assert not guard.breaker.allow()  # the probe holds the only slot
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(scenario())
+    assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+    assert guard.breaker.allow()
+
+
+def test_cancelled_while_waiting_for_token_frees_slot():
+    guard = open_guard()
+    guard.bucket.tokens = 0
+    guard.bucket.rate = 0.5  # next token in 2s
+
+    async def scenario():
+        probe = asyncio.ensure_future(guard.admit(time.monotonic() + 10))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(scenario())
+    assert guard.breaker.allow()
+
+
+def test_non_transport_error_records_failure():
+    guard = open_guard()
+
+    async def redirects(_timeout):
+        raise httpx.TooManyRedirects("too many redirects")
+
+    with pytest.raises(httpx.TooManyRedirects):
+        asyncio.run(guard.call(redirects, timeout=5))
+    assert guard.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(UpstreamUnavailableError):
+        asyncio.run(guard.admit(time.monotonic() + 1))
+
+
+def test_stale_probe_expires_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.05)
+    assert breaker.allow()  # probe admitted, then lost without record() or release()
+    assert not breaker.allow()
+    time.sleep(0.05)
+    assert breaker.allow()
+
+
+def test_stale_cache_evicts_least_recently_used():
+    cache = StaleCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a is now the most recently used
+    cache.put("c", 3)
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_stale_cache_entries_expire():
+    cache = StaleCache(max_entries=10, ttl=0.05)
+    cache.put("a", [])
+    assert cache.get("a", "missing") == []
+    time.sleep(0.06)
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_token_bucket_sleeps_outside_the_lock():
+    async def scenario():
+        bucket = TokenBucket(rate=10, capacity=1)
+        assert await bucket.acquire(max_wait=0)
+        # One caller queues for the next token; meanwhile another that cannot wait
+        # must still get its answer at once instead of sitting behind the sleeper.
+        waiter = asyncio.create_task(bucket.acquire(max_wait=1))
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        assert not await bucket.acquire(max_wait=0.05)  # next free slot is ~0.2s out
+        assert time.monotonic() - started < 0.05
+        assert await waiter
+
+    asyncio.run(scenario())
+
+
+def test_token_bucket_rate_zero_disables_the_limit():
+    async def scenario():
+        guard = UpstreamGuard("test", rate=0, burst=1)
+        for _ in range(5):
+            await guard.admit(time.monotonic())
+
+    asyncio.run(scenario())
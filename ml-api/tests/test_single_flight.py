@@ -0,0 +1,47 @@
+import asyncio
+
+from education_service import EducationService
+
+
+def test_last_waiter_leaving_cancels_the_shared_call():
+    service = EducationService()
+    upstream = {"started": 0, "cancelled": 0}
+
+    async def call():
+        upstream["started"] += 1
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            upstream["cancelled"] += 1
+            raise
+
+    async def scenario():
+        first = asyncio.ensure_future(service._single_flight("k", call))
+        second = asyncio.ensure_future(service._single_flight("k", call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert upstream == {"started": 1, "cancelled": 0}  # second still waits on it
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert upstream == {"started": 1, "cancelled": 1}
+        assert not service._inflight and not service._waiters
+
+    asyncio.run(scenario())
+
+
+def test_waiters_share_one_result():
+    service = EducationService()
+    started = []
+
+    async def call():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    async def scenario():
+        return await asyncio.gather(*(service._single_flight("k", call) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [{"ok": True}] * 5
+    assert len(started) == 1
+    assert not service._inflight and not service._waiters
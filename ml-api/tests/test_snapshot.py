@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+
+from snapshot import StartupSnapshot
+
+
+def make_snapshot(tmp_path):
+    source = tmp_path / "properties.csv"
+    source.write_text("price,city\n100,Austin\n250,Dallas\n")
+    snapshot = StartupSnapshot(tmp_path / ".snapshot")
+    frame = pd.DataFrame({"price": [100.0, 250.0], "city": ["Austin", "Dallas"]})
+    snapshot.save({"properties": source}, {"properties": frame}, {"meta": {"rows": 2}})
+    return snapshot, source
+
+
+def test_snapshot_restores_while_sources_are_unchanged(tmp_path):
+    snapshot, source = make_snapshot(tmp_path)
+    frames, objects, _ = snapshot.load({"properties": source})
+    assert frames["properties"]["price"].tolist() == [100.0, 250.0]
+    assert frames["properties"]["city"].tolist() == ["Austin", "Dallas"]
+    assert objects == {"meta": {"rows": 2}}
+
+
+def test_snapshot_is_stale_after_a_source_file_changes(tmp_path):
+    snapshot, source = make_snapshot(tmp_path)
+    sources = {"properties": source}
+
+    # Same size and mtime, different bytes: only the content hash can tell
+    stat = source.stat()
+    source.write_text(source.read_text().replace("Austin", "Boston"))
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert snapshot.stale_reason(snapshot.manifest(), sources) == "properties.csv changed"
+    assert snapshot.load(sources) is None
+
+
+def test_snapshot_is_stale_after_append_touch_or_delete(tmp_path):
+    snapshot, source = make_snapshot(tmp_path)
+    sources = {"properties": source}
+    stat = source.stat()
+
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert snapshot.load(sources) is None
+
+    with open(source, "a") as f:
+        f.write("300,Houston\n")
+    assert snapshot.load(sources) is None
+
+    source.unlink()
+    assert snapshot.load(sources) is None
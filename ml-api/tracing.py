@@ -0,0 +1,177 @@
+"""
+Tracing - lightweight spans around hot-path stages plus opt-in request profiling
+
+ML_API_TRACING selects where spans go:
+  off  (default) - spans are no-ops
+  log  - each request's span tree is logged (only requests slower than ML_API_TRACE_SLOW_MS)
+  otel - spans are also sent to OpenTelemetry (OTLP exporter if installed, console otherwise)
+Traced requests get a Server-Timing header so stage times show up in browser dev tools.
+"""
+import asyncio
+import io
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACING_MODE = os.getenv("ML_API_TRACING", "off").lower()
+SLOW_REQUEST_MS = float(os.getenv("ML_API_TRACE_SLOW_MS", "0"))
+
+_otel_tracer = None
+if TRACING_MODE == "otel":
+    try:
+        from opentelemetry import trace as otel_trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+        provider = TracerProvider(resource=Resource.create({"service.name": "ml-models-api"}))
+        try:
+            # Honours OTEL_EXPORTER_OTLP_ENDPOINT, e.g. a local collector on :4318
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        except ImportError:
+            provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
+        otel_trace.set_tracer_provider(provider)
+        _otel_tracer = otel_trace.get_tracer("ml-api")
+    except ImportError:
+        logger.warning("ML_API_TRACING=otel but opentelemetry-sdk is not installed, falling back to log mode")
+        TRACING_MODE = "log"
+
+
+class Span:
+    __slots__ = ("name", "attributes", "start", "end", "children")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "ms": round(self.duration_ms, 3),
+            **({"attributes": self.attributes} if self.attributes else {}),
+            **({"children": [c.to_dict() for c in self.children]} if self.children else {}),
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def enabled() -> bool:
+    return TRACING_MODE != "off"
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a stage as a child of the current span. A no-op outside a traced request."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    current = Span(name, attributes)
+    parent.children.append(current)
+    token = _current_span.set(current)
+    otel_cm = _otel_tracer.start_as_current_span(name, attributes=attributes) if _otel_tracer else None
+    otel_span = otel_cm.__enter__() if otel_cm else None
+    try:
+        yield current
+    finally:
+        current.end = time.perf_counter()
+        if otel_cm:
+            for key, value in current.attributes.items():
+                otel_span.set_attribute(key, value)
+            otel_cm.__exit__(None, None, None)
+        _current_span.reset(token)
+
+
+@contextmanager
+def trace_request(name: str, **attributes):
+    """Root span for one request; yields the Span, or None when tracing is off"""
+    if not enabled():
+        yield None
+        return
+    root = Span(name, attributes)
+    token = _current_span.set(root)
+    otel_cm = _otel_tracer.start_as_current_span(name, attributes=attributes) if _otel_tracer else None
+    if otel_cm:
+        otel_cm.__enter__()
+    try:
+        yield root
+    finally:
+        root.end = time.perf_counter()
+        if otel_cm:
+            otel_cm.__exit__(None, None, None)
+        _current_span.reset(token)
+        if TRACING_MODE == "log" and root.duration_ms >= SLOW_REQUEST_MS:
+            logger.info(f"trace {json.dumps(root.to_dict())}")
+
+
+def server_timing(root: Span) -> str:
+    """Server-Timing header value from the root span's direct children"""
+    parts = [f'{c.name.replace(" ", "_")};dur={c.duration_ms:.2f}' for c in root.children[:20]]
+    parts.append(f"total;dur={root.duration_ms:.2f}")
+    return ", ".join(parts)
+
+
+# ==========================================
+# PER-REQUEST PROFILING
+# ==========================================
+# Held while a ?profile=1 request runs. Both engines install a per-thread profile hook, so a
+# second profiler started on the event loop thread would replace the first one's hook.
+profile_lock = asyncio.Lock()
+
+
+class RequestProfiler:
+    """Profile one request: pyinstrument (sampling, async-aware) when installed, cProfile otherwise.
+
+    cProfile is deterministic and sees everything the event loop thread runs
+    while the request is in flight, so concurrent requests can show up in
+    its report; pyinstrument only samples the awaiting task. Only one runs
+    at a time (profile_lock).
+    """
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self.engine = "pyinstrument"
+            self._profiler = Profiler(interval=0.001, async_mode="enabled")
+        except ImportError:
+            import cProfile
+            self.engine = "cProfile"
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.engine == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.engine == "pyinstrument":
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def report(self, limit: int = 60) -> str:
+        if self.engine == "pyinstrument":
+            return self._profiler.output_text(unicode=True, color=False, show_all=False)
+        import pstats
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()